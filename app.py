@@ -3,18 +3,18 @@
 from gevent import monkey
 monkey.patch_all()
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 from flask_socketio import SocketIO, emit, join_room
 import os
+import time
 import threading
 import json
 from datetime import datetime, timedelta
-import zipfile
-import tempfile
 import traceback
 import platform
 import uuid
 import re
+from urllib.parse import urlparse, quote
 import gevent # 导入gevent用于异步sleep
 import random # <--- 新增导入
 import requests # 用于调用Jina AI API
@@ -33,6 +33,58 @@ from system_file_crawler_refactored import SystemFileCrawler
 from normative_file_crawler_refactored import NormativeFileCrawler
 from flk_crawler_refactored import FlkCrawler
 from custom_page_crawler import CustomPageCrawler
+from base_crawler import load_crawler_config
+from http_client import get_http_session
+from blob_store import get_blob_store
+from crawl_manifest import file_sha256
+from crawl_checkpoint import CrawlCheckpoint, has_checkpoint, delete_checkpoint
+from file_catalog import get_file_catalog
+from zip_stream import stream_zip
+from task_store import TaskStore
+from task_scheduler import TaskScheduler
+from hub_bridge import HubBridge, BridgedSocketIO, run_blocking
+from gevent.threadpool import ThreadPool
+from job_queue import JobQueue, QueuedSocketIO
+from log_pipeline import LogPipeline
+from progress_aggregator import ProgressAggregator
+
+# 工作进程（python run.py --worker）导入本模块时为True：不做启动恢复，Socket.IO事件写入队列由Web进程转发
+IS_WORKER_PROCESS = os.environ.get('CRAWLER_WORKER') == '1'
+# 工作进程模式：Web进程只把任务写入持久化队列，由独立的工作进程执行，Web进程可以单独重启
+WORKER_MODE = load_crawler_config().get('worker_mode', False)
+
+# 与爬虫共享的HTTP会话（连接池、重试策略），知识库和Jina接口都通过它发送请求
+http_session = get_http_session(load_crawler_config())
+
+# 按内容寻址的文档存储，用于避免向同一知识库重复上传相同内容的文件
+blob_store = get_blob_store(load_crawler_config())
+
+# 持久化的任务登记表：任务历史在重启后保留，上次退出时仍在运行的任务标记为中断（启动后自动从断点恢复）
+task_store = TaskStore(
+    load_crawler_config().get('task_db_path', './tasks.sqlite3'),
+    flush_interval=load_crawler_config().get('task_flush_interval', 2.0)
+)
+task_store.start()
+
+# 工作进程模式下的任务队列（与任务登记表共用数据库）
+job_queue = JobQueue(task_store.db_path)
+
+def requeue_stale_jobs():
+    """把心跳超时（工作进程已退出）的队列任务重新排队，之后由其他工作进程从断点继续"""
+    for task_id in job_queue.requeue_stale(load_crawler_config().get('worker_heartbeat_timeout', 60)):
+        task_store.set_status(task_id, 'queued')
+        print(f"任务 {task_id} 的工作进程已失去响应，重新排队")
+
+interrupted_tasks = []
+if not IS_WORKER_PROCESS:
+    if WORKER_MODE:
+        # 仍在队列中或由工作进程执行的任务不受Web进程重启影响
+        requeue_stale_jobs()
+        interrupted_tasks = task_store.recover_interrupted(exclude=job_queue.task_ids())
+    else:
+        interrupted_tasks = task_store.recover_interrupted()
+    if interrupted_tasks:
+        print(f"已将 {len(interrupted_tasks)} 个上次未结束的任务标记为中断")
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-for-multi-task'
@@ -43,6 +95,33 @@ if platform.system() == 'Linux':
 else:
     socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
 
+# 爬虫任务在独立线程池的真实线程中运行，Selenium、python-docx等阻塞调用不占用gevent主循环；
+# 线程中发出的Socket.IO事件和启动新任务的请求经由hub_bridge交回主循环执行
+hub_bridge = HubBridge()
+if IS_WORKER_PROCESS:
+    thread_socketio = QueuedSocketIO(job_queue)
+    thread_socketio.start()
+else:
+    thread_socketio = BridgedSocketIO(socketio, hub_bridge)
+MAX_RUNNING_TASKS = load_crawler_config().get('max_running_tasks', 4)
+if load_crawler_config().get('crawler_threads', True) and platform.system() == 'Linux':
+    # 比槽位多一个线程：任务结束时先释放槽位再退出线程，下一个任务不必等待
+    crawler_pool = ThreadPool(MAX_RUNNING_TASKS + 1)
+    
+    def spawn_crawler(func, *args):
+        """在爬虫线程池中启动任务（线程池只能在主循环线程中使用）"""
+        hub_bridge.call(crawler_pool.spawn, func, *args)
+else:
+    spawn_crawler = gevent.spawn
+
+# 全局任务调度器：限制同时运行的任务总数和每个来源主机的任务数，其余任务按优先级排队
+task_scheduler = TaskScheduler(
+    max_running=MAX_RUNNING_TASKS,
+    host_limits=load_crawler_config().get('max_tasks_per_host'),
+    spawn=spawn_crawler,
+    logger=lambda message: print(f"[调度器] {message}")
+)
+
 # --- 新增: 日志文件配置 ---
 LOGS_DIR = 'logs'
 if not os.path.exists(LOGS_DIR):
@@ -56,7 +135,7 @@ if not os.path.exists(SUMMARIES_DIR):
     print(f"已创建任务总结文件夹: {SUMMARIES_DIR}")
 
 # --- 核心改动: 任务管理 ---
-# 使用一个字典来管理所有任务
+# 当前进程中任务的运行期状态（logger、爬虫实例、进度），持久化信息和历史记录在task_store中
 CRAWLER_TASKS = {}
 # 存储任务总结报告的字典
 TASK_SUMMARIES = {}
@@ -103,6 +182,37 @@ DOWNLOAD_DIRS = {
     "自定义页面": "./自定义页面"
 }
 
+# 下载文件索引：爬虫保存文件时登记，Web进程后台定期对账扫描（在线程池中运行，不阻塞主循环）
+file_catalog = get_file_catalog(load_crawler_config())
+file_catalog.set_roots(DOWNLOAD_DIRS)
+
+# 上次清理文档存储时的文件索引版本和时间
+_blob_prune_state = {'version': None, 'time': 0}
+
+def prune_orphan_blobs():
+    """
+    清理文档存储中已没有分类文件指向的内容：文件有新增、替换或删除后执行；
+    刚变成孤立的内容要等过了保护期才能删除，因此即使没有变化也每隔一个保护期再执行一次
+    """
+    grace = load_crawler_config().get('blob_prune_grace', 3600)
+    version = file_catalog.version()
+    if version == _blob_prune_state['version'] and time.time() - _blob_prune_state['time'] < grace:
+        return
+    blob_store = get_blob_store(load_crawler_config())
+    if not blob_store:
+        return
+    removed, freed = blob_store.prune(grace)
+    _blob_prune_state.update(version=version, time=time.time())
+    if removed:
+        print(f"已清理文档存储中的 {removed} 份孤立内容，释放 {freed / 1024 / 1024:.1f} MB")
+
+if not IS_WORKER_PROCESS:
+    file_catalog.start(
+        load_crawler_config().get('file_catalog_rescan_interval', 60),
+        executor=run_blocking,
+        after_rescan=prune_orphan_blobs
+    )
+
 def save_summary_to_file(task_id, summary_data):
     """将任务总结保存到文件"""
     try:
@@ -143,6 +253,16 @@ def load_summaries_from_files_fixed():
 # 使用修复版本
 load_summaries_from_files = load_summaries_from_files_fixed
 
+def load_summary_file(task_id):
+    """从文件加载单个任务的总结（由工作进程生成的总结）"""
+    summary_file_path = os.path.join(SUMMARIES_DIR, f"{task_id}_summary.json")
+    try:
+        if os.path.exists(summary_file_path):
+            with open(summary_file_path, 'r', encoding='utf-8') as f:
+                TASK_SUMMARIES[task_id] = json.load(f)
+    except Exception as e:
+        print(f"[ERROR] 加载任务总结文件 {summary_file_path} 失败: {e}")
+
 def delete_summary_file(task_id):
     """删除任务总结文件"""
     try:
@@ -182,7 +302,7 @@ def crawl_custom_page(task_id, page_url, logger, attachment_crawler=None):
         logger.log(f"Jina API URL: {jina_api_url}")
         
         # 调用Jina AI API
-        response = requests.get(jina_api_url, headers=headers, timeout=60)
+        response = http_session.get(jina_api_url, headers=headers, timeout=60)
         
         # 详细的响应调试信息
         logger.log(f"API响应状态码: {response.status_code}")
@@ -250,7 +370,7 @@ def crawl_custom_page(task_id, page_url, logger, attachment_crawler=None):
                 download_path=save_dir,
                 logger=logger,
                 task_id=task_id,
-                socketio=socketio,
+                socketio=thread_socketio,
                 progress_callback=update_task_progress
             )
         
@@ -430,47 +550,43 @@ def save_custom_page_summary(task_id, page_url, file_path, content, stats):
     except Exception as e:
         print(f"[ERROR] 保存自定义页面总结时出错: {e}")
 
+# 任务日志管道：批量写入日志文件、合并为 log_batch 事件发送到前端，控制台/文件/前端各自按级别过滤
+log_pipeline = LogPipeline(
+    thread_socketio,
+    LOGS_DIR,
+    interval=load_crawler_config().get('log_flush_interval', 0.2),
+    console=load_crawler_config().get('log_console', True),
+    console_level=load_crawler_config().get('log_console_level', 'info'),
+    file_level=load_crawler_config().get('log_file_level', 'info'),
+    socket_level=load_crawler_config().get('log_socket_level', 'info')
+)
+log_pipeline.start()
+
+# 任务进度汇总：只保留每个任务的最新进度，按间隔合并为一个 tasks_progress 事件推送到全局房间
+progress_aggregator = ProgressAggregator(
+    thread_socketio,
+    interval=load_crawler_config().get('progress_push_interval', 1.0),
+    window=load_crawler_config().get('progress_rate_window', 60)
+)
+progress_aggregator.start()
+
 class WebSocketLogger:
-    """用于向特定任务房间发送日志并写入文件的类"""
+    """用于向特定任务房间发送日志并写入文件的类（经由批量日志管道输出）"""
     def __init__(self, socketio, task_id):
         self.socketio = socketio
         self.task_id = task_id
         self.log_file_path = os.path.join(LOGS_DIR, f"{self.task_id}.log")
-        try:
-            # 以UTF-8编码追加模式打开文件
-            self.log_file = open(self.log_file_path, 'a', encoding='utf-8')
-        except Exception as e:
-            print(f"严重错误: 无法打开日志文件 {self.log_file_path}: {e}")
-            self.log_file = None
+        self.closed = False
     
     def log(self, message, level='info'):
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_data = {
-            'timestamp': datetime.now().strftime('%H:%M:%S'), # 前端只显示时间
-            'level': level,
-            'message': str(message),
-            'task_id': self.task_id  # 添加task_id，让前端知道消息来自哪个任务
-        }
-        
-        # 格式化控制台和文件日志消息
-        log_message_full = f"[{timestamp}] [{level.upper()}] [Task: {self.task_id}] {message}"
-        
-        print(log_message_full) # 打印到控制台
-        self.socketio.emit('log_message', log_data, room=self.task_id) # 发送到前端
-
-        # 写入文件
-        if self.log_file:
-            try:
-                self.log_file.write(log_message_full + '\n')
-                self.log_file.flush() # 确保立即写入
-            except Exception as e:
-                print(f"错误: 无法写入日志文件 {self.task_id}: {e}")
+        # 关闭后的日志只输出到控制台和前端，不再写入文件
+        log_pipeline.log(self.task_id, message, level, to_file=not self.closed)
     
     def close(self):
-        """关闭日志文件句柄"""
-        if self.log_file:
-            self.log_file.close()
-            self.log_file = None
+        """输出缓冲中的日志并关闭日志文件"""
+        if not self.closed:
+            self.closed = True
+            log_pipeline.close_task(self.task_id)
 
 # BaseWebCrawler 类已经被移除，功能已集成到 demo/base_crawler.py 中的 BaseCrawler 类
 
@@ -480,9 +596,270 @@ def update_task_progress(task_id, progress_data):
     """更新任务进度的回调函数"""
     if task_id in CRAWLER_TASKS:
         CRAWLER_TASKS[task_id]['progress'] = progress_data
+        # 进度变化频繁，只更新内存，由task_store定期批量写回、progress_aggregator合并推送
+        task_store.save(task_id, CRAWLER_TASKS[task_id])
+        progress_aggregator.update(task_id, progress_data)
+
+def set_task_status(task_id, status, finished=False):
+    """
+    更新任务状态并立即持久化
+    :param task_id: 任务ID
+    :param status: 新状态
+    :param finished: 是否同时记录结束时间
+    """
+    task = CRAWLER_TASKS.get(task_id)
+    if not task:
+        return
+    task['status'] = status
+    if finished:
+        task['end_time'] = datetime.now()
+        progress_aggregator.finish(task_id)
+    task_store.save(task_id, task, immediate=True)
+
+# 仍在排队或运行、不能恢复或删除的任务状态
+ACTIVE_TASK_STATUSES = ('queued', 'starting', 'running', 'stopping')
+
+def get_task_host(crawler_type, page_url=None):
+    """任务访问的来源主机（调度器按主机限制并发任务数）"""
+    crawler_type = crawler_type or ''
+    if crawler_type == 'custom':
+        return urlparse(page_url or '').netloc or 'custom'
+    if crawler_type.startswith('flk_'):
+        return 'flk.npc.gov.cn'
+    return 'www.mem.gov.cn'
+
+def schedule_task(task_id, priority=0):
+    """
+    把已登记的任务交给调度器：有空闲槽位时立即启动，否则排队等待
+    :param task_id: 任务ID（CRAWLER_TASKS中的条目）
+    :param priority: 优先级，数值大的先启动
+    :return: 排队位置，已立即启动时返回None
+    """
+    task = CRAWLER_TASKS[task_id]
+    crawler_type = task['crawler_type']
+    if WORKER_MODE:
+        # 写入持久化队列，由工作进程领取执行；Web进程不再持有该任务的运行期状态
+        job_queue.enqueue(task_id, get_task_host(crawler_type, task.get('page_url')), {
+            'crawler_type': crawler_type,
+            'max_pages': task.get('max_pages'),
+            'page_url': task.get('page_url'),
+            'concurrency': task.get('concurrency'),
+            'incremental': task.get('incremental'),
+            'watermark': task.get('watermark')
+        }, priority)
+        set_task_status(task_id, 'queued')
+        task['logger'].log("任务已加入队列，等待工作进程执行")
+        task['logger'].close()
+        CRAWLER_TASKS.pop(task_id, None)
+        return job_queue.position(task_id)
+    started = task_scheduler.submit(
+        task_id, get_task_host(crawler_type, task.get('page_url')),
+        run_crawler_thread, task_id, crawler_type, task.get('max_pages'), task.get('page_url'),
+        task.get('concurrency'), task.get('incremental'), task.get('watermark'),
+        priority=priority
+    )
+    if started:
+        return None
+    position = task_scheduler.position(task_id)
+    set_task_status(task_id, 'queued')
+    task['logger'].log(f"同时运行的任务数已达上限，任务排队中（第 {position} 位）")
+    return position
+
+def get_queue_position(task_id):
+    """任务的排队位置（从1开始），不在排队时返回None"""
+    return job_queue.position(task_id) if WORKER_MODE else task_scheduler.position(task_id)
+
+def stop_worker_task(task_id):
+    """
+    停止由工作进程执行的任务：排队中的直接取消，执行中的通过队列通知工作进程
+    :param task_id: 任务ID
+    :return: (是否成功, 提示信息)
+    """
+    task = task_store.get(task_id)
+    if not task:
+        return False, '任务不存在'
+    if task['status'] == 'queued' and job_queue.cancel(task_id):
+        task_store.set_status(task_id, 'cancelled', finished=True)
+        socketio.emit('task_status_change', {
+            'task_id': task_id,
+            'status': 'cancelled',
+            'crawler_type': task.get('crawler_type')
+        })
+        return True, '排队中的任务已取消'
+    if task['status'] in ('starting', 'running') and job_queue.request_stop(task_id):
+        task_store.set_status(task_id, 'stopping')
+        return True, '停止信号已发送'
+    return False, '任务不在运行状态，无法停止'
+
+def run_worker_job(job):
+    """
+    在工作进程中执行一个队列任务（由 worker.py 调用）
+    :param job: JobQueue.claim 返回的任务
+    """
+    task_id = job['task_id']
+    params = job['payload']
+    record = task_store.get(task_id) or {}
+    CRAWLER_TASKS[task_id] = {
+        'status': 'starting',
+        'logger': WebSocketLogger(thread_socketio, task_id),
+        'crawler': None,
+        'start_time': record.get('start_time') or datetime.now(),
+        'end_time': None,
+        'crawler_type': params['crawler_type'],
+        'max_pages': params.get('max_pages'),
+        'page_url': params.get('page_url'),
+        'concurrency': params.get('concurrency'),
+        'incremental': params.get('incremental'),
+        'watermark': params.get('watermark'),
+        'progress': {'current': 0, 'total': 0, 'percentage': 0, 'task_id': task_id}
+    }
+    set_task_status(task_id, 'starting')
+    try:
+        run_crawler_thread(task_id, params['crawler_type'], params.get('max_pages'), params.get('page_url'),
+                           params.get('concurrency'), params.get('incremental'), params.get('watermark'))
+    finally:
+        task_store.flush()
+        CRAWLER_TASKS.pop(task_id, None)
+
+def cancel_queued_task(task_id):
+    """
+    取消排队中的任务
+    :param task_id: 任务ID
+    :return: 是否已取消
+    """
+    if not task_scheduler.cancel(task_id):
+        return False
+    set_task_status(task_id, 'cancelled', finished=True)
+    task = CRAWLER_TASKS.get(task_id)
+    if task and task.get('logger'):
+        task['logger'].log("任务已在排队中取消", 'warning')
+        task['logger'].close()
+    thread_socketio.emit('task_status_change', {
+        'task_id': task_id,
+        'status': 'cancelled',
+        'crawler_type': task.get('crawler_type') if task else None
+    })
+    return True
+
+def resume_task(task_id):
+    """
+    以原任务ID和参数重新运行任务，爬虫从断点继续（日志追加到原日志文件）
+    :param task_id: 任务ID
+    :return: (是否成功, 提示信息)
+    """
+    task = get_task_record(task_id)
+    if not task:
+        return False, '任务不存在'
+    if task['status'] in ACTIVE_TASK_STATUSES:
+        return False, '任务正在运行中'
+    if task.get('crawler_type') == 'custom':
+        return False, '自定义页面任务不支持断点续爬'
+    if task['status'] != 'interrupted' and not has_checkpoint(task_store.db_path, task_id):
+        return False, '任务已完整结束，没有可恢复的断点'
+    
+    logger = WebSocketLogger(thread_socketio, task_id)
+    CRAWLER_TASKS[task_id] = {
+        'status': 'starting',
+        'logger': logger,
+        'crawler': None,
+        'start_time': task['start_time'] or datetime.now(),
+        'end_time': None,
+        'crawler_type': task['crawler_type'],
+        'max_pages': task.get('max_pages'),
+        'page_url': task.get('page_url'),
+        'concurrency': task.get('concurrency'),
+        'incremental': task.get('incremental'),
+        'watermark': task.get('watermark'),
+        'progress': {'current': 0, 'total': 0, 'percentage': 0, 'task_id': task_id}
+    }
+    task_store.save(task_id, CRAWLER_TASKS[task_id], immediate=True)
+    logger.log(f"任务 {task_id} 从断点恢复，准备启动...")
+    
+    position = schedule_task(task_id)
+    return True, '任务已从断点恢复' if position is None else f'任务已从断点恢复，排队中（第 {position} 位）'
+
+def resume_interrupted_tasks(task_ids):
+    """启动时自动恢复上次进程退出时中断的任务"""
+    for task_id in task_ids:
+        try:
+            success, message = resume_task(task_id)
+            print(f"[DEBUG] 自动恢复任务 {task_id}: {message}")
+        except Exception as e:
+            print(f"[ERROR] 自动恢复任务 {task_id} 失败: {e}")
 
-def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None):
-    """独立的爬虫线程函数"""
+def get_task_record(task_id):
+    """获取任务：优先返回内存中的运行期状态，否则从任务登记表查询历史记录"""
+    return CRAWLER_TASKS.get(task_id) or task_store.get(task_id)
+
+def format_task_info(task_id, task_data):
+    """将任务字典转为接口返回的任务信息"""
+    # 计算运行时间
+    if task_data['start_time']:
+        if task_data['end_time']:
+            duration = task_data['end_time'] - task_data['start_time']
+        else:
+            duration = datetime.now() - task_data['start_time']
+        duration_str = str(duration).split('.')[0]  # 去掉微秒
+    else:
+        duration_str = "0:00:00"
+    
+    return {
+        'task_id': task_id,
+        'status': task_data['status'],
+        'crawler_type': task_data.get('crawler_type', 'unknown'),
+        'crawler_name': CRAWLER_TYPE_NAMES.get(task_data.get('crawler_type', ''), '未知'),
+        'start_time': task_data['start_time'].strftime('%Y-%m-%d %H:%M:%S') if task_data['start_time'] else None,
+        'end_time': task_data['end_time'].strftime('%Y-%m-%d %H:%M:%S') if task_data['end_time'] else None,
+        'duration': duration_str,
+        'max_pages': task_data.get('max_pages'),
+        'progress': progress_aggregator.get(task_id) or task_data.get('progress') or {'current': 0, 'total': 0, 'percentage': 0},
+        'queue_position': get_queue_position(task_id) if task_data['status'] == 'queued' else None
+    }
+
+def query_task_list(params):
+    """
+    按条件分页查询任务列表（最新的在前面）
+    :param params: 查询参数，可包含 status（多个状态用逗号分隔）、crawler_type、page、page_size
+    :return: 包含 tasks、total、page、page_size、version 的字典
+    """
+    page = max(1, int(params.get('page') or 1))
+    page_size = min(500, max(1, int(params.get('page_size') or 100)))
+    status = params.get('status')
+    if status:
+        status = [s.strip() for s in status.split(',') if s.strip()]
+    # 先读取版本号：查询期间发生的修改版本号更大，之后会作为增量再次推送
+    version = task_store.version()
+    tasks, total = task_store.query(
+        status=status,
+        crawler_type=params.get('crawler_type'),
+        limit=page_size,
+        offset=(page - 1) * page_size
+    )
+    return {
+        'tasks': [format_task_info(task['task_id'], task) for task in tasks],
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'version': version
+    }
+
+def query_task_changes(since):
+    """
+    查询某个版本之后的任务变化（增量更新）
+    :param since: 客户端已有的版本号
+    :return: 包含 from_version、version、created、updated、removed 的字典
+    """
+    created, updated, removed, version = task_store.changes_since(since)
+    return {
+        'from_version': since,
+        'version': version,
+        'created': [format_task_info(task['task_id'], task) for task in created],
+        'updated': [format_task_info(task['task_id'], task) for task in updated],
+        'removed': removed
+    }
+
+def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None, concurrency=None, incremental=None, watermark=None):
+    """独立的爬虫线程函数（在爬虫线程池中运行，向前端发送事件须使用thread_socketio）"""
     print(f"[DEBUG] 进入爬虫线程函数: task_id={task_id}, crawler_type={crawler_type}")
     
     task = CRAWLER_TASKS.get(task_id)
@@ -499,23 +876,23 @@ def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None):
         if crawler_type == 'gz' or crawler_type == 'mem_gz':
             print(f"[DEBUG] 创建 GzCrawler 实例...")
             download_path = "./应急部-规章" if crawler_type == 'mem_gz' else "./规章"
-            crawler = GzCrawler(download_path=download_path, logger=logger, task_id=task_id, socketio=socketio, progress_callback=update_task_progress)
+            crawler = GzCrawler(download_path=download_path, logger=logger, task_id=task_id, socketio=thread_socketio, progress_callback=update_task_progress)
         elif crawler_type == 'memgov' or crawler_type == 'mem_flfg':
             print(f"[DEBUG] 创建 MemGovCrawler 实例...")
             download_path = "./应急部-法律法规" if crawler_type == 'mem_flfg' else "./法律法规"
-            crawler = MemGovCrawler(download_path=download_path, logger=logger, task_id=task_id, socketio=socketio, progress_callback=update_task_progress)
+            crawler = MemGovCrawler(download_path=download_path, logger=logger, task_id=task_id, socketio=thread_socketio, progress_callback=update_task_progress)
         elif crawler_type == 'normative_file' or crawler_type == 'mem_gfxwj':
             print(f"[DEBUG] 创建 NormativeFileCrawler 实例...")
             download_path = "./应急部-规范性文件" if crawler_type == 'mem_gfxwj' else "./规范性文件"
-            crawler = NormativeFileCrawler(download_path=download_path, logger=logger, task_id=task_id, socketio=socketio, progress_callback=update_task_progress)
+            crawler = NormativeFileCrawler(download_path=download_path, logger=logger, task_id=task_id, socketio=thread_socketio, progress_callback=update_task_progress)
         elif crawler_type == 'standard_text' or crawler_type == 'mem_bzwb':
             print(f"[DEBUG] 创建 StandardTextCrawler 实例...")
             download_path = "./应急部-标准文本" if crawler_type == 'mem_bzwb' else "./标准/标准文本"
-            crawler = StandardTextCrawler(download_path=download_path, logger=logger, task_id=task_id, socketio=socketio, progress_callback=update_task_progress)
+            crawler = StandardTextCrawler(download_path=download_path, logger=logger, task_id=task_id, socketio=thread_socketio, progress_callback=update_task_progress)
         elif crawler_type == 'system_file' or crawler_type == 'mem_zdwj':
             print(f"[DEBUG] 创建 SystemFileCrawler 实例...")
             download_path = "./应急部-制度文件" if crawler_type == 'mem_zdwj' else "./标准/制度文件"
-            crawler = SystemFileCrawler(download_path=download_path, logger=logger, task_id=task_id, socketio=socketio, progress_callback=update_task_progress)
+            crawler = SystemFileCrawler(download_path=download_path, logger=logger, task_id=task_id, socketio=thread_socketio, progress_callback=update_task_progress)
         elif crawler_type.startswith('flk_'):
             print(f"[DEBUG] 创建法规数据库爬虫实例: {crawler_type}")
             type_name = CRAWLER_TYPE_NAMES.get(crawler_type, '未知类型')
@@ -525,7 +902,7 @@ def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None):
                 flk_type=crawler_type,
                 logger=logger, 
                 task_id=task_id, 
-                socketio=socketio, 
+                socketio=thread_socketio, 
                 progress_callback=update_task_progress
             )
         elif crawler_type == 'custom':
@@ -538,16 +915,16 @@ def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None):
                 download_path=save_dir,
                 logger=logger,
                 task_id=task_id,
-                socketio=socketio,
+                socketio=thread_socketio,
                 progress_callback=update_task_progress
             )
             
             # 将爬虫实例存储到任务中，以便停止功能使用
             task['crawler'] = custom_crawler
-            task['status'] = 'running'
+            set_task_status(task_id, 'running')
             
             # 向所有客户端发送任务状态更新
-            socketio.emit('task_status_change', {
+            thread_socketio.emit('task_status_change', {
                 'task_id': task_id,
                 'status': 'running',
                 'crawler_type': crawler_type
@@ -555,11 +932,10 @@ def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None):
             
             # 调用自定义页面处理函数
             custom_crawl_result = crawl_custom_page(task_id, page_url, logger, custom_crawler)
-            task['status'] = 'completed'
-            task['end_time'] = datetime.now()
+            set_task_status(task_id, 'completed', finished=True)
             
             # 向所有客户端发送任务完成通知
-            socketio.emit('task_status_change', {
+            thread_socketio.emit('task_status_change', {
                 'task_id': task_id,
                 'status': 'completed',
                 'crawler_type': crawler_type
@@ -568,15 +944,34 @@ def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None):
         else:
             print(f"[DEBUG] 未知的爬虫类型: {crawler_type}")
             logger.log(f"未知的爬虫类型: {crawler_type}", 'error')
-            task['status'] = 'error'
+            set_task_status(task_id, 'error', finished=True)
             return
 
         print(f"[DEBUG] 爬虫实例创建成功，开始设置任务状态...")
+        # 请求中指定了并发数时覆盖配置中的默认值
+        if concurrency:
+            crawler.concurrency = concurrency
+            logger.log(f"并发下载线程数: {concurrency}")
+        # 请求中指定了增量模式时覆盖配置中的默认值
+        if incremental is not None:
+            crawler.incremental = bool(incremental)
+        if crawler.incremental:
+            logger.log("增量模式：跳过已下载且未变化的记录")
+        if watermark is not None:
+            crawler.use_watermark = bool(watermark)
+        # 任务断点与任务登记表共用数据库，以任务ID区分；恢复的任务沿用原ID，因此会从断点继续
+        try:
+            crawler.checkpoint = CrawlCheckpoint(
+                task_store.db_path, task_id,
+                save_interval=load_crawler_config().get('checkpoint_interval', 5.0)
+            )
+        except Exception as e:
+            logger.log(f"打开任务断点失败，本次任务中断后无法续爬: {e}", 'warning')
         task['crawler'] = crawler
-        task['status'] = 'running'
+        set_task_status(task_id, 'running')
         
         # 向所有客户端发送任务状态更新
-        socketio.emit('task_status_change', {
+        thread_socketio.emit('task_status_change', {
             'task_id': task_id,
             'status': 'running',
             'crawler_type': crawler_type
@@ -612,8 +1007,7 @@ def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None):
             crawler.crawl_all_pages(base_url, max_pages=max_pages)
         
         print(f"[DEBUG] 爬虫执行完成，设置任务状态为完成...")
-        task['status'] = 'completed'
-        task['end_time'] = datetime.now()
+        set_task_status(task_id, 'completed', finished=True)
         
         # 直接保存总结报告到数据结构
         if 'crawler' in task and hasattr(task['crawler'], 'stats'):
@@ -712,7 +1106,7 @@ def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None):
                 print(f"[DEBUG] 错误详情: {traceback.format_exc()}")
         
         # 向所有客户端发送任务完成通知
-        socketio.emit('task_status_change', {
+        thread_socketio.emit('task_status_change', {
             'task_id': task_id,
             'status': 'completed',
             'crawler_type': crawler_type
@@ -721,14 +1115,13 @@ def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None):
     except Exception as e:
         print(f"[DEBUG] 爬虫执行出错: {str(e)}")
         print(f"[DEBUG] 错误详情: {traceback.format_exc()}")
-        task['status'] = 'error'
-        task['end_time'] = datetime.now()
+        set_task_status(task_id, 'error', finished=True)
         error_msg = f'爬虫执行出错: {str(e)}'
         logger.log(error_msg, 'error')
         logger.log(f"详细错误: {traceback.format_exc()}", 'error')
         
         # 向所有客户端发送任务错误通知
-        socketio.emit('task_status_change', {
+        thread_socketio.emit('task_status_change', {
             'task_id': task_id,
             'status': 'error',
             'crawler_type': crawler_type,
@@ -742,15 +1135,53 @@ def run_crawler_thread(task_id, crawler_type, max_pages, page_url=None):
             
         if 'crawler' in task and hasattr(task['crawler'], 'driver') and task['crawler'].driver:
             try:
-                task['crawler'].driver.quit()
-                logger.log("浏览器已关闭")
+                task['crawler'].close_driver()
+                logger.log("浏览器已归还驱动池")
             except: pass
-        socketio.emit('crawler_completed', {'message': '爬虫任务结束'}, room=task_id)
+        if getattr(task.get('crawler'), 'checkpoint', None):
+            try:
+                task['crawler'].checkpoint.close()
+            except Exception as e:
+                print(f"[ERROR] 关闭任务断点失败: {e}")
+        thread_socketio.emit('crawler_completed', {'message': '爬虫任务结束'}, room=task_id)
         logger.log("爬虫线程已结束。", "info")
         print(f"[DEBUG] 爬虫线程已结束: {task_id}")
 
+def relay_worker_events():
+    """后台协程：把工作进程写入队列的Socket.IO事件转发给前端"""
+    interval = load_crawler_config().get('worker_event_interval', 0.5)
+    while True:
+        try:
+            events = job_queue.pop_events()
+            for event, data, room in events:
+                socketio.emit(event, data, room=room)
+                # 工作进程保存的任务总结只在文件中，任务结束时加载到内存
+                if event == 'task_status_change' and data.get('status') in ('completed', 'error'):
+                    load_summary_file(data.get('task_id'))
+            if not events:
+                gevent.sleep(interval)
+        except Exception as e:
+            print(f"[ERROR] 转发工作进程事件失败: {e}")
+            gevent.sleep(interval)
+
+def broadcast_task_changes():
+    """后台协程：任务版本变化时，把增量（tasks_delta）推送给订阅任务列表的前端"""
+    interval = load_crawler_config().get('task_delta_interval', 1.0)
+    version = task_store.version()
+    while True:
+        gevent.sleep(interval)
+        try:
+            if task_store.version() == version:
+                continue
+            # 版本号推进就推送（即使没有可见变化），前端据此判断增量是否连续
+            changes = query_task_changes(version)
+            version = changes['version']
+            socketio.emit('tasks_delta', changes, room='global')
+        except Exception as e:
+            print(f"[ERROR] 推送任务增量失败: {e}")
+
 def cleanup_old_tasks():
-    """后台线程，定期清理旧的已完成任务以释放内存"""
+    """后台线程，定期从内存中移除已结束的任务以释放内存（任务历史保留在task_store中）"""
     while True:
         gevent.sleep(600)  # 每10分钟检查一次
         now = datetime.now()
@@ -760,14 +1191,15 @@ def cleanup_old_tasks():
             # 创建任务字典的副本进行迭代，避免在迭代时修改字典
             for task_id, task_data in list(CRAWLER_TASKS.items()):
                 if task_data.get('end_time'):
-                    # 如果任务已结束超过5分钟，则标记为待删除
+                    # 如果任务已结束超过5分钟，则从内存中移除
                     if now - task_data['end_time'] > timedelta(minutes=5):
                         tasks_to_delete.append(task_id)
             
             if tasks_to_delete:
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] 清理 {len(tasks_to_delete)} 个旧任务...")
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] 从内存中移除 {len(tasks_to_delete)} 个已结束的任务...")
                 for task_id in tasks_to_delete:
                     if task_id in CRAWLER_TASKS:
+                        task_store.save(task_id, CRAWLER_TASKS[task_id], immediate=True)
                         del CRAWLER_TASKS[task_id]
         except Exception as e:
             print(f"[{datetime.now().strftime('%H:%M:%S')}] 清理任务时发生错误: {e}")
@@ -784,9 +1216,13 @@ def start_crawler():
     crawler_type = data.get('crawler_type')
     max_pages = data.get('max_pages', 10)
     page_url = data.get('page_url')  # 获取自定义页面URL
+    concurrency = data.get('concurrency')  # 并发下载线程数（可选）
+    incremental = data.get('incremental')  # 是否增量爬取（可选）
+    watermark = data.get('watermark')  # 是否翻页到上次最新的记录即停止（可选）
+    priority = data.get('priority', 0)  # 排队时的优先级，数值大的先启动（可选）
     
     task_id = "task-" + str(uuid.uuid4())
-    logger = WebSocketLogger(socketio, task_id)
+    logger = WebSocketLogger(thread_socketio, task_id)
 
     # 添加更多任务信息
     CRAWLER_TASKS[task_id] = {
@@ -798,116 +1234,90 @@ def start_crawler():
         'crawler_type': crawler_type,  # 爬虫类型
         'max_pages': max_pages,       # 最大页数
         'page_url': page_url,         # 自定义页面URL
+        'concurrency': concurrency,   # 并发下载线程数
+        'incremental': incremental,   # 是否增量爬取
+        'watermark': watermark,       # 是否使用水位线
         'progress': {'current': 0, 'total': 0, 'percentage': 0, 'task_id': task_id}  # 进度信息
     }
+    task_store.save(task_id, CRAWLER_TASKS[task_id], immediate=True)
     logger.log(f"任务 {task_id} 已创建，准备启动...")
     
-    # 启动gevent线程
-    gevent.spawn(run_crawler_thread, task_id, crawler_type, max_pages, page_url)
+    # 交给调度器启动（槽位已满时排队）
+    position = schedule_task(task_id, priority)
     
-    return jsonify({'success': True, 'message': '爬虫任务已创建', 'task_id': task_id})
+    message = '爬虫任务已创建' if position is None else f'爬虫任务已创建，排队中（第 {position} 位）'
+    return jsonify({'success': True, 'message': message, 'task_id': task_id, 'queue_position': position})
+
+@app.route('/api/resume_crawler', methods=['POST'])
+def resume_crawler():
+    """从断点恢复中断、出错或被停止的任务"""
+    task_id = (request.get_json() or {}).get('task_id')
+    if not task_id:
+        return jsonify({'success': False, 'message': '没有提供任务ID'}), 400
+    success, message = resume_task(task_id)
+    return jsonify({'success': success, 'message': message, 'task_id': task_id})
 
 @app.route('/api/stop_crawler', methods=['POST'])
 def stop_crawler():
     task_id = request.get_json().get('task_id')
     task = CRAWLER_TASKS.get(task_id)
+    if not task and WORKER_MODE:
+        success, message = stop_worker_task(task_id)
+        return jsonify({'success': success, 'message': message})
     if not task:
         return jsonify({'success': False, 'message': '任务不存在'})
+    if task['status'] == 'queued' and cancel_queued_task(task_id):
+        return jsonify({'success': True, 'message': '排队中的任务已取消'})
     if task['status'] == 'running' and task.get('crawler'):
         task['crawler'].stop()
-        task['status'] = 'stopping'  # 更新状态
+        set_task_status(task_id, 'stopping')  # 更新状态
         return jsonify({'success': True, 'message': '停止信号已发送'})
     return jsonify({'success': False, 'message': '任务不在运行状态，无法停止'})
 
 # 新增：获取所有任务状态的API
 @app.route('/api/get_all_tasks', methods=['GET'])
 def get_all_tasks():
-    """获取所有任务的状态信息"""
-    tasks_info = []
-    for task_id, task_data in CRAWLER_TASKS.items():
-        # 计算运行时间
-        if task_data['start_time']:
-            if task_data['end_time']:
-                duration = task_data['end_time'] - task_data['start_time']
-            else:
-                duration = datetime.now() - task_data['start_time']
-            duration_str = str(duration).split('.')[0]  # 去掉微秒
-        else:
-            duration_str = "0:00:00"
-        
-        # 获取爬虫类型的中文名称
-        crawler_type_names = CRAWLER_TYPE_NAMES
-        
-        task_info = {
-            'task_id': task_id,
-            'status': task_data['status'],
-            'crawler_type': task_data.get('crawler_type', 'unknown'),
-            'crawler_name': crawler_type_names.get(task_data.get('crawler_type', ''), '未知'),
-            'start_time': task_data['start_time'].strftime('%Y-%m-%d %H:%M:%S') if task_data['start_time'] else None,
-            'end_time': task_data['end_time'].strftime('%Y-%m-%d %H:%M:%S') if task_data['end_time'] else None,
-            'duration': duration_str,
-            'max_pages': task_data.get('max_pages'),
-            'progress': task_data.get('progress', {'current': 0, 'total': 0, 'percentage': 0})
-        }
-        tasks_info.append(task_info)
-    
-    # 按开始时间排序，最新的在前面
-    tasks_info.sort(key=lambda x: x['start_time'] if x['start_time'] else '', reverse=True)
-    
-    return jsonify({'tasks': tasks_info})
+    """
+    获取任务的状态信息（分页，最新的在前面）
+    查询参数: status（多个状态用逗号分隔）、crawler_type、page（从1开始）、page_size（默认100）
+    传入 since（版本号）时只返回该版本之后新建、更新和删除的任务
+    """
+    try:
+        if request.args.get('since') is not None:
+            return jsonify(query_task_changes(int(request.args.get('since'))))
+        return jsonify(query_task_list(request.args))
+    except ValueError:
+        return jsonify({'success': False, 'message': '分页参数无效'}), 400
 
 # 新增：获取单个任务详情的API
 @app.route('/api/get_task_detail/<task_id>', methods=['GET'])
 def get_task_detail(task_id):
     """获取单个任务的详细信息"""
-    task = CRAWLER_TASKS.get(task_id)
+    task = get_task_record(task_id)
     if not task:
         return jsonify({'success': False, 'message': '任务不存在'}), 404
     
-    # 计算运行时间
-    if task['start_time']:
-        if task['end_time']:
-            duration = task['end_time'] - task['start_time']
-        else:
-            duration = datetime.now() - task['start_time']
-        duration_str = str(duration).split('.')[0]
-    else:
-        duration_str = "0:00:00"
-    
-    # 获取爬虫类型的中文名称
-    crawler_type_names = CRAWLER_TYPE_NAMES
-    
-    task_detail = {
-        'task_id': task_id,
-        'status': task['status'],
-        'crawler_type': task.get('crawler_type', 'unknown'),
-        'crawler_name': crawler_type_names.get(task.get('crawler_type', ''), '未知'),
-        'start_time': task['start_time'].strftime('%Y-%m-%d %H:%M:%S') if task['start_time'] else None,
-        'end_time': task['end_time'].strftime('%Y-%m-%d %H:%M:%S') if task['end_time'] else None,
-        'duration': duration_str,
-        'max_pages': task.get('max_pages'),
-        'progress': task.get('progress', {'current': 0, 'total': 0, 'percentage': 0})
-    }
-    
-    return jsonify({'success': True, 'task': task_detail})
+    return jsonify({'success': True, 'task': format_task_info(task_id, task)})
 
 # 新增：删除已完成任务的API
 @app.route('/api/delete_task/<task_id>', methods=['DELETE'])
 def delete_task(task_id):
     """删除已完成的任务"""
-    task = CRAWLER_TASKS.get(task_id)
+    task = get_task_record(task_id)
     if not task:
         return jsonify({'success': False, 'message': '任务不存在'}), 404
     
-    if task['status'] in ['running', 'starting']:
+    if task['status'] in ACTIVE_TASK_STATUSES:
         return jsonify({'success': False, 'message': '不能删除正在运行的任务'}), 400
     
     # 关闭logger
     if 'logger' in task and hasattr(task['logger'], 'close'):
         task['logger'].close()
     
-    # 删除任务
-    del CRAWLER_TASKS[task_id]
+    # 删除任务（内存状态和持久化记录）
+    CRAWLER_TASKS.pop(task_id, None)
+    task_store.delete(task_id)
+    delete_checkpoint(task_store.db_path, task_id)
     
     return jsonify({'success': True, 'message': '任务已删除'})
 
@@ -916,20 +1326,24 @@ def delete_task(task_id):
 def get_tasks_stats():
     """获取任务统计信息"""
     stats = {
-        'total': len(CRAWLER_TASKS),
+        'total': 0,
         'running': 0,
         'completed': 0,
         'error': 0,
         'stopping': 0,
-        'starting': 0
+        'starting': 0,
+        'queued': 0,
+        'cancelled': 0,
+        'interrupted': 0
     }
     
-    for task_data in CRAWLER_TASKS.values():
-        status = task_data['status']
+    # 由数据库按状态聚合，不再遍历全部任务
+    for status, count in task_store.count_by_status().items():
+        stats['total'] += count
         if status in stats:
-            stats[status] += 1
+            stats[status] += count
     
-    return jsonify({'stats': stats})
+    return jsonify({'stats': stats, 'scheduler': job_queue.stats() if WORKER_MODE else task_scheduler.stats()})
 
 # 获取任务总结报告的API
 @app.route('/api/get_task_summaries', methods=['GET'])
@@ -1005,12 +1419,16 @@ def start_multiple_crawlers():
     for config in crawler_configs:
         crawler_type = config.get('crawler_type')
         max_pages = config.get('max_pages', 10)
+        concurrency = config.get('concurrency')
+        incremental = config.get('incremental')
+        watermark = config.get('watermark')
+        priority = config.get('priority', 0)
         
         if not crawler_type:
             continue
         
         task_id = "task-" + str(uuid.uuid4())
-        logger = WebSocketLogger(socketio, task_id)
+        logger = WebSocketLogger(thread_socketio, task_id)
         
         CRAWLER_TASKS[task_id] = {
             'status': 'starting',
@@ -1020,16 +1438,21 @@ def start_multiple_crawlers():
             'end_time': None,
             'crawler_type': crawler_type,
             'max_pages': max_pages,
+            'concurrency': concurrency,
+            'incremental': incremental,
+            'watermark': watermark,
             'progress': {'current': 0, 'total': 0, 'percentage': 0}
         }
+        task_store.save(task_id, CRAWLER_TASKS[task_id], immediate=True)
         
         logger.log(f"批量任务 {task_id} 已创建，准备启动...")
-        gevent.spawn(run_crawler_thread, task_id, crawler_type, max_pages)
+        position = schedule_task(task_id, priority)
         
         created_tasks.append({
             'task_id': task_id,
             'crawler_type': crawler_type,
-            'max_pages': max_pages
+            'max_pages': max_pages,
+            'queue_position': position
         })
     
     return jsonify({
@@ -1052,13 +1475,19 @@ def stop_multiple_crawlers():
     
     for task_id in task_ids:
         task = CRAWLER_TASKS.get(task_id)
+        if not task and WORKER_MODE:
+            success, message = stop_worker_task(task_id)
+            results.append({'task_id': task_id, 'success': success, 'message': message})
+            continue
         if not task:
             results.append({'task_id': task_id, 'success': False, 'message': '任务不存在'})
             continue
         
-        if task['status'] == 'running' and task.get('crawler'):
+        if task['status'] == 'queued' and cancel_queued_task(task_id):
+            results.append({'task_id': task_id, 'success': True, 'message': '排队中的任务已取消'})
+        elif task['status'] == 'running' and task.get('crawler'):
             task['crawler'].stop()
-            task['status'] = 'stopping'
+            set_task_status(task_id, 'stopping')
             results.append({'task_id': task_id, 'success': True, 'message': '停止信号已发送'})
         else:
             results.append({'task_id': task_id, 'success': False, 'message': '任务不在运行状态'})
@@ -1083,10 +1512,11 @@ def handle_disconnect():
 @socketio.on('join_task_room')
 def handle_join_task_room(data):
     task_id = data.get('task_id')
-    if task_id in CRAWLER_TASKS:
+    task = get_task_record(task_id)
+    if task:
         join_room(task_id)
         print(f"[DEBUG] 客户端 {request.sid} 已加入任务房间: {task_id}")
-        print(f"[DEBUG] 当前任务状态: {CRAWLER_TASKS.get(task_id, {}).get('status', 'unknown')}")
+        print(f"[DEBUG] 当前任务状态: {task.get('status', 'unknown')}")
         # 发送确认消息到任务房间
         emit('joined_task_room', {'task_id': task_id, 'message': f'已加入任务 {task_id} 的房间'}, room=task_id)
     else:
@@ -1148,81 +1578,90 @@ def handle_save_task_summary(data):
         import traceback
         print(f"[DEBUG] 错误详情: {traceback.format_exc()}")
 
+@socketio.on('subscribe_tasks')
+def handle_subscribe_tasks(data=None):
+    """
+    订阅任务列表：先发送一次带版本号的快照，之后由后台协程向全局房间推送增量（tasks_delta）
+    断线重连或发现增量不连续时重新订阅即可获得新的快照
+    """
+    join_room('global')
+    try:
+        emit('tasks_snapshot', query_task_list(data or {}))
+    except ValueError:
+        emit('tasks_snapshot', {'tasks': [], 'total': 0, 'version': 0, 'error': '分页参数无效'})
+
 @socketio.on('get_all_tasks_realtime')
-def handle_get_all_tasks_realtime():
-    """实时获取所有任务状态"""
-    tasks_info = []
-    for task_id, task_data in CRAWLER_TASKS.items():
-        # 计算运行时间
-        if task_data['start_time']:
-            if task_data['end_time']:
-                duration = task_data['end_time'] - task_data['start_time']
-            else:
-                duration = datetime.now() - task_data['start_time']
-            duration_str = str(duration).split('.')[0]
-        else:
-            duration_str = "0:00:00"
-        
-        # 获取爬虫类型的中文名称
-        crawler_type_names = CRAWLER_TYPE_NAMES
-        
-        task_info = {
-            'task_id': task_id,
-            'status': task_data['status'],
-            'crawler_type': task_data.get('crawler_type', 'unknown'),
-            'crawler_name': crawler_type_names.get(task_data.get('crawler_type', ''), '未知'),
-            'start_time': task_data['start_time'].strftime('%Y-%m-%d %H:%M:%S') if task_data['start_time'] else None,
-            'end_time': task_data['end_time'].strftime('%Y-%m-%d %H:%M:%S') if task_data['end_time'] else None,
-            'duration': duration_str,
-            'max_pages': task_data.get('max_pages'),
-            'progress': task_data.get('progress', {'current': 0, 'total': 0, 'percentage': 0})
-        }
-        tasks_info.append(task_info)
-    
-    # 按开始时间排序
-    tasks_info.sort(key=lambda x: x['start_time'] if x['start_time'] else '', reverse=True)
-    
-    emit('all_tasks_update', {'tasks': tasks_info})
+def handle_get_all_tasks_realtime(data=None):
+    """实时获取任务状态（可传入与 /api/get_all_tasks 相同的过滤和分页参数）"""
+    try:
+        emit('all_tasks_update', query_task_list(data or {}))
+    except ValueError:
+        emit('all_tasks_update', {'tasks': [], 'total': 0, 'error': '分页参数无效'})
+
+def parse_date_range(params):
+    """
+    解析查询参数中的日期范围（按文件修改时间过滤）
+    :param params: 查询参数，可包含 date_from、date_to（YYYY-MM-DD，包含当天）
+    :return: (起始时间戳, 结束时间戳)，未指定的一端为None；日期格式错误时抛出ValueError
+    """
+    date_from = params.get('date_from')
+    date_to = params.get('date_to')
+    since = datetime.strptime(date_from, '%Y-%m-%d').timestamp() if date_from else None
+    until = (datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)).timestamp() if date_to else None
+    return since, until
 
 @app.route('/api/get_files')
 def get_files():
-    """获取指定目录下的文件列表。如果未指定目录，则返回默认目录集合的所有文件。"""
+    """
+    获取文件列表（查询文件索引，分页，默认按修改时间倒序）。如果未指定目录，则返回默认目录集合的所有文件。
+    查询参数: dir（相对于项目根目录的路径）、type、q（文件名关键字）、date_from/date_to（YYYY-MM-DD）、
+             min_size/max_size（字节）、sort（mtime/name/size/type）、order（asc/desc）、page（从1开始）、page_size（默认200）
+    响应带ETag，索引未变化时返回304
+    """
     dir_param = request.args.get('dir')  # 相对于项目根目录的路径
-
-    files_info = []
     base_dir = os.path.abspath(os.getcwd())
-
-    def collect_files(target_dir, type_label=None):
-        for root, _, files in os.walk(target_dir):
-            for filename in files:
-                file_path = os.path.join(root, filename)
-                if not os.path.isfile(file_path):
-                    continue
-                rel_path = os.path.relpath(file_path, base_dir).replace('\\', '/')
-                stat = os.stat(file_path)
-                files_info.append({
-                    'name': filename,
-                    'path': rel_path,
-                    'size': stat.st_size,
-                    'mtime': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'type': type_label or os.path.basename(os.path.dirname(file_path))
-                })
-
+    directory = None
     if dir_param:
         abs_dir = os.path.abspath(os.path.join(base_dir, dir_param))
         if not abs_dir.startswith(base_dir) or not os.path.exists(abs_dir):
             return jsonify({'error': '非法目录'}), 400
-        collect_files(abs_dir)
-    else:
-        # 汇总预定义目录
-        download_dirs = DOWNLOAD_DIRS
-        for type_label, path in download_dirs.items():
-            abs_path = os.path.abspath(path)
-            if os.path.exists(abs_path):
-                collect_files(abs_path, type_label)
+        directory = os.path.relpath(abs_dir, base_dir).replace('\\', '/')
+
+    # 同一查询的结果只随索引版本变化
+    etag = f"files-{file_catalog.version()}"
+    if request.if_none_match.contains_weak(etag):
+        return '', 304
 
-    files_info.sort(key=lambda x: x['mtime'], reverse=True)
-    return jsonify({'files': files_info})
+    try:
+        page = max(1, int(request.args.get('page') or 1))
+        page_size = min(1000, max(1, int(request.args.get('page_size') or 200)))
+        min_size = request.args.get('min_size', type=int)
+        max_size = request.args.get('max_size', type=int)
+        since, until = parse_date_range(request.args)
+    except ValueError:
+        return jsonify({'error': '查询参数无效'}), 400
+
+    files, total = file_catalog.query(
+        directory=directory,
+        file_type=request.args.get('type'),
+        keyword=request.args.get('q'),
+        since=since,
+        until=until,
+        min_size=min_size,
+        max_size=max_size,
+        sort=request.args.get('sort', 'mtime'),
+        order=request.args.get('order', 'desc'),
+        limit=page_size,
+        offset=(page - 1) * page_size
+    )
+    for file_info in files:
+        file_info['mtime'] = datetime.fromtimestamp(file_info['mtime']).strftime('%Y-%m-%d %H:%M:%S')
+
+    response = jsonify({'files': files, 'total': total, 'page': page, 'page_size': page_size})
+    response.set_etag(etag, weak=True)
+    # 允许浏览器缓存，但每次都要用ETag确认
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/download_file/<path:filepath>')
 def download_file(filepath):
@@ -1239,23 +1678,31 @@ def download_file(filepath):
 
 @app.route('/api/download_all')
 def download_all():
+    """
+    打包下载已下载的文件：边压缩边发送，不生成临时文件；pdf/docx/zip等已压缩的格式直接存储
+    查询参数: type（分类，多个用逗号分隔，默认全部下载目录）、date_from/date_to（YYYY-MM-DD，按文件修改时间）
+    """
+    try:
+        since, until = parse_date_range(request.args)
+    except ValueError:
+        return jsonify({'error': '查询参数无效'}), 400
+    file_types = [t.strip() for t in (request.args.get('type') or '').split(',') if t.strip()] or list(DOWNLOAD_DIRS)
+
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_zip:
-            with zipfile.ZipFile(temp_zip.name, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                download_dirs = DOWNLOAD_DIRS
-                for type, path in download_dirs.items():
-                    abs_path = os.path.abspath(path)
-                    if not os.path.exists(abs_path): continue
-                    for root, _, files in os.walk(abs_path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            # 创建在zip文件中的相对路径
-                            archive_name = os.path.join(type, os.path.relpath(file_path, abs_path))
-                            zipf.write(file_path, archive_name)
-            return send_file(temp_zip.name, as_attachment=True, download_name='爬虫下载文件.zip')
+        files = []
+        for file_type in file_types:
+            rows, _ = file_catalog.query(file_type=file_type, since=since, until=until, sort='type', order='asc', limit=-1)
+            files.extend(rows)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    # 压缩包内路径与项目根目录下的相对路径一致（<分类目录>/<文件>）
+    entries = ((os.path.join(file_catalog.base_dir, file_info['path']), file_info['path']) for file_info in files)
+    # 读文件和压缩放到线程池中执行，避免阻塞主循环上的其他请求和心跳
+    response = Response(stream_with_context(stream_zip(entries, executor=run_blocking)), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f"attachment; filename=download.zip; filename*=UTF-8''{quote('爬虫下载文件.zip')}"
+    return response
+
 @app.route('/api/get_logs')
 def get_logs():
     log_files_info = []
@@ -1340,7 +1787,7 @@ def get_knowledge_bases():
         }
         
         # 发送POST请求
-        response = requests.post(
+        response = http_session.post(
             kb_api_url, 
             headers=headers, 
             json={}, 
@@ -1388,6 +1835,7 @@ def upload_to_knowledge_base():
         kb_id = data.get('kb_id')
         file_path = data.get('file_path')
         file_name = data.get('file_name')
+        force = data.get('force', False)  # 为True时即使已上传过相同内容也重新上传
         
         if not kb_id or not file_path or not file_name:
             return jsonify({
@@ -1435,6 +1883,18 @@ def upload_to_knowledge_base():
                 'message': f'不支持的文件类型: {ext}，支持的类型: {", ".join(config["file_limits"]["allowed_types"])}'
             })
         
+        # 相同内容已上传到该知识库时直接返回上次的文档信息
+        digest = file_sha256(full_file_path) if blob_store else None
+        if digest and not force:
+            uploaded_docs = blob_store.find_upload(kb_id, digest)
+            if uploaded_docs is not None:
+                return jsonify({
+                    'success': True,
+                    'message': f'文件 "{file_name}" 的内容已上传过，跳过重复上传',
+                    'data': uploaded_docs,
+                    'deduplicated': True
+                })
+        
         # 确定文件的MIME类型
         mime_type = get_mime_type(file_name)
         
@@ -1455,7 +1915,7 @@ def upload_to_knowledge_base():
             }
             
             # 发送上传请求
-            response = requests.post(
+            response = http_session.post(
                 upload_api_url,
                 headers=headers,
                 files=files,
@@ -1467,6 +1927,8 @@ def upload_to_knowledge_base():
             upload_result = response.json()
             if upload_result.get('code') == 0:
                 uploaded_docs = upload_result.get('data', [])
+                if digest:
+                    blob_store.record_upload(kb_id, digest, uploaded_docs)
                 return jsonify({
                     'success': True,
                     'message': f'文件 "{file_name}" 上传成功',
@@ -1536,7 +1998,7 @@ def parse_documents():
         }
         
         # 发送解析请求
-        response = requests.post(
+        response = http_session.post(
             parse_api_url,
             headers=headers,
             json=parse_data,
@@ -1616,6 +2078,18 @@ def get_dir_tree():
 
     return jsonify({'tree': tree})
 
+# 自动从断点恢复上次进程退出时中断的任务
+if not IS_WORKER_PROCESS and load_crawler_config().get('auto_resume', True):
+    resume_interrupted_tasks(interrupted_tasks)
+
+# 工作进程模式：转发工作进程的日志、进度和状态事件
+if WORKER_MODE and not IS_WORKER_PROCESS:
+    gevent.spawn(relay_worker_events)
+
+# 向订阅任务列表的前端推送增量
+if not IS_WORKER_PROCESS:
+    gevent.spawn(broadcast_task_changes)
+
 if __name__ == '__main__':
     # 启动后台清理线程
     if platform.system() == 'Linux':
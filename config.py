@@ -7,9 +7,91 @@ class Config:
     CRAWLER_CONFIG = {
         'download_timeout': 30,
         'page_load_timeout': 20,
+        # 页面就绪等待的超时时间（秒）：导航后等待爬虫声明的列表/详情就绪条件，超时后继续处理
+        'page_ready_timeout': 10,
+        # 下载文件大小保持不变多久（秒）视为写入完成
+        'download_settle_time': 0.5,
+        # 每个子链接使用独立的浏览器下载目录（分类目录/.downloads/），完成后移入分类目录
+        'isolated_downloads': True,
+        # 共享HTTP会话：缓存连接池的主机数、每个主机保持的连接数、失败重试次数和退避系数
+        'http_pool_connections': 10,
+        'http_pool_maxsize': 10,
+        'http_retries': 3,
+        'http_backoff_factor': 0.5,
+        # 法规库：通过详情接口直接下载文件（失败时回退到浏览器），以及优先选择的文件格式
+        'flk_api_download': True,
+        'flk_document_formats': ['WORD', 'PDF'],
+        # 法规库列表接口的并发请求数（总页数由第一页的totalSizes计算）
+        'flk_api_concurrency': 4,
+        # 增量模式：跳过下载清单中已下载且未变化的记录，连续遇到该数量的此类记录后停止翻页（0表示不提前停止）
+        'incremental': False,
+        'incremental_stop_after': 20,
+        # 水位线模式：记录每个列表上次成功爬取时最新的记录，下次翻页到该记录即停止
+        'watermark': False,
+        # 文件下载：写入块大小（字节）、中断后的续传次数（单次请求超时使用上面的 download_timeout）
+        'download_chunk_size': 1024 * 1024,
+        'download_max_retries': 3,
+        # 服务器支持Range时，不小于该大小（字节）的文件拆分为多个分段并行下载（1表示不分段）
+        'download_segments': 4,
+        'download_parallel_min_size': 32 * 1024 * 1024,
+        # 按SHA-256寻址的文档存储：分类目录中的文件以硬链接指向存储，相同内容只保存一份、只上传一次知识库
+        # 存储目录需要与下载目录位于同一磁盘分区
+        'blob_store': True,
+        'blob_store_dir': './.blobs',
+        # 清理孤立内容时，最近多少秒内链接数变化过的内容暂不删除
+        'blob_prune_grace': 3600,
+        # 任务登记表（SQLite）：任务历史在重启后保留；运行中任务的进度按该间隔（秒）批量写回
+        'task_db_path': './tasks.sqlite3',
+        'task_flush_interval': 2.0,
+        # 任务断点：保存翻页位置和已完成子链接的最小间隔（秒）；启动时是否自动从断点恢复上次中断的任务
+        'checkpoint_interval': 5.0,
+        'auto_resume': True,
+        # 任务调度：同时运行的任务数上限，以及每个来源主机同时运行的任务数上限（'default' 用于未列出的主机），超出的任务排队
+        'max_running_tasks': 4,
+        'max_tasks_per_host': {'default': 2, 'www.mem.gov.cn': 2, 'flk.npc.gov.cn': 2},
+        # 爬虫任务在独立线程池的真实线程中运行，Selenium等阻塞调用不占用Web服务的gevent主循环（仅gevent模式）
+        'crawler_threads': True,
+        # 工作进程模式：Web进程只把任务写入持久化队列，由 python run.py --worker 启动的工作进程执行
+        # 工作进程数量、空闲时查询队列的间隔（秒）、心跳间隔和超时（秒，超时的任务重新排队并从断点继续）
+        'worker_mode': False,
+        'worker_processes': 2,
+        'worker_poll_interval': 2.0,
+        'worker_heartbeat_interval': 10.0,
+        'worker_heartbeat_timeout': 60,
+        'worker_event_interval': 0.5,
+        # 任务日志：批量输出间隔（秒）、是否输出到控制台，以及控制台/日志文件/前端各自的最低级别（debug/info/success/warning/error）
+        'log_flush_interval': 0.2,
+        'log_console': True,
+        'log_console_level': 'info',
+        'log_file_level': 'info',
+        'log_socket_level': 'info',
+        # 任务进度：合并推送的间隔（秒），计算速率和预计剩余时间的滑动窗口（秒）
+        'progress_push_interval': 1.0,
+        'progress_rate_window': 60,
+        # 任务列表增量推送：检查任务版本变化的间隔（秒）
+        'task_delta_interval': 1.0,
+        # 下载文件索引：数据库路径，对账扫描（发现程序之外的新增、修改和删除）的间隔（秒）
+        'file_catalog_db': './files.sqlite3',
+        'file_catalog_rescan_interval': 60,
         'max_retry_times': 3,
         'default_max_pages': 10,
-        'default_max_docs': None
+        'default_max_docs': None,
+        # 每个任务并发下载子链接的工作线程数（每个线程使用独立的浏览器），1表示逐个下载
+        'download_concurrency': 1,
+        # 进程级浏览器驱动池：浏览器数量上限、空闲回收时间（秒）、租用等待超时（秒，None表示一直等待）
+        'driver_pool_size': 4,
+        'driver_idle_timeout': 300,
+        'driver_acquire_timeout': None,
+        # 并发下载工作线程等待浏览器的超时时间（秒），超时后由其余线程承担其工作
+        'worker_driver_acquire_timeout': 30,
+        # 按主机的自适应限速策略（令牌桶），未配置的字段使用 'default' 或 demo/rate_limiter.py 中的默认值
+        # rate/min_rate/max_rate: 初始/最低/最高速率（每秒请求数）；burst: 允许的突发请求数
+        # slow_threshold: 超过该响应时间（秒）视为慢响应并降速；error_cooldown: 429/5xx后暂停的秒数
+        'rate_limits': {
+            'default': {'rate': 1.0, 'min_rate': 0.1, 'max_rate': 4.0, 'burst': 2, 'slow_threshold': 5.0},
+            'www.mem.gov.cn': {'rate': 0.5, 'max_rate': 2.0, 'slow_threshold': 8.0},
+            'flk.npc.gov.cn': {'rate': 1.0, 'max_rate': 5.0, 'burst': 4}
+        }
     }
     
     # 文件上传配置
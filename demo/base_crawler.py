@@ -1,21 +1,56 @@
 import time
 import os
 import re
+import uuid
+import queue
+import shutil
+import threading
 from abc import ABC, abstractmethod
-from selenium import webdriver
+from contextlib import contextmanager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-import requests
+from selenium.common.exceptions import TimeoutException
 from datetime import datetime
+from driver_pool import get_driver_pool, set_download_directory
+from rate_limiter import get_rate_limiter, parse_retry_after
+from http_client import get_http_session
+from download_watcher import DownloadWatcher, list_files, is_temp_file
+from range_downloader import RangeDownloader
+from crawl_manifest import CrawlManifest, file_sha256, canonical_url
+from blob_store import get_blob_store
+from file_catalog import get_file_catalog
+
+
+def load_crawler_config():
+    """
+    读取项目根目录config.py中的CRAWLER_CONFIG
+    独立运行demo脚本时config.py不在导入路径中，此时返回空字典，使用各处的默认值
+    :return: 爬虫配置字典
+    """
+    try:
+        from config import Config
+    except ImportError:
+        return {}
+    return dict(getattr(Config, 'CRAWLER_CONFIG', {}))
+
 
 class BaseCrawler(ABC):
     """
     基础爬虫类，包含所有爬虫的共同功能
     """
     
+    # 页面就绪条件，子类按需声明：navigate(url, ready='listing'/'detail') 会等待
+    # document.readyState 为 complete 且任一条件满足（定位器元组或接收driver的函数）；
+    # 空列表表示只等待 document.readyState
+    LISTING_READY = []
+    DETAIL_READY = []
+    
+    # 工作线程启动时是否预先租用浏览器；主要通过HTTP下载的爬虫设为False，需要时再调用 start_driver()
+    PRELOAD_DRIVER = True
+    
     def __init__(self, download_path, logger=None, task_id=None, socketio=None, progress_callback=None):
         """
         初始化爬虫
@@ -31,31 +66,175 @@ class BaseCrawler(ABC):
         self.socketio = socketio
         self.progress_callback = progress_callback
         self.is_stopped = False  # 停止标志
+        self.crawler_config = load_crawler_config()
+        
+        # 并发下载配置：1表示逐个处理子链接（默认），大于1时启用工作线程池
+        self.concurrency = self.crawler_config.get('download_concurrency', 1)
+        
+        # 工作线程私有状态（浏览器驱动、统计信息），主线程不使用
+        self._local = threading.local()
+        self._progress_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        
+        # 按主机的自适应限速器（进程内所有爬虫共享），替代固定的time.sleep间隔
+        self.rate_limiter = get_rate_limiter(self.crawler_config)
+        
+        # 进程级共享的HTTP会话：按主机复用keep-alive连接，并带有重试策略和默认请求头
+        self.http_session = get_http_session(self.crawler_config)
+        
+        # 可续传的文件下载器：先写 .part 临时文件，中断后按Range续传，大文件可分段并行下载
+        self.downloader = RangeDownloader(
+            self.http_get,
+            chunk_size=self.crawler_config.get('download_chunk_size', 1024 * 1024),
+            max_retries=self.crawler_config.get('download_max_retries', 3),
+            timeout=self.crawler_config.get('download_timeout', 30),
+            segments=self.crawler_config.get('download_segments', 4),
+            parallel_min_size=self.crawler_config.get('download_parallel_min_size', 32 * 1024 * 1024),
+            logger=self
+        )
         
         # 创建下载目录
         if not os.path.exists(self.download_path):
             os.makedirs(self.download_path)
             self.log(f"已创建下载文件夹: {self.download_path}")
         
+        # 增量模式：根据分类目录下的文档清单跳过已下载且未变化的子链接，
+        # 连续遇到 incremental_stop_after 个这样的子链接后停止翻页
+        self.incremental = self.crawler_config.get('incremental', False)
+        self.incremental_stop_after = self.crawler_config.get('incremental_stop_after', 20)
+        # 水位线模式：列表按时间倒序排列，翻页到上次成功爬取时最新的记录即停止
+        self.use_watermark = self.crawler_config.get('watermark', False)
+        self.watermark_reached_url = None  # 遇到水位线的列表页URL
+        self.listing_head = None  # 本次发现的最新一条记录（第一页的第一个子链接）
+        # 按内容寻址的文档存储：分类目录中的文件是指向它的硬链接，相同内容只保存一份
+        try:
+            self.blob_store = get_blob_store(self.crawler_config)
+        except Exception as e:
+            self.blob_store = None
+            self.log(f"打开文档存储失败，不进行去重: {e}", 'warning')
+        
+        # 下载文件索引：保存的文件立即登记，文件列表无需遍历目录
+        try:
+            self.file_catalog = get_file_catalog(self.crawler_config)
+        except Exception as e:
+            self.file_catalog = None
+            self.log(f"打开文件索引失败，新文件等待对账扫描登记: {e}", 'warning')
+        
+        try:
+            self.manifest = CrawlManifest.for_directory(self.download_path)
+        except Exception as e:
+            self.manifest = None
+            self.log(f"打开下载清单失败，增量模式不可用: {e}", 'warning')
+        
         # 浏览器相关
-        self.driver = None
-        self.wait = None
+        self._driver = None
+        self._wait = None
         self.chrome_options = self._setup_chrome_options()
         
         # 统计信息
-        self.stats = {
+        self._stats = self._new_stats()
+        
+        # 进度统计
+        self.total_sub_links_count = 0  # 总子链接数量
+        self.completed_sub_links_count = 0  # 已完成子链接数量
+        
+        # 列表页缓存：页面URL -> 解析出的子链接列表，每个列表页只加载一次
+        self.listing_cache = {}
+        
+        # 任务断点（CrawlCheckpoint，由调用方设置）：记录翻页位置和已完成的子链接，重新运行时从断点继续
+        self.checkpoint = None
+    
+    @staticmethod
+    def _new_stats():
+        """创建空的统计信息字典"""
+        return {
             'total_pages': 0,
             'total_sub_links': 0,
             'total_documents': 0,
             'successful_downloads': 0,
             'failed_downloads': 0,
+            'skipped_unchanged': 0,
+            'skipped_completed': 0,
+            'not_modified': 0,
+            'bytes_saved': 0,
             'pages_processed': [],
             'failed_links': []
         }
-        
-        # 进度统计
-        self.total_sub_links_count = 0  # 总子链接数量
-        self.completed_sub_links_count = 0  # 已完成子链接数量
+    
+    def _in_worker(self):
+        """当前线程是否为子链接下载工作线程"""
+        return getattr(self._local, 'worker', False)
+    
+    # driver/wait/stats 在工作线程中指向线程私有的对象，
+    # 这样子类的 download_from_sublink 无需修改即可在多个线程中并行执行
+    @property
+    def driver(self):
+        if self._in_worker():
+            return getattr(self._local, 'driver', None)
+        return self._driver
+    
+    @driver.setter
+    def driver(self, value):
+        if self._in_worker():
+            self._local.driver = value
+        else:
+            self._driver = value
+    
+    @property
+    def wait(self):
+        if self._in_worker():
+            return getattr(self._local, 'wait', None)
+        return self._wait
+    
+    @wait.setter
+    def wait(self, value):
+        if self._in_worker():
+            self._local.wait = value
+        else:
+            self._wait = value
+    
+    @property
+    def browser_download_dir(self):
+        """浏览器当前的下载目录：处理子链接期间为该链接独立的临时目录，否则为分类下载目录"""
+        return getattr(self._local, 'download_dir', None) or self.download_path
+    
+    @property
+    def stats(self):
+        if self._in_worker():
+            return self._local.stats
+        return self._stats
+    
+    @stats.setter
+    def stats(self, value):
+        if self._in_worker():
+            self._local.stats = value
+        else:
+            self._stats = value
+    
+    def _merge_worker_stats(self):
+        """将工作线程私有的统计信息合并到共享统计信息中，并清空私有统计"""
+        if not self._in_worker():
+            return
+        local_stats = self._local.stats
+        with self._stats_lock:
+            for key, value in local_stats.items():
+                if isinstance(value, list):
+                    self._stats.setdefault(key, []).extend(value)
+                elif isinstance(value, (int, float)):
+                    self._stats[key] = self._stats.get(key, 0) + value
+        self._local.stats = self._new_stats()
+    
+    def _add_stat(self, key, value=1):
+        """
+        累加统计计数：工作线程累加到私有统计，其他线程在锁内累加到共享统计（与工作线程的合并互斥）
+        :param key: 统计项
+        :param value: 增加的数量
+        """
+        if self._in_worker():
+            self._local.stats[key] += value
+            return
+        with self._stats_lock:
+            self._stats[key] += value
     
     def _setup_chrome_options(self):
         """设置Chrome浏览器选项"""
@@ -105,12 +284,12 @@ class BaseCrawler(ABC):
                 'task_id': self.task_id
             }
             
-            # 使用回调函数更新CRAWLER_TASKS
+            # 使用回调函数更新CRAWLER_TASKS，由Web端合并后按间隔推送（tasks_progress）
             if self.progress_callback:
                 self.progress_callback(self.task_id, progress_data)
-            
-            # 发送WebSocket更新
-            self.socketio.emit('progress_update', progress_data, room=self.task_id)
+            else:
+                # 没有回调时直接发送WebSocket更新
+                self.socketio.emit('progress_update', progress_data, room=self.task_id)
             
         return True
 
@@ -119,52 +298,130 @@ class BaseCrawler(ABC):
         self.is_stopped = True
         self.log("收到停止信号，正在停止爬虫...", 'warning')
     
-    def count_all_sub_links(self, base_url, max_pages=None):
+    def discover_listing_pages(self, base_url, max_pages=None, start_page=0):
         """
-        统计所有页面的子链接数量（统一多页面逻辑）
+        列表页发现：逐页加载列表页并解析子链接，每页只请求一次，结果缓存在listing_cache中
+        发现一页即产出一页，同时增量更新子链接总数，调用方可以边发现边下载
         :param base_url: 基础URL
-        :param max_pages: 最大页数
-        :return: 总子链接数量
+        :param max_pages: 最大页数，0表示无限制，None表示默认10页
+        :param start_page: 起始页序号（从0开始，断点续爬时跳过之前已完成的页）
+        :return: 生成器，产出 (页码, 页面URL, 子链接列表)，页码从1开始
         """
-        try:
-            if not self.driver:
-                self.start_driver()
+        # 当max_pages为0时表示无限制，设为很大的数
+        if max_pages == 0:
+            max_pages = 999999
+        elif max_pages is None:
+            max_pages = 10
+        
+        if not self.driver:
+            self.start_driver()
+        
+        watermark = None
+        if self.use_watermark and self.manifest:
+            watermark = self.manifest.get_watermark(base_url)
+            if watermark:
+                self.log(f"水位线模式：翻页到上次最新的记录即停止（{watermark.get('publish_date') or watermark.get('url')}）")
+        
+        page_count = start_page
+        empty_pages = 0
+        
+        while page_count < max_pages:
+            if self.is_stopped:
+                self.log("爬虫已停止，结束列表页发现", 'warning')
+                break
             
-            total_count = 0
-            page_count = 0
-            # 当max_pages为0时表示无限制，设为很大的数
-            if max_pages == 0:
-                max_pages = 999999
-            elif max_pages is None:
-                max_pages = 10
+            current_url = self.generate_page_url(base_url, page_count)
+            if not current_url:
+                break
             
-            while page_count < max_pages:
-                current_url = self.generate_page_url(base_url, page_count)
-                
+            if current_url in self.listing_cache:
+                sub_links = self.listing_cache[current_url]
+            else:
                 # 检查页面是否存在
                 if not self.check_page_exists(current_url):
                     if page_count == 0:
                         self.log(f"第一页不存在: {current_url}", 'error')
                     else:
-                        self.log(f"第 {page_count + 1} 页不存在，停止统计", 'info')
+                        self.log(f"第 {page_count + 1} 页不存在，停止翻页", 'info')
                     break
                 
-                # 获取当前页面的子链接
-                sub_links = self.get_sub_links(current_url)
+                # 获取当前页面的子链接并缓存
+                sub_links = self.get_sub_links(current_url) or []
+                if page_count == 0 and sub_links:
+                    self.listing_head = sub_links[0]
                 
-                if sub_links:
-                    page_link_count = len(sub_links)
-                    total_count += page_link_count
-                    self.log(f"第 {page_count + 1} 页: {page_link_count} 个子链接", 'info')
-                else:
-                    self.log(f"第 {page_count + 1} 页: 0 个子链接", 'info')
-                
-                page_count += 1
+                # 只保留水位线之前（更新）的子链接
+                cut = self._watermark_index(sub_links, watermark) if watermark else None
+                if cut is not None:
+                    sub_links = sub_links[:cut]
+                    self.watermark_reached_url = current_url
+                self.listing_cache[current_url] = sub_links
                 
-                # 如果连续几页都没有子链接，则停止
-                if not sub_links and page_count > 2:
-                    self.log("连续页面无子链接，停止统计", 'info')
-                    break
+                with self._progress_lock:
+                    self.total_sub_links_count += len(sub_links)
+                self.log(f"第 {page_count + 1} 页: {len(sub_links)} 个子链接（已发现 {self.total_sub_links_count} 个）", 'info')
+                if sub_links:
+                    self.update_progress(
+                        current=self.completed_sub_links_count,
+                        total=self.total_sub_links_count,
+                        current_file=f"已发现 {self.total_sub_links_count} 个链接，正在继续翻页..."
+                    )
+            
+            page_count += 1
+            yield page_count, current_url, sub_links
+            
+            if current_url == self.watermark_reached_url:
+                self.log(f"第 {page_count} 页到达水位线，停止翻页", 'info')
+                break
+            
+            # 如果连续几页都没有子链接，则停止
+            empty_pages = 0 if sub_links else empty_pages + 1
+            if empty_pages >= 3:
+                self.log("连续页面无子链接，停止翻页", 'info')
+                break
+    
+    @staticmethod
+    def _watermark_index(sub_links, watermark):
+        """
+        查找列表页中第一个不晚于水位线的子链接
+        :param sub_links: 子链接列表（按时间倒序）
+        :param watermark: 水位线 {'url', 'publish_date'}
+        :return: 该子链接的下标，本页没有到达水位线时返回None
+        """
+        for i, sub_link in enumerate(sub_links):
+            if watermark.get('url') and canonical_url(sub_link.get('url', '')) == watermark['url']:
+                return i
+            publish_date = sub_link.get('publish_date')
+            if publish_date and watermark.get('publish_date') and publish_date < watermark['publish_date']:
+                return i
+        return None
+    
+    def update_watermark(self, base_url):
+        """
+        爬取成功结束（未停止、未出错且没有下载失败）后把本次最新的记录保存为列表的水位线
+        :param base_url: 列表基础URL
+        """
+        if not self.use_watermark or not self.manifest or not self.listing_head or not self.listing_head.get('url'):
+            return
+        try:
+            self.manifest.set_watermark(base_url, self.listing_head['url'], self.listing_head.get('publish_date'))
+            self.log(f"已更新水位线: {self.listing_head.get('title', self.listing_head['url'])}")
+        except Exception as e:
+            self.log(f"更新水位线失败: {e}", 'warning')
+    
+    def count_all_sub_links(self, base_url, max_pages=None):
+        """
+        统计所有页面的子链接数量（统一多页面逻辑）
+        列表页结果会写入listing_cache，之后的爬取不会重复加载
+        :param base_url: 基础URL
+        :param max_pages: 最大页数
+        :return: 总子链接数量
+        """
+        try:
+            total_count = 0
+            page_count = 0
+            for page_count, _, sub_links in self.discover_listing_pages(base_url, max_pages):
+                total_count += len(sub_links)
             
             self.log(f"统计完成：共 {page_count} 页，总计 {total_count} 个子链接", 'info')
             return total_count
@@ -178,17 +435,22 @@ class BaseCrawler(ABC):
         更新子链接进度
         :param increment: 增加的完成数量
         """
-        self.completed_sub_links_count += increment
+        with self._progress_lock:
+            self.completed_sub_links_count += increment
+            completed = self.completed_sub_links_count
         self.update_progress(
-            current=self.completed_sub_links_count,
+            current=completed,
             total=self.total_sub_links_count,
-            current_file=f"已完成 {self.completed_sub_links_count}/{self.total_sub_links_count} 个链接"
+            current_file=f"已完成 {completed}/{self.total_sub_links_count} 个链接"
         )
     
-    def start_driver(self):
-        """启动浏览器驱动"""
+    def start_driver(self, timeout=None):
+        """
+        启动浏览器驱动（从进程级驱动池中租用）
+        :param timeout: 等待空闲浏览器的超时时间（秒），None表示使用驱动池的默认值
+        """
         try:
-            self.driver = webdriver.Chrome(options=self.chrome_options)
+            self.driver = get_driver_pool(self.crawler_config).acquire(self.chrome_options, self.browser_download_dir, timeout=timeout)
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             self.wait = WebDriverWait(self.driver, 20)
             self.log("浏览器驱动已启动")
@@ -196,11 +458,177 @@ class BaseCrawler(ABC):
             self.log(f"启动浏览器驱动失败: {e}", 'error')
             raise
     
-    def close_driver(self):
-        """关闭浏览器驱动"""
+    def close_driver(self, discard=False):
+        """
+        归还浏览器驱动到驱动池
+        :param discard: 为True时直接关闭浏览器而不放回驱动池
+        """
         if self.driver:
-            self.driver.quit()
-            self.log("浏览器驱动已关闭")
+            driver = self.driver
+            self.driver = None
+            self.wait = None
+            get_driver_pool(self.crawler_config).release(driver, discard=discard)
+            self.log("浏览器驱动已归还")
+    
+    def navigate(self, url, ready=None, timeout=None):
+        """
+        浏览器导航到指定URL（经过限速器），并根据加载耗时和状态码调整该主机的速率
+        :param url: 目标URL
+        :param ready: 就绪条件，'listing'/'detail' 使用类上声明的条件，也可以直接传入条件列表；None表示不等待
+        :param timeout: 就绪等待超时时间（秒），None表示使用配置中的 page_ready_timeout
+        :return: 页面的HTTP状态码（浏览器无法提供时为None）
+        """
+        self.rate_limiter.acquire(url)
+        start_time = time.time()
+        try:
+            self.driver.get(url)
+        except Exception:
+            self.rate_limiter.feedback(url, elapsed=time.time() - start_time, error=True)
+            raise
+        elapsed = time.time() - start_time
+        
+        status = None
+        try:
+            status = self.driver.execute_script(
+                "var e = performance.getEntriesByType('navigation')[0];"
+                "return e && e.responseStatus ? e.responseStatus : null;"
+            )
+        except Exception:
+            pass
+        self.rate_limiter.feedback(url, status=status, elapsed=elapsed)
+        
+        if ready is not None:
+            self.wait_until_ready(ready, timeout)
+        return status
+    
+    def wait_until_ready(self, ready='detail', timeout=None):
+        """
+        等待当前页面就绪，条件满足立即返回，超时后记录警告并继续处理
+        :param ready: 'listing'、'detail' 或条件列表
+        :param timeout: 超时时间（秒），None表示使用配置中的 page_ready_timeout
+        :return: 是否在超时前就绪
+        """
+        if ready == 'listing':
+            conditions = self.LISTING_READY
+        elif ready == 'detail':
+            conditions = self.DETAIL_READY
+        else:
+            conditions = ready or []
+        if timeout is None:
+            timeout = self.crawler_config.get('page_ready_timeout', 10)
+        
+        def page_ready(driver):
+            try:
+                if driver.execute_script("return document.readyState") != 'complete':
+                    return False
+            except Exception:
+                return False
+            if not conditions:
+                return True
+            for condition in conditions:
+                try:
+                    if callable(condition):
+                        if condition(driver):
+                            return True
+                    elif driver.find_elements(*condition):
+                        return True
+                except Exception:
+                    continue
+            return False
+        
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(page_ready)
+            return True
+        except TimeoutException:
+            self.log(f"等待页面就绪超时（{timeout}秒），继续处理", 'warning')
+            return False
+    
+    def http_request(self, method, url, **kwargs):
+        """
+        发送HTTP请求（经过限速器），并根据响应耗时和状态码调整该主机的速率
+        :param method: 请求方法
+        :param url: 请求URL
+        :param kwargs: 传递给requests的其他参数
+        :return: requests响应对象
+        """
+        self.rate_limiter.acquire(url)
+        start_time = time.time()
+        try:
+            response = self.http_session.request(method, url, **kwargs)
+        except Exception:
+            self.rate_limiter.feedback(url, elapsed=time.time() - start_time, error=True)
+            raise
+        self.rate_limiter.feedback(
+            url,
+            status=response.status_code,
+            elapsed=time.time() - start_time,
+            retry_after=parse_retry_after(response.headers.get('Retry-After'))
+        )
+        return response
+    
+    def http_get(self, url, **kwargs):
+        """发送GET请求（经过限速器）"""
+        return self.http_request('GET', url, **kwargs)
+    
+    def conditional_get(self, url, **kwargs):
+        """
+        条件GET：下载清单中记录了该URL的ETag/Last-Modified且本地文件仍存在时，
+        发送If-None-Match/If-Modified-Since，服务器返回304时不传输响应体
+        :param url: 文件URL
+        :param kwargs: 传递给requests的其他参数
+        :return: (响应对象, 本地文件路径)；只有状态码为304时本地文件路径不为None，此时调用方应直接使用本地文件
+        """
+        entry = self.manifest.get(url) if self.manifest else None
+        local_path = entry.get('local_path') if entry else None
+        if local_path and os.path.exists(local_path) and (entry.get('etag') or entry.get('last_modified')):
+            headers = dict(kwargs.pop('headers', None) or {})
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            kwargs['headers'] = headers
+        else:
+            local_path = None
+        
+        response = self.http_get(url, **kwargs)
+        if response.status_code != 304 or not local_path:
+            return response, None
+        
+        response.close()
+        self.stats['not_modified'] += 1
+        self.stats['bytes_saved'] += os.path.getsize(local_path)
+        self.on_file_saved(local_path, entry.get('content_hash'))
+        self.log(f"文件未变化（304），跳过下载: {os.path.basename(local_path)}")
+        return response, local_path
+    
+    def download_to_file(self, url, file_path, headers=None, response=None):
+        """
+        下载文件：写入 .part 临时文件，校验长度后原子地移动到目标路径，连接中断时自动续传
+        :param url: 文件URL
+        :param file_path: 目标文件路径（已存在时覆盖）
+        :param headers: 请求头
+        :param response: 已经发出的流式GET响应（可选），下载从该响应继续
+        :return: (文件大小（字节）, 下载过程中算出的SHA-256)
+        """
+        return self.downloader.download(url, file_path, headers=headers, response=response)
+    
+    def remember_validators(self, url, response, file_path, content_hash=None):
+        """
+        记录下载响应的ETag/Last-Modified，供下次条件请求使用
+        :param url: 文件URL
+        :param response: 下载响应
+        :param file_path: 保存后的文件路径
+        :param content_hash: 文件的SHA-256，None表示读取文件计算
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not self.manifest or not (etag or last_modified):
+            return
+        try:
+            self.manifest.record(url, etag=etag, last_modified=last_modified,
+                                 content_hash=content_hash or file_sha256(file_path), local_path=file_path)
+        except Exception as e:
+            self.log(f"记录文件验证信息失败: {e}", 'warning')
     
     def clean_filename(self, filename):
         """
@@ -222,19 +650,19 @@ class BaseCrawler(ABC):
     
     def get_files_in_directory(self):
         """
-        获取下载目录中的所有文件
-        :return: 文件列表（文件名和修改时间）
+        获取浏览器下载目录中的所有文件
+        :return: 文件列表（文件名、路径、大小和修改时间）
         """
         files = []
         try:
-            for filename in os.listdir(self.download_path):
-                if os.path.isfile(os.path.join(self.download_path, filename)):
-                    file_path = os.path.join(self.download_path, filename)
-                    files.append({
-                        'name': filename,
-                        'path': file_path,
-                        'mtime': os.path.getmtime(file_path)
-                    })
+            for name, entry in list_files(self.browser_download_dir).items():
+                stat = entry.stat()
+                files.append({
+                    'name': name,
+                    'path': entry.path,
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime
+                })
         except Exception as e:
             self.log(f"获取文件列表时出错: {e}", 'error')
         return files
@@ -242,43 +670,23 @@ class BaseCrawler(ABC):
     def wait_for_download_complete(self, initial_files, timeout=30):
         """
         等待下载完成，并返回新下载的文件
-        :param initial_files: 下载前的文件列表
+        临时文件（.crdownload）改名为正式文件且大小稳定后立即返回，不再固定等待
+        :param initial_files: 下载前的文件列表（get_files_in_directory的结果或文件名集合）
         :param timeout: 超时时间（秒）
         :return: 新下载的文件信息
         """
-        start_time = time.time()
         self.log(f"开始等待下载完成，超时时间: {timeout}秒")
+        initial_names = {f['name'] if isinstance(f, dict) else f for f in initial_files}
+        watcher = DownloadWatcher(
+            self.browser_download_dir,
+            settle_time=self.crawler_config.get('download_settle_time', 0.5)
+        )
+        new_files = watcher.wait_for_new_files(initial_names, timeout, should_stop=lambda: self.is_stopped)
         
-        while time.time() - start_time < timeout:
-            current_files = self.get_files_in_directory()
-            
-            # 查找新文件
-            new_files = []
-            for current_file in current_files:
-                is_new = True
-                for initial_file in initial_files:
-                    if current_file['name'] == initial_file['name']:
-                        is_new = False
-                        break
-                if is_new:
-                    new_files.append(current_file)
-            
-            # 检查是否有新文件且文件不再变化（下载完成）
-            if new_files:
-                self.log(f"检测到 {len(new_files)} 个新文件")
-                # 等待一段时间确保文件下载完成
-                time.sleep(3)
-                stable_files = []
-                for new_file in new_files:
-                    # 检查文件是否不再变化（下载完成）
-                    if not new_file['name'].endswith('.crdownload') and not new_file['name'].endswith('.tmp'):
-                        stable_files.append(new_file)
-                        self.log(f"发现稳定文件: {new_file['name']}")
-                
-                if stable_files:
-                    return stable_files
-            
-            time.sleep(1)
+        if new_files:
+            for new_file in new_files:
+                self.log(f"发现稳定文件: {new_file['name']}")
+            return new_files
         
         self.log(f"等待超时，未检测到新文件", 'warning')
         return []
@@ -316,10 +724,10 @@ class BaseCrawler(ABC):
             # 如果文件已存在，直接覆盖
             if os.path.exists(new_path):
                 self.log(f"文件已存在，将覆盖: {new_filename}")
-                os.remove(new_path)
             
-            # 重命名文件
-            os.rename(old_path, new_path)
+            # 从下载目录原子地移动到分类目录（目标存在时直接替换）
+            os.replace(old_path, new_path)
+            self.on_file_saved(new_path)
             self.log(f"文件已重命名: {old_name} -> {new_filename}")
             return new_path
             
@@ -348,7 +756,9 @@ class BaseCrawler(ABC):
                 'Upgrade-Insecure-Requests': '1',
             }
             
-            response = requests.get(pdf_url, headers=headers, timeout=30)
+            response, cached_path = self.conditional_get(pdf_url, headers=headers, stream=True, timeout=30)
+            if cached_path:
+                return True
             response.raise_for_status()
             
             # 生成文件名
@@ -363,11 +773,11 @@ class BaseCrawler(ABC):
             # 如果文件已存在，直接覆盖
             if os.path.exists(filepath):
                 self.log(f"文件已存在，将覆盖: {filename}")
-                os.remove(filepath)
             
             # 保存文件
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            _, digest = self.download_to_file(pdf_url, filepath, headers=headers, response=response)
+            digest = self.on_file_saved(filepath, digest)
+            self.remember_validators(pdf_url, response, filepath, digest)
             
             self.log(f"PDF下载成功: {filename}", 'success')
             return True
@@ -422,7 +832,7 @@ class BaseCrawler(ABC):
         :return: 页面是否存在
         """
         try:
-            response = requests.get(url, timeout=10)
+            response = self.http_get(url, timeout=10)
             return response.status_code == 200
         except:
             return False
@@ -445,13 +855,15 @@ class BaseCrawler(ABC):
             filename = f"{clean_title}.html"
             filepath = os.path.join(self.download_path, filename)
             
-            # 如果文件已存在，直接覆盖
+            # 如果文件已存在，直接覆盖（先删除，避免写穿与其他分类共享的硬链接）
             if os.path.exists(filepath):
                 self.log(f"文件已存在，将覆盖: {filename}")
+                os.remove(filepath)
             
             # 保存文件
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(page_source)
+            self.on_file_saved(filepath)
             
             self.log(f"页面内容保存成功: {filename}", 'success')
             return True
@@ -482,6 +894,13 @@ class BaseCrawler(ABC):
             add_line(f"   总文档数: {self.stats.get('total_documents', 0)}")
             add_line(f"   成功下载数: {self.stats.get('successful_downloads', 0)}")
             add_line(f"   失败下载数: {self.stats.get('failed_downloads', 0)}")
+            if self.stats.get('skipped_unchanged', 0):
+                add_line(f"   跳过未变化数: {self.stats.get('skipped_unchanged', 0)}")
+            if self.stats.get('skipped_completed', 0):
+                add_line(f"   断点前已完成数: {self.stats.get('skipped_completed', 0)}")
+            if self.stats.get('not_modified', 0):
+                add_line(f"   未修改（304）数: {self.stats.get('not_modified', 0)}")
+                add_line(f"   节省下载流量: {self.stats.get('bytes_saved', 0) / 1024 / 1024:.2f} MB")
             
             total_docs = self.stats.get('total_documents', 0)
             successful_docs = self.stats.get('successful_downloads', 0)
@@ -601,95 +1020,390 @@ class BaseCrawler(ABC):
         else:
             return f"{base_url}index_{page_num}.shtml"
     
-    def crawl_all_pages(self, base_url, max_pages=10):
+    @contextmanager
+    def isolated_download(self):
+        """
+        为一次子链接处理分配独立的浏览器下载目录（download_path/.downloads/<随机ID>）
+        期间新下载的文件只会出现在该目录中，无需与其他并发下载区分；
+        rename_downloaded_file 会把文件移动到分类目录，退出时未被认领的文件也会移入分类目录；
+        期间才调用 start_driver() 租用的浏览器同样使用该目录
+        """
+        if not self.crawler_config.get('isolated_downloads', True):
+            yield self.download_path
+            return
+        
+        scratch_dir = os.path.join(self.download_path, '.downloads', uuid.uuid4().hex)
+        try:
+            os.makedirs(scratch_dir)
+            if self.driver:
+                set_download_directory(self.driver, scratch_dir)
+        except Exception as e:
+            self.log(f"创建独立下载目录失败，使用分类目录: {e}", 'warning')
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+            yield self.download_path
+            return
+        
+        self._local.download_dir = scratch_dir
+        try:
+            yield scratch_dir
+        finally:
+            self._local.download_dir = None
+            try:
+                if self.driver:
+                    set_download_directory(self.driver, self.download_path)
+            except Exception as e:
+                self.log(f"恢复浏览器下载目录失败: {e}", 'warning')
+            self._collect_scratch_dir(scratch_dir)
+    
+    def _collect_scratch_dir(self, scratch_dir):
+        """
+        将独立下载目录中剩余的已完成文件移入分类目录并删除该目录
+        :param scratch_dir: 独立下载目录
+        """
+        for name, entry in list_files(scratch_dir).items():
+            if is_temp_file(name):
+                self.log(f"丢弃未完成的下载: {name}", 'warning')
+                continue
+            target = os.path.join(self.download_path, name)
+            base, ext = os.path.splitext(name)
+            counter = 1
+            while os.path.exists(target):
+                target = os.path.join(self.download_path, f"{base}_{counter}{ext}")
+                counter += 1
+            try:
+                os.replace(entry.path, target)
+                self.on_file_saved(target)
+                self.log(f"下载文件已移入分类目录: {os.path.basename(target)}")
+            except OSError as e:
+                self.log(f"移动下载文件失败: {name} - {e}", 'warning')
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    
+    def on_file_saved(self, file_path, digest=None):
+        """
+        文件保存到分类目录后调用（子类保存文件时也应调用）：
+        纳入文档存储去重、登记文件索引，并把文件归属到正在处理的子链接
+        :param file_path: 保存后的文件路径
+        :param digest: 已知的SHA-256（下载时边写边算），None表示需要时读取文件计算
+        :return: 文件的SHA-256（未计算时为None）
+        """
+        if self.blob_store:
+            try:
+                digest = self.blob_store.add(file_path, digest)
+            except Exception as e:
+                self.log(f"文件纳入文档存储失败，保留独立副本: {e}", 'warning')
+        if self.file_catalog:
+            try:
+                self.file_catalog.add(file_path)
+            except Exception as e:
+                self.log(f"登记文件索引失败: {e}", 'warning')
+        saved_files = getattr(self._local, 'saved_files', None)
+        if saved_files is not None:
+            saved_files.append((file_path, digest))
+        return digest
+    
+    def _record_manifest(self, sub_link, saved_files):
+        """
+        将子链接及其保存的文件记入下载清单
+        :param sub_link: 子链接信息
+        :param saved_files: 处理该子链接时保存的文件列表 [(路径, SHA-256)]
+        """
+        if not self.manifest or not saved_files or not sub_link.get('url'):
+            return
+        local_path, digest = saved_files[0]
+        try:
+            self.manifest.record(
+                sub_link['url'],
+                title=sub_link.get('title'),
+                publish_date=sub_link.get('publish_date'),
+                content_hash=digest or file_sha256(local_path),
+                local_path=local_path
+            )
+        except Exception as e:
+            self.log(f"更新下载清单失败: {e}", 'warning')
+    
+    def _skip_unchanged(self, sub_link):
+        """
+        增量模式下，子链接已下载且未变化时跳过，并计入统计和进度
+        :param sub_link: 子链接信息
+        :return: 是否已跳过
+        """
+        if not self.incremental or not self.manifest or not sub_link.get('url'):
+            return False
+        if not self.manifest.is_unchanged(sub_link['url'], sub_link.get('publish_date')):
+            return False
+        self.log(f"已下载且未变化，跳过: {sub_link.get('title', '')}")
+        self._add_stat('skipped_unchanged')
+        if self.checkpoint:
+            self.checkpoint.complete(sub_link['url'])
+        self.update_sub_link_progress(1)
+        return True
+    
+    def _skip_completed(self, sub_link):
+        """
+        断点续爬时，子链接已在之前的运行中完成则跳过，并计入统计和进度
+        :param sub_link: 子链接信息
+        :return: 是否已跳过
+        """
+        if not self.checkpoint or not self.checkpoint.is_completed(sub_link.get('url')):
+            return False
+        self._add_stat('skipped_completed')
+        self.update_sub_link_progress(1)
+        return True
+    
+    def _resume_from_checkpoint(self):
+        """
+        读取断点位置并记录日志
+        :return: 起始页序号（从0开始）
+        """
+        if not self.checkpoint:
+            return 0
+        if self.checkpoint.page_index or self.checkpoint.completed_count:
+            self.log(f"从断点继续：第 {self.checkpoint.page_index + 1} 页第 {self.checkpoint.link_cursor + 1} 个子链接，"
+                     f"之前已完成 {self.checkpoint.completed_count} 个子链接")
+        return self.checkpoint.page_index
+    
+    def _finish_checkpoint(self, completed):
+        """
+        爬取结束时处理断点：完整结束则删除，否则保存当前位置供下次继续
+        :param completed: 是否完整结束（未被停止、未出错）
+        """
+        if not self.checkpoint:
+            return
+        try:
+            if completed:
+                self.checkpoint.clear()
+            else:
+                self.checkpoint.save(force=True)
+                self.log(f"已保存断点：第 {self.checkpoint.page_index + 1} 页，已完成 {self.checkpoint.completed_count} 个子链接")
+        except Exception as e:
+            self.log(f"保存断点失败: {e}", 'warning')
+    
+    def _process_sub_link(self, sub_link, position=''):
+        """
+        处理单个子链接：下载内容并更新进度（主线程与工作线程共用）
+        :param sub_link: 子链接信息
+        :param position: 日志中显示的位置描述
+        """
+        self.log(f"\n{position}{sub_link.get('title', '')}")
+        
+        self._local.saved_files = []
+        # download_from_sublink 自行捕获的下载失败只计入统计，通过失败数的变化判断是否成功
+        failed_before = self.stats['failed_downloads']
+        succeeded = False
+        try:
+            with self.isolated_download():
+                self.download_from_sublink(sub_link)
+            succeeded = self.stats['failed_downloads'] == failed_before
+            # 失败的子链接不写入清单（可能只保存了页面快照），否则增量爬取会把它当作已下载而永久跳过
+            if succeeded:
+                self._record_manifest(sub_link, self._local.saved_files)
+        except Exception as e:
+            self.log(f"处理子链接时出错: {e}", 'error')
+            self.stats['failed_downloads'] += 1
+            self.stats['failed_links'].append({
+                'url': sub_link.get('url', ''),
+                'title': sub_link.get('title', ''),
+                'reason': f'处理子链接时出错: {str(e)}'
+            })
+        
+        self._local.saved_files = None
+        self._merge_worker_stats()
+        # 失败的子链接不记入断点，续爬时重新下载
+        if self.checkpoint and succeeded:
+            self.checkpoint.complete(sub_link.get('url'))
+        # 更新进度
+        self.update_sub_link_progress(1)
+    
+    def _sub_link_worker(self, link_queue, worker_num):
+        """
+        子链接下载工作线程：使用独立的浏览器驱动，从共享队列中取出子链接并处理
+        :param link_queue: 共享的子链接队列，None为结束标记
+        :param worker_num: 工作线程编号
+        """
+        self._local.worker = True
+        self._local.stats = self._new_stats()
+        
+        try:
+            # 工作线程只短暂等待浏览器，避免驱动池被占满时与主线程互相等待
+            if self.PRELOAD_DRIVER:
+                self.start_driver(timeout=self.crawler_config.get('worker_driver_acquire_timeout', 30))
+        except Exception as e:
+            # 未获得浏览器的工作线程直接退出，剩余子链接由其他线程或主线程处理
+            self.log(f"工作线程 {worker_num} 启动浏览器失败: {e}", 'error')
+            return
+        
+        try:
+            while True:
+                item = link_queue.get()
+                if item is None:
+                    break
+                # 停止后只清空队列，不再处理
+                if self.is_stopped:
+                    continue
+                
+                sub_link, position = item
+                self._process_sub_link(sub_link, f"[工作线程 {worker_num}] {position}")
+        finally:
+            self._merge_worker_stats()
+            try:
+                self.close_driver()
+            except Exception as e:
+                self.log(f"工作线程 {worker_num} 关闭浏览器失败: {e}", 'warning')
+    
+    def _start_sub_link_workers(self, concurrency):
+        """
+        启动子链接下载工作线程池
+        :param concurrency: 工作线程数量
+        :return: (共享队列, 工作线程列表)
+        """
+        link_queue = queue.Queue()
+        workers = []
+        for worker_num in range(1, concurrency + 1):
+            worker = threading.Thread(
+                target=self._sub_link_worker,
+                args=(link_queue, worker_num),
+                name=f"{self.task_id or 'crawler'}-worker-{worker_num}",
+                daemon=True
+            )
+            worker.start()
+            workers.append(worker)
+        self.log(f"已启动 {concurrency} 个并发下载工作线程")
+        return link_queue, workers
+    
+    def _finish_sub_link_workers(self, link_queue, workers):
+        """
+        通知工作线程结束并等待其退出
+        :param link_queue: 共享的子链接队列
+        :param workers: 工作线程列表
+        """
+        for _ in workers:
+            link_queue.put(None)
+        for worker in workers:
+            worker.join()
+        
+        # 工作线程未能获得浏览器时，队列中可能还有未处理的子链接，由当前线程补充处理
+        while True:
+            try:
+                item = link_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None or self.is_stopped:
+                continue
+            if self.PRELOAD_DRIVER and not self.driver:
+                self.start_driver()
+            sub_link, position = item
+            self._process_sub_link(sub_link, position)
+    
+    def _dispatch_sub_link(self, link_queue, sub_link, position=''):
+        """
+        分发子链接：并发模式下放入共享队列，否则在当前线程中直接处理
+        :param link_queue: 共享的子链接队列（顺序模式为None）
+        :param sub_link: 子链接信息
+        :param position: 日志中显示的位置描述
+        """
+        if link_queue is not None:
+            link_queue.put((sub_link, position))
+        else:
+            self._process_sub_link(sub_link, position)
+    
+    def crawl_all_pages(self, base_url, max_pages=10, concurrency=None):
         """
         爬取所有页面（支持翻页）
+        列表页只加载一次：每发现一页就立即开始处理该页的子链接，子链接总数随翻页增量更新
         :param base_url: 基础URL
         :param max_pages: 最大页面数，防止无限循环，0表示无限制
+        :param concurrency: 并发下载的工作线程数，None表示使用self.concurrency，1表示逐个处理
         """
+        link_queue, workers = None, []
+        completed = False
         try:
             # 处理max_pages=0的情况（表示无限制）
             if max_pages == 0:
                 max_pages = 999999
                 self.log("设置为无限制页数模式")
             
-            if not self.driver:
-                self.start_driver()
+            if concurrency is None:
+                concurrency = self.concurrency
+            concurrency = max(1, int(concurrency or 1))
             
-            # 第一步：统计所有页面的子链接总数
-            self.log("正在统计所有页面的子链接数量...")
-            self.total_sub_links_count = self.count_all_sub_links(base_url, max_pages)
+            start_page = self._resume_from_checkpoint()
             
-            if self.total_sub_links_count == 0:
-                self.log("未找到任何子链接", 'warning')
-                return
+            if not self.driver:
+                self.start_driver()
             
-            self.log(f"共找到 {self.total_sub_links_count} 个子链接，开始爬取...")
+            # 并发模式：启动工作线程池，主线程负责翻页发现并分发子链接，下载与翻页同时进行
+            if concurrency > 1:
+                link_queue, workers = self._start_sub_link_workers(concurrency)
             
-            # 第二步：逐页处理子链接
             page_count = 0
-            
-            while page_count < max_pages:
-                if self.is_stopped:
-                    self.log("爬虫已停止", 'warning')
-                    break
-                
-                current_url = self.generate_page_url(base_url, page_count)
+            known_run = 0  # 增量模式下连续遇到的已下载且未变化的子链接数
+            for page_num, current_url, sub_links in self.discover_listing_pages(base_url, max_pages, start_page):
+                page_count = page_num
                 
                 self.log(f"\n{'='*60}")
-                self.log(f"正在处理第 {page_count + 1} 页")
+                self.log(f"正在处理第 {page_num} 页")
                 self.log(f"页面URL: {current_url}")
                 self.log(f"{'='*60}")
                 
-                # 检查页面是否存在
-                if not self.check_page_exists(current_url):
-                    self.log(f"第 {page_count + 1} 页不存在，停止翻页", 'warning')
-                    break
-                
-                self.log(f"第 {page_count + 1} 页存在，开始爬取...")
-                
-                # 获取当前页面的所有子链接
-                sub_links = self.get_sub_links(current_url)
-                
                 if not sub_links:
-                    self.log(f"第 {page_count + 1} 页未找到任何子链接", 'warning')
-                    page_count += 1
+                    self.log(f"第 {page_num} 页未找到任何子链接", 'warning')
                     continue
                 
-                self.log(f"第 {page_count + 1} 页找到 {len(sub_links)} 个子链接")
-                
                 # 记录已处理的页面
                 self.stats['pages_processed'].append({
-                    'page_num': page_count + 1,
+                    'page_num': page_num,
                     'url': current_url,
                     'sub_links_count': len(sub_links)
                 })
                 
-                # 逐个处理子链接
+                if self.checkpoint:
+                    self.checkpoint.begin_page(page_num - 1, [sub_link.get('url') for sub_link in sub_links])
+                
+                # 逐个处理（或分发）子链接
                 for i, sub_link in enumerate(sub_links, 1):
                     if self.is_stopped:
                         self.log("爬虫已停止", 'warning')
                         break
-                        
-                    self.log(f"\n第 {page_count + 1} 页 - 处理链接 {i}/{len(sub_links)}: {sub_link.get('title', '')}")
-                    
-                    self.download_from_sublink(sub_link)
-                    
-                    # 更新进度
-                    self.update_sub_link_progress(1)
                     
-                    time.sleep(2)  # 避免请求过于频繁
+                    if self._skip_completed(sub_link):
+                        continue
+                    if self._skip_unchanged(sub_link):
+                        known_run += 1
+                        continue
+                    known_run = 0
+                    self._dispatch_sub_link(link_queue, sub_link, f"第 {page_num} 页 - 处理链接 {i}/{len(sub_links)}: ")
                 
-                self.log(f"第 {page_count + 1} 页处理完成")
-                page_count += 1
-                time.sleep(3)  # 页面间隔时间
+                self.log(f"第 {page_num} 页已{'分发' if link_queue is not None else '处理完成'}")
+                
+                if self.incremental and self.incremental_stop_after and known_run >= self.incremental_stop_after:
+                    self.log(f"连续 {known_run} 个子链接已下载且未变化，停止翻页")
+                    break
+            
+            if self.total_sub_links_count == 0:
+                self.log("未找到任何子链接", 'warning')
+            else:
+                self.log(f"列表页发现完成：共 {page_count} 页，{self.total_sub_links_count} 个子链接")
             
             # 更新总页数
             self.stats['total_pages'] = page_count
             
+            if workers:
+                self._finish_sub_link_workers(link_queue, workers)
+                workers = []
+            if not self.is_stopped:
+                # 有失败的子链接时保留原水位线，否则下次增量爬取会在水位线处截断，失败的记录永远不会重试
+                if self.stats['failed_downloads']:
+                    self.log(f"有 {self.stats['failed_downloads']} 个子链接下载失败，水位线保持不变", 'warning')
+                else:
+                    self.update_watermark(base_url)
+                completed = True
+            
         except Exception as e:
             self.log(f"翻页爬取过程中出错: {e}", 'error')
         finally:
+            if workers:
+                self._finish_sub_link_workers(link_queue, workers)
+            self._finish_checkpoint(completed)
             try:
                 self.print_summary_report()
             except Exception as report_error:
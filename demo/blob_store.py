@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import sqlite3
+import native_lock
+from crawl_manifest import file_sha256
+
+
+class BlobStore:
+    """
+    按SHA-256寻址的文档存储
+    每份内容只在 <root>/<前两位>/<摘要> 保存一次，各分类目录中的文件都是指向它的硬链接，
+    同一份法规出现在多个分类下时只占用一份磁盘空间；同时记录每个知识库已上传过的内容，避免重复上传。
+    分类目录中的文件全部删除或被替换后，存储中的内容只剩自身一个链接，由 prune 清理
+    """
+
+    def __init__(self, root):
+        """
+        打开（必要时创建）存储目录和索引
+        :param root: 存储根目录（需要与下载目录在同一文件系统上才能建立硬链接）
+        """
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = native_lock.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.root, 'index.sqlite3'), check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER,
+                    created_at REAL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS kb_uploads (
+                    kb_id TEXT,
+                    digest TEXT,
+                    documents TEXT,
+                    uploaded_at REAL,
+                    PRIMARY KEY (kb_id, digest)
+                )
+            ''')
+
+    def blob_path(self, digest):
+        """摘要对应的存储路径"""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def add(self, file_path, digest=None):
+        """
+        将文件纳入存储：内容已存在时把文件替换为指向已有内容的硬链接，否则为文件建立存储链接
+        :param file_path: 分类目录中的文件
+        :param digest: 已知的SHA-256（下载时边写边算），None表示读取文件计算
+        :return: 文件的SHA-256
+        """
+        digest = digest or file_sha256(file_path)
+        blob = self.blob_path(digest)
+        with self._lock:
+            if os.path.exists(blob):
+                if not os.path.samefile(blob, file_path):
+                    # 先在同目录建立临时链接，再原子地替换，替换前后文件名始终可用
+                    temp_path = file_path + '.link'
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    os.link(blob, temp_path)
+                    os.replace(temp_path, file_path)
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.link(file_path, blob)
+            with self._conn:
+                self._conn.execute(
+                    'INSERT OR IGNORE INTO blobs (digest, size, created_at) VALUES (?, ?, ?)',
+                    (digest, os.path.getsize(blob), time.time())
+                )
+        return digest
+
+    def prune(self, grace=3600):
+        """
+        删除孤立的内容：链接数为1（没有任何分类目录中的文件指向它）的存储文件
+        :param grace: 最近grace秒内链接数变化过的内容暂不删除，避免与正在进行的替换冲突
+        :return: (删除的数量, 释放的字节数)
+        """
+        removed = []
+        freed = 0
+        cutoff = time.time() - grace
+        with self._lock:
+            with os.scandir(self.root) as prefixes:
+                directories = [entry.path for entry in prefixes if entry.is_dir() and len(entry.name) == 2]
+            for directory in directories:
+                with os.scandir(directory) as it:
+                    blobs = [entry.path for entry in it if entry.is_file()]
+                for blob in blobs:
+                    try:
+                        stat = os.stat(blob)
+                        # 链接数变化会更新ctime
+                        if stat.st_nlink != 1 or stat.st_ctime > cutoff:
+                            continue
+                        os.remove(blob)
+                    except OSError:
+                        continue
+                    removed.append((os.path.basename(blob),))
+                    freed += stat.st_size
+            if removed:
+                with self._conn:
+                    self._conn.executemany('DELETE FROM blobs WHERE digest = ?', removed)
+        return len(removed), freed
+
+    def find_upload(self, kb_id, digest):
+        """
+        查询知识库是否已上传过相同内容
+        :param kb_id: 知识库ID
+        :param digest: 文件的SHA-256
+        :return: 上次上传返回的文档信息，没有上传过时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT documents FROM kb_uploads WHERE kb_id = ? AND digest = ?', (kb_id, digest)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record_upload(self, kb_id, digest, documents):
+        """
+        记录一次成功的知识库上传
+        :param kb_id: 知识库ID
+        :param digest: 文件的SHA-256
+        :param documents: 上传接口返回的文档信息
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO kb_uploads (kb_id, digest, documents, uploaded_at) VALUES (?, ?, ?, ?)',
+                (kb_id, digest, json.dumps(documents, ensure_ascii=False), time.time())
+            )
+
+
+_store = None
+_store_lock = native_lock.Lock()
+
+
+def get_blob_store(config=None):
+    """
+    获取进程级共享的文档存储（首次调用时根据CRAWLER_CONFIG创建）
+    :param config: 爬虫配置字典（CRAWLER_CONFIG），仅首次创建时使用
+    :return: BlobStore实例，配置中关闭时返回None
+    """
+    global _store
+    config = config or {}
+    if not config.get('blob_store', True):
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore(config.get('blob_store_dir', './.blobs'))
+        return _store
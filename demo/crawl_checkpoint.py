@@ -0,0 +1,185 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from crawl_manifest import canonical_url
+
+
+def _connect(db_path):
+    """打开断点数据库（必要时建表）"""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                task_id TEXT PRIMARY KEY,
+                page_index INTEGER,
+                link_cursor INTEGER,
+                completed INTEGER,
+                updated_at REAL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS checkpoint_urls (
+                task_id TEXT,
+                url TEXT,
+                PRIMARY KEY (task_id, url)
+            )
+        ''')
+    return conn
+
+
+def has_checkpoint(db_path, task_id):
+    """
+    任务是否有可用的断点
+    :param db_path: 断点数据库路径
+    :param task_id: 任务ID
+    :return: 是否存在断点记录
+    """
+    if not os.path.exists(db_path):
+        return False
+    conn = _connect(db_path)
+    try:
+        return conn.execute('SELECT 1 FROM checkpoints WHERE task_id = ?', (task_id,)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def delete_checkpoint(db_path, task_id):
+    """
+    删除任务的断点
+    :param db_path: 断点数据库路径
+    :param task_id: 任务ID
+    """
+    if not os.path.exists(db_path):
+        return
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.execute('DELETE FROM checkpoints WHERE task_id = ?', (task_id,))
+            conn.execute('DELETE FROM checkpoint_urls WHERE task_id = ?', (task_id,))
+    finally:
+        conn.close()
+
+
+class CrawlCheckpoint:
+    """
+    爬取任务的断点（SQLite）
+    记录翻页位置（第一个还有未完成子链接的列表页）、该页内的子链接游标和已完成的子链接URL，
+    进程中断后以同一任务ID重新运行时从断点继续，已完成的子链接不再重复下载
+    """
+
+    def __init__(self, db_path, task_id, save_interval=5.0):
+        """
+        打开任务的断点，已有记录时加载
+        :param db_path: 断点数据库路径
+        :param task_id: 任务ID
+        :param save_interval: 定期保存的最小间隔（秒）
+        """
+        self.db_path = db_path
+        self.task_id = task_id
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._conn = _connect(db_path)
+        self._pending_urls = []  # 尚未写入数据库的已完成URL
+        self._last_save = 0
+        self._finished = False
+        # 已开始处理的列表页: 页序号 -> (子链接URL列表, 完成标记列表)
+        self._pages = OrderedDict()
+
+        row = self._conn.execute(
+            'SELECT page_index, link_cursor FROM checkpoints WHERE task_id = ?', (task_id,)
+        ).fetchone()
+        self.page_index, self.link_cursor = row if row else (0, 0)
+        self._completed = {url for (url,) in self._conn.execute(
+            'SELECT url FROM checkpoint_urls WHERE task_id = ?', (task_id,)
+        )}
+
+    @property
+    def completed_count(self):
+        """已完成的子链接数量"""
+        return len(self._completed)
+
+    def is_completed(self, url):
+        """子链接是否已在之前的运行中完成"""
+        return bool(url) and canonical_url(url) in self._completed
+
+    def begin_page(self, page_index, urls):
+        """
+        登记开始处理的列表页
+        :param page_index: 页序号（从0开始）
+        :param urls: 该页子链接的URL列表（按处理顺序）
+        """
+        keys = [canonical_url(url) if url else None for url in urls]
+        with self._lock:
+            self._pages[page_index] = (keys, [not key or key in self._completed for key in keys])
+            self._advance()
+
+    def complete(self, url):
+        """
+        标记子链接已完成（只在下载成功或增量跳过时调用，失败的子链接不标记，续爬时重试），并按间隔定期保存
+        :param url: 子链接URL
+        """
+        key = canonical_url(url) if url else None
+        with self._lock:
+            if key and key not in self._completed:
+                self._completed.add(key)
+                self._pending_urls.append(key)
+            for keys, done in self._pages.values():
+                index = next((i for i, k in enumerate(keys) if k == key and not done[i]), None)
+                if index is not None:
+                    done[index] = True
+                    break
+            self._advance()
+        self.save()
+
+    def _advance(self):
+        """前面的列表页全部完成后，把翻页位置推进到第一个还有未完成子链接的页（调用方持有锁）"""
+        while self._pages:
+            page_index, (keys, done) = next(iter(self._pages.items()))
+            cursor = 0
+            while cursor < len(done) and done[cursor]:
+                cursor += 1
+            if cursor < len(done):
+                self.page_index, self.link_cursor = page_index, cursor
+                return
+            self._pages.popitem(last=False)
+            self.page_index, self.link_cursor = page_index + 1, 0
+
+    def save(self, force=False):
+        """
+        保存断点（距离上次保存不足save_interval秒时跳过，force为True时立即保存）
+        :param force: 是否立即保存
+        """
+        with self._lock:
+            if self._finished or (not force and time.time() - self._last_save < self.save_interval):
+                return
+            urls = self._pending_urls
+            self._pending_urls = []
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO checkpoint_urls (task_id, url) VALUES (?, ?)',
+                    [(self.task_id, url) for url in urls]
+                )
+                self._conn.execute('''
+                    INSERT OR REPLACE INTO checkpoints (task_id, page_index, link_cursor, completed, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (self.task_id, self.page_index, self.link_cursor, len(self._completed), time.time()))
+            self._last_save = time.time()
+
+    def clear(self):
+        """任务完整结束后删除断点，之后不再保存"""
+        with self._lock:
+            self._finished = True
+            self._pending_urls = []
+            with self._conn:
+                self._conn.execute('DELETE FROM checkpoints WHERE task_id = ?', (self.task_id,))
+                self._conn.execute('DELETE FROM checkpoint_urls WHERE task_id = ?', (self.task_id,))
+
+    def close(self):
+        self.save(force=True)
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,171 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+
+# 清单文件放在分类目录下的隐藏目录中，不会出现在文件列表和下载目录扫描里
+MANIFEST_DIR = '.crawl'
+MANIFEST_FILE = 'manifest.sqlite3'
+
+# 可记录的字段（url为主键）
+FIELDS = ('title', 'publish_date', 'etag', 'last_modified', 'content_hash', 'local_path')
+
+
+def canonical_url(url):
+    """
+    规范化URL作为清单主键：协议和主机小写、去掉默认端口和片段
+    查询参数保留原样（法规库详情页的文档ID在查询串中）
+    :param url: 原始URL
+    :return: 规范化后的URL
+    """
+    if not url:
+        return ''
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """
+    计算文件的SHA-256
+    :param file_path: 文件路径
+    :param chunk_size: 每次读取的字节数
+    :return: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CrawlManifest:
+    """
+    分类目录的持久化文档清单（SQLite），以规范化URL为键记录已下载的文档，
+    用于增量爬取时跳过未变化的记录
+    """
+
+    def __init__(self, db_path):
+        """
+        打开（必要时创建）清单数据库
+        :param db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    url TEXT PRIMARY KEY,
+                    title TEXT,
+                    publish_date TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    local_path TEXT,
+                    updated_at REAL
+                )
+            ''')
+            # 水位线：每个列表（以列表基础URL区分）上次成功爬取时最新的一条记录
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS watermarks (
+                    listing TEXT PRIMARY KEY,
+                    url TEXT,
+                    publish_date TEXT,
+                    updated_at REAL
+                )
+            ''')
+
+    @classmethod
+    def for_directory(cls, download_path):
+        """打开分类目录对应的清单"""
+        return cls(os.path.join(download_path, MANIFEST_DIR, MANIFEST_FILE))
+
+    def get(self, url):
+        """
+        查询文档记录
+        :param url: 文档URL
+        :return: 记录字典，不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM documents WHERE url = ?', (canonical_url(url),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def record(self, url, **fields):
+        """
+        新增或更新文档记录，未传入（或为None）的字段保留原值
+        :param url: 文档URL
+        :param fields: FIELDS中的字段
+        """
+        values = {key: fields.get(key) for key in FIELDS}
+        with self._lock, self._conn:
+            self._conn.execute('''
+                INSERT INTO documents (url, title, publish_date, etag, last_modified, content_hash, local_path, updated_at)
+                VALUES (:url, :title, :publish_date, :etag, :last_modified, :content_hash, :local_path, :updated_at)
+                ON CONFLICT(url) DO UPDATE SET
+                    title = COALESCE(excluded.title, title),
+                    publish_date = COALESCE(excluded.publish_date, publish_date),
+                    etag = COALESCE(excluded.etag, etag),
+                    last_modified = COALESCE(excluded.last_modified, last_modified),
+                    content_hash = COALESCE(excluded.content_hash, content_hash),
+                    local_path = COALESCE(excluded.local_path, local_path),
+                    updated_at = excluded.updated_at
+            ''', dict(values, url=canonical_url(url), updated_at=time.time()))
+
+    def is_unchanged(self, url, publish_date=None):
+        """
+        判断文档是否已下载且未变化：有记录、本地文件仍存在、发布日期一致（列表未提供日期时不比较）
+        :param url: 文档URL
+        :param publish_date: 列表页上的发布日期
+        :return: 是否可以跳过
+        """
+        entry = self.get(url)
+        if not entry or not entry.get('local_path') or not os.path.exists(entry['local_path']):
+            return False
+        if publish_date and entry.get('publish_date') and publish_date != entry['publish_date']:
+            return False
+        return True
+
+    def get_watermark(self, listing):
+        """
+        查询列表的水位线
+        :param listing: 列表基础URL
+        :return: {'url', 'publish_date'}，没有记录时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, publish_date FROM watermarks WHERE listing = ?', (canonical_url(listing),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def set_watermark(self, listing, url, publish_date=None):
+        """
+        更新列表的水位线
+        :param listing: 列表基础URL
+        :param url: 本次爬取时最新一条记录的URL
+        :param publish_date: 该记录的发布日期（可选）
+        """
+        with self._lock, self._conn:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO watermarks (listing, url, publish_date, updated_at)
+                VALUES (?, ?, ?, ?)
+            ''', (canonical_url(listing), canonical_url(url), publish_date, time.time()))
+
+    def count(self):
+        """清单中的记录数"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
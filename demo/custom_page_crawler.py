@@ -1,9 +1,7 @@
 from base_crawler import BaseCrawler
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
-import time
 import re
-import requests
 from urllib.parse import urljoin, urlparse
 import mimetypes
 import os
@@ -11,6 +9,9 @@ import os
 class CustomPageCrawler(BaseCrawler):
     """自定义页面爬虫 - 继承自BaseCrawler，专门处理附件下载"""
     
+    # 任意页面：出现链接即可开始分析附件
+    LISTING_READY = [(By.TAG_NAME, "a")]
+    
     def __init__(self, download_path="./自定义页面", logger=None, task_id=None, socketio=None, progress_callback=None):
         super().__init__(download_path, logger, task_id, socketio, progress_callback)
         self.crawler_type = 'custom_page'
@@ -29,8 +30,7 @@ class CustomPageCrawler(BaseCrawler):
         :return: 附件链接列表
         """
         self.log(f"正在分析页面附件: {main_url}")
-        self.driver.get(main_url)
-        time.sleep(3)
+        self.navigate(main_url, ready='listing')
         
         attachments = []
         
@@ -108,17 +108,22 @@ class CustomPageCrawler(BaseCrawler):
         return False
     
     def _find_download_buttons(self):
-        """查找页面中的下载按钮"""
+        """
+        查找页面中的下载按钮
+        子链接可能由其他线程的浏览器处理，只保存页面地址和定位信息（XPath和序号），不保存元素本身
+        """
         buttons = []
         
         # 查找包含下载相关文字的按钮或链接
         download_keywords = ['下载', 'download', '附件', '文件', 'attachment']
         
         try:
+            page_url = self.driver.current_url
             # 查找按钮元素
             for keyword in download_keywords:
-                elements = self.driver.find_elements(By.XPATH, f"//*[contains(text(), '{keyword}')]")
-                for element in elements:
+                xpath = f"//*[contains(text(), '{keyword}')]"
+                elements = self.driver.find_elements(By.XPATH, xpath)
+                for index, element in enumerate(elements):
                     try:
                         # 检查是否可点击
                         if element.is_enabled() and element.is_displayed():
@@ -128,7 +133,8 @@ class CustomPageCrawler(BaseCrawler):
                             if onclick or href:
                                 title = element.text.strip() or f"下载按钮_{len(buttons)+1}"
                                 buttons.append({
-                                    'element': element,
+                                    'page_url': page_url,
+                                    'locator': (xpath, index),
                                     'title': title,
                                     'type': 'button',
                                     'onclick': onclick,
@@ -190,11 +196,24 @@ class CustomPageCrawler(BaseCrawler):
             if attachment_type == 'link' or attachment_type == 'embedded':
                 # 直接URL下载
                 url = attachment_info['url']
-                return self._download_from_url(url, title)
+                succeeded = self._download_from_url(url, title)
                 
             elif attachment_type == 'button':
                 # 按钮点击下载
-                return self._download_from_button(attachment_info)
+                succeeded = self._download_from_button(attachment_info)
+            
+            else:
+                return False
+            
+            # 下载方法失败时只返回False，这里计入失败统计，该附件不会写入清单和断点，下次运行重试
+            if not succeeded:
+                self.stats['failed_downloads'] += 1
+                self.stats['failed_links'].append({
+                    'title': title,
+                    'url': attachment_info.get('url', ''),
+                    'error': '下载失败'
+                })
+            return succeeded
                 
         except Exception as e:
             self.log(f"下载附件 '{title}' 时出错: {str(e)}", 'error')
@@ -216,7 +235,10 @@ class CustomPageCrawler(BaseCrawler):
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            response = requests.get(url, headers=headers, stream=True, timeout=30)
+            response, cached_path = self.conditional_get(url, headers=headers, stream=True, timeout=30)
+            if cached_path:
+                self.stats['total_documents'] += 1
+                return True
             response.raise_for_status()
             
             # 增加附件计数器
@@ -229,12 +251,10 @@ class CustomPageCrawler(BaseCrawler):
             # 保存文件
             file_path = os.path.join(self.download_path, filename)
             
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            file_size, digest = self.download_to_file(url, file_path, headers=headers, response=response)
+            digest = self.on_file_saved(file_path, digest)
+            self.remember_validators(url, response, file_path, digest)
             
-            file_size = os.path.getsize(file_path)
             self.log(f"下载完成: {filename} ({file_size} bytes)")
             
             self.stats['successful_downloads'] += 1
@@ -246,11 +266,26 @@ class CustomPageCrawler(BaseCrawler):
             self.log(f"URL下载失败 '{title}': {str(e)}", 'error')
             return False
     
+    def _locate_button(self, button_info):
+        """
+        在当前线程的浏览器中重新定位下载按钮（必要时先打开按钮所在的页面）
+        :param button_info: 按钮信息字典
+        :return: 按钮元素
+        """
+        page_url = button_info.get('page_url')
+        if page_url and self.driver.current_url != page_url:
+            self.navigate(page_url, ready='listing')
+        xpath, index = button_info['locator']
+        elements = self.driver.find_elements(By.XPATH, xpath)
+        if index >= len(elements):
+            raise RuntimeError(f"页面中已找不到下载按钮: {button_info.get('title', '')}")
+        return elements[index]
+    
     def _download_from_button(self, button_info):
         """通过点击按钮下载文件"""
         try:
-            element = button_info['element']
             title = button_info['title']
+            element = self._locate_button(button_info)
             
             self.log(f"尝试点击下载按钮: {title}")
             
@@ -262,51 +297,44 @@ class CustomPageCrawler(BaseCrawler):
             
             # 点击按钮
             self.driver.execute_script("arguments[0].click();", element)
-            time.sleep(2)
             
             # 等待下载完成
-            if self.wait_for_download_complete(timeout=30):
-                # 检查新文件
-                files_after = self.get_files_in_directory()
-                new_files = files_after - files_before
+            new_files = self.wait_for_download_complete(files_before, timeout=30)
+            if new_files:
+                new_file = new_files[0]['name']
                 
-                if new_files:
-                    new_file = list(new_files)[0]
-                    
-                    # 重命名下载的文件，使用更清晰的命名
-                    old_file_path = os.path.join(self.download_path, new_file)
-                    
-                    # 清理title
-                    clean_title = re.sub(r'[^\w\s\-\u4e00-\u9fff]', '', title).strip()
-                    if not clean_title or clean_title == '未知附件':
-                        clean_title = '按钮下载'
-                    
-                    # 限制文件名长度
-                    if len(clean_title) > 50:
-                        clean_title = clean_title[:50]
-                    
-                    # 获取原文件扩展名
-                    original_ext = os.path.splitext(new_file)[1]
-                    
-                    # 构建新文件名
-                    new_filename = f"附件{self.attachment_counter:02d}_{clean_title}_{new_file}"
-                    new_file_path = os.path.join(self.download_path, new_filename)
-                    
-                    # 重命名文件
-                    try:
-                        os.rename(old_file_path, new_file_path)
-                        self.log(f"按钮下载完成并重命名: {new_filename}")
-                    except Exception as rename_error:
-                        self.log(f"重命名文件失败，保持原名: {new_file} - {str(rename_error)}", 'warning')
-                    
-                    self.stats['successful_downloads'] += 1
-                    self.stats['total_documents'] += 1
-                    return True
-                else:
-                    self.log(f"未检测到新下载的文件: {title}", 'warning')
-                    return False
+                # 重命名下载的文件，使用更清晰的命名
+                old_file_path = new_files[0]['path']
+                
+                # 清理title
+                clean_title = re.sub(r'[^\w\s\-\u4e00-\u9fff]', '', title).strip()
+                if not clean_title or clean_title == '未知附件':
+                    clean_title = '按钮下载'
+                
+                # 限制文件名长度
+                if len(clean_title) > 50:
+                    clean_title = clean_title[:50]
+                
+                # 获取原文件扩展名
+                original_ext = os.path.splitext(new_file)[1]
+                
+                # 构建新文件名
+                new_filename = f"附件{self.attachment_counter:02d}_{clean_title}_{new_file}"
+                new_file_path = os.path.join(self.download_path, new_filename)
+                
+                # 重命名文件
+                try:
+                    os.replace(old_file_path, new_file_path)
+                    self.on_file_saved(new_file_path)
+                    self.log(f"按钮下载完成并重命名: {new_filename}")
+                except Exception as rename_error:
+                    self.log(f"重命名文件失败，保持原名: {new_file} - {str(rename_error)}", 'warning')
+                
+                self.stats['successful_downloads'] += 1
+                self.stats['total_documents'] += 1
+                return True
             else:
-                self.log(f"下载超时: {title}", 'warning')
+                self.log(f"未检测到新下载的文件: {title}", 'warning')
                 return False
                 
         except Exception as e:
@@ -376,8 +404,7 @@ class CustomPageCrawler(BaseCrawler):
         self.is_stopped = True
         if self.driver:
             try:
-                self.driver.quit()
-                self.driver = None
-                self.log("浏览器驱动已关闭")
+                # 正在使用中的浏览器直接关闭（不放回驱动池），以中断当前操作
+                self.close_driver(discard=True)
             except Exception as e:
                 self.log(f"关闭浏览器驱动时出错: {str(e)}", 'warning') 
\ No newline at end of file
@@ -0,0 +1,189 @@
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+
+# 浏览器下载过程中使用的临时文件后缀
+TEMP_SUFFIXES = ('.crdownload', '.tmp', '.part')
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+_libc = None
+
+
+def _load_libc():
+    """加载提供inotify接口的libc，不支持时返回None"""
+    global _libc
+    if _libc is None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            libc.inotify_init1
+            libc.inotify_add_watch
+            _libc = libc
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+def is_temp_file(name):
+    """判断是否为下载中的临时文件"""
+    return name.lower().endswith(TEMP_SUFFIXES)
+
+
+def list_files(directory):
+    """
+    列出目录中的文件（一次scandir，不逐个调用isfile）
+    :param directory: 目录路径
+    :return: 文件名 -> os.DirEntry
+    """
+    entries = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_file():
+                    entries[entry.name] = entry
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+class _Inotify:
+    """对单个目录的inotify监听，只用于唤醒等待方，文件状态仍以stat结果为准"""
+
+    def __init__(self, directory):
+        libc = _load_libc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify不可用")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1失败")
+        # 不监听IN_MODIFY：下载过程中每写入一块都会触发，大小是否稳定由settle_time超时检查
+        mask = IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, "inotify_add_watch失败")
+
+    def wait(self, timeout):
+        """
+        等待目录事件
+        :param timeout: 最长等待时间（秒）
+        :return: 发生变化的文件名集合
+        """
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        names = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class DownloadWatcher:
+    """
+    下载目录监听器
+    优先使用inotify在目录变化时立即唤醒，不支持时退化为按间隔scandir；
+    新文件通过集合差集识别，临时文件（.crdownload等）改名为正式文件且大小稳定后视为下载完成
+    """
+
+    def __init__(self, directory, settle_time=0.5, poll_interval=0.5):
+        """
+        初始化监听器
+        :param directory: 下载目录
+        :param settle_time: 文件大小保持不变多久（秒）视为写入完成
+        :param poll_interval: 不支持inotify时的扫描间隔（秒）
+        """
+        self.directory = directory
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+
+    def wait_for_new_files(self, initial_names, timeout=30, should_stop=None):
+        """
+        等待目录中出现下载完成的新文件
+        :param initial_names: 下载前已存在的文件名集合
+        :param timeout: 超时时间（秒）
+        :param should_stop: 返回True时提前结束等待的函数（可选）
+        :return: 新文件信息列表 [{'name', 'path', 'size', 'mtime'}]
+        """
+        initial_names = set(initial_names)
+        deadline = time.monotonic() + timeout
+        try:
+            notifier = _Inotify(self.directory)
+        except OSError:
+            notifier = None
+
+        # 候选新文件：inotify模式下只在开始时完整扫描一次，之后由事件增量更新
+        candidates = list_files(self.directory).keys() - initial_names
+        # 文件名 -> (大小, 最近一次大小变化的时间)
+        sizes = {}
+        try:
+            while True:
+                now = time.monotonic()
+                pending = False
+                completed = []
+                for name in list(candidates):
+                    try:
+                        stat = os.stat(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        # 临时文件已改名为正式文件
+                        candidates.discard(name)
+                        sizes.pop(name, None)
+                        continue
+                    if is_temp_file(name):
+                        pending = True
+                        continue
+                    previous = sizes.get(name)
+                    if previous is None or previous[0] != stat.st_size:
+                        sizes[name] = (stat.st_size, now)
+                        pending = True
+                    elif now - previous[1] >= self.settle_time:
+                        completed.append({
+                            'name': name,
+                            'path': os.path.join(self.directory, name),
+                            'size': stat.st_size,
+                            'mtime': stat.st_mtime
+                        })
+                    else:
+                        pending = True
+
+                # 仍有临时文件或大小未稳定的文件时继续等待（超时则返回已完成的部分）
+                if completed and not pending:
+                    return completed
+                if now >= deadline or (should_stop and should_stop()):
+                    return completed
+
+                wait = min(self.settle_time if pending else self.poll_interval, deadline - now)
+                if notifier:
+                    candidates |= notifier.wait(wait) - initial_names
+                else:
+                    time.sleep(max(wait, 0))
+                    candidates = list_files(self.directory).keys() - initial_names
+        finally:
+            if notifier:
+                notifier.close()
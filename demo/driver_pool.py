@@ -0,0 +1,291 @@
+import time
+import json
+import atexit
+import threading
+import native_lock
+from selenium import webdriver
+
+
+class DriverPool:
+    """
+    进程级的Chrome浏览器驱动池
+    爬虫通过 acquire() 租用驱动、通过 release() 归还驱动，避免每个任务都冷启动一个浏览器
+    """
+
+    # 池满时检查空闲驱动的间隔（秒）：在锁外sleep，同一线程中的其他协程可以继续运行并归还驱动
+    WAIT_INTERVAL = 0.5
+
+    def __init__(self, max_size=4, idle_timeout=300, acquire_timeout=None, logger=None):
+        """
+        初始化驱动池
+        :param max_size: 同时存在的浏览器数量上限（包括空闲和租用中的）
+        :param idle_timeout: 空闲驱动的最长保留时间（秒），超时后关闭
+        :param acquire_timeout: 租用驱动时的默认最长等待时间（秒），None表示一直等待
+        :param logger: 日志记录器（可选）
+        """
+        self.max_size = max(1, int(max_size))
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.logger = logger
+
+        # 驱动池由多个爬虫线程共享，使用原生锁；等待空闲驱动时在锁外轮询（见 acquire）
+        self._lock = native_lock.Lock()
+        self._idle = []  # [(driver, 归还时间)]，末尾为最近归还的驱动
+        self._leased = set()
+        self._fingerprints = {}  # driver -> 创建时的选项指纹，只有指纹相同的爬虫才复用
+        self._closed = False
+        self._reaper = None
+
+    def log(self, message, level='info'):
+        """记录日志信息"""
+        if self.logger:
+            self.logger.log(message, level)
+
+    @property
+    def size(self):
+        """当前池中浏览器总数"""
+        return len(self._idle) + len(self._leased)
+
+    def acquire(self, options, download_dir=None, timeout=None):
+        """
+        租用一个浏览器驱动：只复用以相同选项创建的空闲浏览器；池已满而空闲的都是其他选项时，
+        关闭其中最久未用的一个后按本次的选项新建
+        :param options: 新建浏览器时使用的Chrome选项
+        :param download_dir: 本次租用的下载目录
+        :param timeout: 等待空闲驱动的超时时间（秒），None表示使用池的默认值
+        :return: 浏览器驱动
+        """
+        if timeout is None:
+            timeout = self.acquire_timeout
+        deadline = time.time() + timeout if timeout is not None else None
+        fingerprint = options_fingerprint(options)
+        self.evict_idle()
+
+        while True:
+            driver = None
+            create = False
+            wait = None
+            evicted = None
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("浏览器驱动池已关闭")
+
+                # 优先复用最近归还的、选项相同的驱动
+                index = next((i for i in range(len(self._idle) - 1, -1, -1)
+                              if self._fingerprints.get(self._idle[i][0]) == fingerprint), None)
+                if index is not None:
+                    driver, _ = self._idle.pop(index)
+                    self._leased.add(driver)
+                elif self.size < self.max_size:
+                    create = True
+                elif self._idle:
+                    evicted, _ = self._idle.pop(0)
+                    self._fingerprints.pop(evicted, None)
+                    create = True
+                else:
+                    remaining = deadline - time.time() if deadline is not None else 5
+                    if remaining <= 0:
+                        raise TimeoutError(f"等待浏览器驱动超时（{timeout}秒，池上限 {self.max_size}）")
+                    wait = min(remaining, self.WAIT_INTERVAL)
+
+            if wait is not None:
+                time.sleep(wait)
+                continue
+            if evicted is not None:
+                self.log("驱动池已满，关闭一个其他选项的空闲浏览器")
+                self._quit(evicted)
+            if create:
+                driver = self._create_driver(options, fingerprint)
+            elif not self._is_healthy(driver):
+                self.log("驱动池中的浏览器已失效，丢弃并重试", 'warning')
+                self._discard(driver)
+                continue
+
+            try:
+                if download_dir:
+                    set_download_directory(driver, download_dir)
+            except Exception as e:
+                self.log(f"切换下载目录失败，丢弃该浏览器: {e}", 'warning')
+                self._discard(driver)
+                continue
+            return driver
+
+    def release(self, driver, discard=False):
+        """
+        归还浏览器驱动
+        :param driver: 租用的浏览器驱动
+        :param discard: 为True时直接关闭该浏览器，不再放回池中
+        """
+        with self._lock:
+            leased = driver in self._leased
+            idle = any(idle_driver is driver for idle_driver, _ in self._idle)
+        if not leased:
+            # 重复归还的驱动已在池中；不属于本池的驱动直接关闭，避免浏览器进程泄漏
+            if not idle:
+                self.log("归还的浏览器不属于驱动池，直接关闭", 'warning')
+                self._quit(driver)
+            return
+
+        if discard or self._closed or not self._reset(driver):
+            self._discard(driver)
+            return
+
+        with self._lock:
+            self._leased.discard(driver)
+            self._idle.append((driver, time.time()))
+
+    def evict_idle(self):
+        """关闭空闲时间超过 idle_timeout 的浏览器"""
+        if not self.idle_timeout:
+            return
+        now = time.time()
+        with self._lock:
+            expired = [driver for driver, released_at in self._idle if now - released_at > self.idle_timeout]
+            if not expired:
+                return
+            self._idle = [(driver, released_at) for driver, released_at in self._idle if driver not in expired]
+            for driver in expired:
+                self._fingerprints.pop(driver, None)
+        for driver in expired:
+            self._quit(driver)
+        self.log(f"驱动池关闭了 {len(expired)} 个空闲浏览器")
+
+    def shutdown(self):
+        """关闭池中所有浏览器"""
+        with self._lock:
+            self._closed = True
+            drivers = [driver for driver, _ in self._idle] + list(self._leased)
+            self._idle = []
+            self._leased = set()
+            self._fingerprints = {}
+        for driver in drivers:
+            self._quit(driver)
+
+    def _create_driver(self, options, fingerprint=None):
+        """新建浏览器（在锁外执行，名额已在 _leased 中预留）"""
+        placeholder = object()
+        with self._lock:
+            self._leased.add(placeholder)
+        try:
+            driver = webdriver.Chrome(options=options)
+        except Exception:
+            with self._lock:
+                self._leased.discard(placeholder)
+            raise
+        with self._lock:
+            self._leased.discard(placeholder)
+            self._leased.add(driver)
+            self._fingerprints[driver] = fingerprint
+        self.log(f"驱动池新建浏览器，当前数量: {self.size}/{self.max_size}")
+        self._ensure_reaper()
+        return driver
+
+    def _discard(self, driver):
+        """从池中移除并关闭浏览器"""
+        with self._lock:
+            self._leased.discard(driver)
+            self._fingerprints.pop(driver, None)
+        self._quit(driver)
+
+    def _ensure_reaper(self):
+        """启动后台线程定期回收空闲浏览器"""
+        if not self.idle_timeout or (self._reaper and self._reaper.is_alive()):
+            return
+        self._reaper = threading.Thread(target=self._reap_loop, name='driver-pool-reaper', daemon=True)
+        self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._closed:
+            time.sleep(max(self.idle_timeout / 2, 1))
+            try:
+                self.evict_idle()
+            except Exception as e:
+                self.log(f"回收空闲浏览器时出错: {e}", 'warning')
+
+    @staticmethod
+    def _is_healthy(driver):
+        """健康检查：浏览器进程和会话仍然可用"""
+        try:
+            driver.execute_script("return 1")
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver):
+        """归还前清理浏览器状态：关闭多余窗口、清除所有站点的Cookie并回到空白页"""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            # delete_all_cookies只删除当前页面所属域名的Cookie，必须在离开页面之前调用；
+            # CDP可以一次清除所有域名的Cookie
+            try:
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            except Exception:
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+def options_fingerprint(options):
+    """
+    Chrome选项的指纹（启动参数、实验选项、浏览器路径等），用于判断空闲浏览器能否复用
+    下载目录在每次租用时通过CDP切换，不计入指纹
+    :param options: Chrome选项
+    :return: 指纹字符串，options为None时返回None
+    """
+    if options is None:
+        return None
+    # 先序列化得到副本，to_capabilities 返回的字典与选项对象共用 prefs
+    capabilities = json.loads(json.dumps(options.to_capabilities(), default=str))
+    for value in capabilities.values():
+        if isinstance(value, dict) and isinstance(value.get('prefs'), dict):
+            value['prefs'].pop('download.default_directory', None)
+    return json.dumps(capabilities, sort_keys=True)
+
+
+def set_download_directory(driver, download_dir):
+    """
+    通过CDP切换浏览器的下载目录
+    :param driver: 浏览器驱动
+    :param download_dir: 下载目录（绝对路径）
+    """
+    driver.execute_cdp_cmd('Page.setDownloadBehavior', {
+        'behavior': 'allow',
+        'downloadPath': download_dir
+    })
+
+
+_pool = None
+_pool_lock = native_lock.Lock()
+
+
+def get_driver_pool(config=None):
+    """
+    获取进程级共享的驱动池（首次调用时根据CRAWLER_CONFIG创建）
+    :param config: 爬虫配置字典（CRAWLER_CONFIG），仅首次创建时使用
+    :return: DriverPool实例
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = config or {}
+            _pool = DriverPool(
+                max_size=config.get('driver_pool_size', 4),
+                idle_timeout=config.get('driver_idle_timeout', 300),
+                acquire_timeout=config.get('driver_acquire_timeout')
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -0,0 +1,266 @@
+import os
+import time
+import sqlite3
+import threading
+import native_lock
+from download_watcher import is_temp_file
+
+
+# 文件列表允许的排序字段
+SORT_FIELDS = ('mtime', 'name', 'size', 'type')
+
+
+class FileCatalog:
+    """
+    下载文件目录索引（SQLite）
+    爬虫保存文件时登记，后台按间隔对账扫描补上程序之外的新增、修改和删除；
+    文件列表接口直接分页查询索引，不再每次遍历下载目录。每次变化递增版本号，用作HTTP缓存的ETag
+    """
+
+    def __init__(self, db_path, roots=None, base_dir=None):
+        """
+        打开（必要时创建）文件索引
+        :param db_path: 数据库文件路径
+        :param roots: 下载目录 {分类名称: 目录路径}，对账扫描的范围
+        :param base_dir: 文件路径相对的基准目录，默认为当前工作目录
+        """
+        self.base_dir = os.path.abspath(base_dir or os.getcwd())
+        self.roots = {}
+        self.set_roots(roots or {})
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = native_lock.Lock()
+        self._watcher = None
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    name TEXT,
+                    type TEXT,
+                    size INTEGER,
+                    mtime REAL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_files_mtime ON files (mtime)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_files_type ON files (type, mtime)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_files_size ON files (size)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS catalog_version (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER)')
+            self._conn.execute('INSERT OR IGNORE INTO catalog_version (id, value) VALUES (1, 0)')
+
+    def set_roots(self, roots):
+        """
+        设置下载目录
+        :param roots: {分类名称: 目录路径}
+        """
+        self.roots = {label: os.path.abspath(path) for label, path in roots.items()}
+
+    def _relative(self, file_path):
+        """文件相对基准目录的路径（统一使用/分隔），不在基准目录下时返回None"""
+        rel_path = os.path.relpath(os.path.abspath(file_path), self.base_dir)
+        if rel_path.startswith('..'):
+            return None
+        return rel_path.replace('\\', '/')
+
+    def _type_for(self, abs_path):
+        """文件所属的分类：位于某个下载目录下时为该目录的分类名称，否则为所在目录名"""
+        for label, root in self.roots.items():
+            if abs_path.startswith(root + os.sep):
+                return label
+        return os.path.basename(os.path.dirname(abs_path))
+
+    def _bump_version(self):
+        """在当前写事务中递增版本号"""
+        self._conn.execute('UPDATE catalog_version SET value = value + 1 WHERE id = 1')
+
+    def add(self, file_path):
+        """
+        登记（或更新）一个文件
+        :param file_path: 文件路径
+        """
+        abs_path = os.path.abspath(file_path)
+        name = os.path.basename(abs_path)
+        rel_path = self._relative(abs_path)
+        if rel_path is None or name.startswith('.') or is_temp_file(name):
+            return
+        try:
+            stat = os.stat(abs_path)
+        except FileNotFoundError:
+            self.remove(abs_path)
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO files (path, name, type, size, mtime) VALUES (?, ?, ?, ?, ?)',
+                (rel_path, name, self._type_for(abs_path), stat.st_size, stat.st_mtime)
+            )
+            self._bump_version()
+
+    def remove(self, file_path):
+        """
+        移除文件记录
+        :param file_path: 文件路径
+        """
+        rel_path = self._relative(file_path)
+        if rel_path is None:
+            return
+        with self._lock, self._conn:
+            if self._conn.execute('DELETE FROM files WHERE path = ?', (rel_path,)).rowcount:
+                self._bump_version()
+
+    def _scan(self, root, label, found):
+        """递归扫描目录（跳过隐藏文件和目录），结果写入 found: 相对路径 -> (名称, 分类, 大小, 修改时间)"""
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    self._scan(entry.path, label, found)
+                elif entry.is_file() and not is_temp_file(entry.name):
+                    stat = entry.stat()
+                    rel_path = self._relative(entry.path)
+                    if rel_path is not None:
+                        found[rel_path] = (entry.name, label, stat.st_size, stat.st_mtime)
+            except OSError:
+                continue
+
+    def rescan(self):
+        """
+        对账扫描全部下载目录，补登新增和修改的文件、删除已不存在的记录
+        :return: (新增或修改的数量, 删除的数量)
+        """
+        found = {}
+        prefixes = []
+        for label, root in self.roots.items():
+            if os.path.isdir(root):
+                self._scan(root, label, found)
+            rel_root = self._relative(root)
+            if rel_root is not None:
+                prefixes.append(rel_root)
+
+        with self._lock:
+            existing = {}
+            for prefix in prefixes:
+                for row in self._conn.execute(
+                    'SELECT path, size, mtime FROM files WHERE path LIKE ? ESCAPE ?',
+                    (_escape_like(prefix) + '/%', '\\')
+                ):
+                    existing[row[0]] = (row[1], row[2])
+            changed = [
+                (path, name, label, size, mtime)
+                for path, (name, label, size, mtime) in found.items()
+                if existing.get(path) != (size, mtime)
+            ]
+            removed = [(path,) for path in existing if path not in found]
+            if changed or removed:
+                with self._conn:
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO files (path, name, type, size, mtime) VALUES (?, ?, ?, ?, ?)', changed
+                    )
+                    self._conn.executemany('DELETE FROM files WHERE path = ?', removed)
+                    self._bump_version()
+        return len(changed), len(removed)
+
+    def version(self):
+        """当前的索引版本号"""
+        with self._lock:
+            return self._conn.execute('SELECT value FROM catalog_version WHERE id = 1').fetchone()[0]
+
+    def query(self, directory=None, file_type=None, keyword=None, since=None, until=None,
+              min_size=None, max_size=None, sort='mtime', order='desc', limit=100, offset=0):
+        """
+        分页查询文件
+        :param directory: 只返回该目录（相对基准目录）下的文件（可选）
+        :param file_type: 分类名称（可选）
+        :param keyword: 文件名包含的关键字（可选）
+        :param since: 修改时间下限（时间戳，可选）
+        :param until: 修改时间上限（时间戳，可选）
+        :param min_size: 最小文件大小（字节，可选）
+        :param max_size: 最大文件大小（字节，可选）
+        :param sort: 排序字段（SORT_FIELDS之一）
+        :param order: asc 或 desc
+        :param limit: 每页数量
+        :param offset: 跳过的数量
+        :return: (文件字典列表 [{'name', 'path', 'size', 'mtime', 'type'}], 符合条件的总数)
+        """
+        conditions = []
+        params = []
+        if directory:
+            conditions.append('path LIKE ? ESCAPE ?')
+            params.extend([_escape_like(directory.strip('/')) + '/%', '\\'])
+        if file_type:
+            conditions.append('type = ?')
+            params.append(file_type)
+        if keyword:
+            conditions.append('name LIKE ? ESCAPE ?')
+            params.extend(['%' + _escape_like(keyword) + '%', '\\'])
+        for column, operator, value in (('mtime', '>=', since), ('mtime', '<=', until),
+                                        ('size', '>=', min_size), ('size', '<=', max_size)):
+            if value is not None:
+                conditions.append(f'{column} {operator} ?')
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        sort = sort if sort in SORT_FIELDS else 'mtime'
+        order = 'ASC' if str(order).lower() == 'asc' else 'DESC'
+
+        with self._lock:
+            total = self._conn.execute(f'SELECT COUNT(*) FROM files {where}', params).fetchone()[0]
+            rows = self._conn.execute(
+                f'SELECT path, name, type, size, mtime FROM files {where} ORDER BY {sort} {order}, path LIMIT ? OFFSET ?',
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def start(self, interval=60.0, executor=None, after_rescan=None):
+        """
+        启动后台对账线程（gevent猴子补丁下为协程），启动后立即扫描一次
+        :param interval: 对账扫描的间隔（秒）
+        :param executor: 执行扫描的函数（如在线程池中运行阻塞调用），默认直接调用
+        :param after_rescan: 每次扫描后调用的函数（同样通过executor执行，如清理文档存储中的孤立内容）
+        """
+        if self._watcher is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    changed, removed = executor(self.rescan) if executor else self.rescan()
+                    if changed or removed:
+                        print(f"文件索引已更新: {changed} 个新增或修改，{removed} 个删除")
+                    if after_rescan:
+                        executor(after_rescan) if executor else after_rescan()
+                except Exception as e:
+                    print(f"[ERROR] 文件索引对账扫描失败: {e}")
+                time.sleep(interval)
+
+        self._watcher = threading.Thread(target=run, daemon=True)
+        self._watcher.start()
+
+
+def _escape_like(text):
+    """转义LIKE模式中的特殊字符"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+_catalog = None
+_catalog_lock = native_lock.Lock()
+
+
+def get_file_catalog(config=None):
+    """
+    获取进程级共享的文件索引（首次调用时根据CRAWLER_CONFIG创建）
+    :param config: 爬虫配置字典（CRAWLER_CONFIG），仅首次创建时使用
+    :return: FileCatalog实例
+    """
+    global _catalog
+    config = config or {}
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = FileCatalog(config.get('file_catalog_db', './files.sqlite3'))
+        return _catalog
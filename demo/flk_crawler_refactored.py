@@ -2,7 +2,8 @@ import time
 import os
 import re
 import json
-import requests
+import math
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
@@ -15,6 +16,20 @@ class FlkCrawler(BaseCrawler):
     支持多种法规类型：宪法、法律、行政法规、监察法规、司法解释、地方性法规
     """
     
+    # 详情页由前端脚本渲染，出现下载入口即视为就绪
+    DOWNLOAD_SELECTORS = [
+        "//a[contains(text(), '下载')]",
+        "//button[contains(text(), '下载')]",
+        "//a[contains(@href, '.pdf')]",
+        "//a[contains(@class, 'download')]",
+        "//button[contains(@class, 'download')]",
+        "//input[@type='button' and contains(@value, '下载')]"
+    ]
+    DETAIL_READY = [(By.XPATH, selector) for selector in DOWNLOAD_SELECTORS]
+    
+    # 优先通过详情接口直接下载文件，只有接口失败时才打开浏览器
+    PRELOAD_DRIVER = False
+    
     # 法规类型配置
     FLK_TYPES = {
         'flk_xf': {
@@ -71,6 +86,12 @@ class FlkCrawler(BaseCrawler):
         # API配置
         self.base_api_url = "https://flk.npc.gov.cn/api/"
         self.base_url = "https://flk.npc.gov.cn/"
+        self.detail_api_url = "https://flk.npc.gov.cn/api/detail"
+        self.file_base_url = "https://wb.flk.npc.gov.cn"
+        
+        # 详情接口直接下载：按顺序选择第一个可用的文件格式
+        self.use_detail_api = self.crawler_config.get('flk_api_download', True)
+        self.document_formats = self.crawler_config.get('flk_document_formats', ['WORD', 'PDF'])
         
     def get_api_data(self, page_num):
         """
@@ -114,7 +135,7 @@ class FlkCrawler(BaseCrawler):
                 'Origin': 'https://flk.npc.gov.cn',
             }
             
-            response = requests.get(api_url, headers=headers, timeout=30)
+            response = self.http_get(api_url, headers=headers, timeout=30)
             response.raise_for_status()
             
             # 解析JSON数据
@@ -144,6 +165,7 @@ class FlkCrawler(BaseCrawler):
                 try:
                     # 从JSON数据中提取信息
                     title = item.get('title', '')
+                    doc_id = item.get('id', '')
                     url_suffix = item.get('url', '')
                     office = item.get('office', '')
                     publish_date = item.get('publish', '')
@@ -162,7 +184,12 @@ class FlkCrawler(BaseCrawler):
                         # 处理公布日期，删除时间部分
                         clean_publish_date = publish_date[:10] if publish_date else ''
                         
+                        # 详情页URL形如 detail2.html?<id>，接口未返回id时从URL中解析
+                        if not doc_id and '?' in full_url:
+                            doc_id = full_url.split('?', 1)[1]
+                        
                         link_info = {
+                            'id': doc_id,
                             'title': title,
                             'url': full_url,
                             'office': office,
@@ -184,56 +211,54 @@ class FlkCrawler(BaseCrawler):
         self.log(f"从API数据中提取到 {len(links)} 个链接")
         return links
     
-    def get_sub_links(self, main_url):
+    def get_sub_links(self, main_url, max_pages=None):
         """
         获取主页面的子链接（通过API）
+        第一页返回的totalSizes和size即可算出总页数，其余页面并发请求，结果按页码顺序合并
         :param main_url: 主页面URL（这里不使用，直接通过API获取）
+        :param max_pages: 最多请求的页数（任务的最大页数），None或0表示请求接口报告的全部页
         :return: 子链接列表
         """
         self.log(f"开始获取 {self.flk_config['name']} 的子链接")
-        all_links = []
-        page_num = 1
-        max_pages = 100  # 防止无限循环
         
-        while page_num <= max_pages:
-            if self.is_stopped:
-                self.log("爬取被停止")
-                break
-                
-            self.log(f"正在处理第 {page_num} 页")
-            
-            # 获取API数据
-            api_data = self.get_api_data(page_num)
-            
-            if not api_data:
-                self.log(f"第 {page_num} 页API请求失败，停止翻页")
-                break
-            
-            # 从API数据中提取链接
-            page_links = self.extract_links_from_api_data(api_data)
-            
-            if not page_links:
-                self.log(f"第 {page_num} 页未找到任何链接，停止翻页")
-                break
-            
-            all_links.extend(page_links)
-            self.log(f"第 {page_num} 页找到 {len(page_links)} 个链接")
-            
-            # 检查是否还有更多页面
-            result = api_data.get('result', {})
-            total_sizes = result.get('totalSizes', 0)
-            current_page = result.get('page', page_num)
-            size = result.get('size', 10)
-            
-            self.log(f"总数据量: {total_sizes}, 当前页: {current_page}, 每页大小: {size}")
-            
-            # 如果当前页的数据量小于每页大小，说明已经是最后一页
-            if len(page_links) < size:
-                self.log(f"第 {page_num} 页数据量不足，已到达最后一页")
-                break
+        first_page = self.get_api_data(1)
+        if not first_page:
+            self.log("第 1 页API请求失败，停止获取")
+            return []
+        
+        all_links = self.extract_links_from_api_data(first_page)
+        result = first_page.get('result', {})
+        total_sizes = int(result.get('totalSizes', 0) or 0)
+        size = int(result.get('size', 10) or 10)
+        reported_pages = max(1, math.ceil(total_sizes / size))
+        total_pages = min(max_pages, reported_pages) if max_pages else reported_pages
+        self.log(f"总数据量: {total_sizes}, 每页大小: {size}, 共 {reported_pages} 页")
+        if total_pages < reported_pages:
+            self.log(f"受最大页数限制只请求前 {total_pages} 页，"
+                     f"约 {total_sizes - total_pages * size} 条记录不会获取", 'warning')
+        
+        if total_pages > 1 and not self.is_stopped:
+            concurrency = max(1, int(self.crawler_config.get('flk_api_concurrency', 4)))
+            self.log(f"并发请求剩余 {total_pages - 1} 页（并发数: {concurrency}）")
             
-            page_num += 1
-            time.sleep(2)  # 避免请求过于频繁
+            def fetch_page(page_num):
+                if self.is_stopped:
+                    return page_num, None
+                return page_num, self.get_api_data(page_num)
+            
+            # map按提交顺序返回结果，合并后的链接顺序与逐页翻页一致
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for page_num, api_data in executor.map(fetch_page, range(2, total_pages + 1)):
+                    if not api_data:
+                        if not self.is_stopped:
+                            self.log(f"第 {page_num} 页API请求失败，跳过该页", 'warning')
+                        continue
+                    page_links = self.extract_links_from_api_data(api_data)
+                    all_links.extend(page_links)
+                    self.log(f"第 {page_num} 页找到 {len(page_links)} 个链接")
+        
+        if self.is_stopped:
+            self.log("爬取被停止")
         
         self.log(f"获取子链接完成！共找到 {len(all_links)} 个链接")
         self.stats['total_sub_links'] = len(all_links)
@@ -259,71 +284,6 @@ class FlkCrawler(BaseCrawler):
         
         return filename
     
-    def get_download_files(self):
-        """
-        获取下载目录中的所有文件信息
-        :return: 文件信息列表
-        """
-        files = []
-        if os.path.exists(self.download_path):
-            for filename in os.listdir(self.download_path):
-                file_path = os.path.join(self.download_path, filename)
-                if os.path.isfile(file_path):
-                    stat = os.stat(file_path)
-                    files.append({
-                        'name': filename,
-                        'path': file_path,
-                        'size': stat.st_size,
-                        'mtime': stat.st_mtime
-                    })
-        return files
-    
-    def wait_for_download_complete(self, initial_files, timeout=30):
-        """
-        等待下载完成
-        :param initial_files: 初始文件列表
-        :param timeout: 超时时间（秒）
-        :return: 新下载的文件列表
-        """
-        self.log("等待下载完成...")
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            if self.is_stopped:
-                return []
-                
-            current_files = self.get_download_files()
-            new_files = []
-            
-            # 查找新文件
-            for current_file in current_files:
-                is_new = True
-                for initial_file in initial_files:
-                    if current_file['name'] == initial_file['name']:
-                        is_new = False
-                        break
-                if is_new:
-                    new_files.append(current_file)
-            
-            # 检查是否有新文件且文件不再变化（下载完成）
-            if new_files:
-                self.log(f"检测到 {len(new_files)} 个新文件")
-                time.sleep(3)  # 等待文件稳定
-                stable_files = []
-                for new_file in new_files:
-                    # 检查文件是否下载完成（不是临时文件）
-                    if not new_file['name'].endswith('.crdownload') and not new_file['name'].endswith('.tmp'):
-                        stable_files.append(new_file)
-                        self.log(f"发现稳定文件: {new_file['name']}")
-                
-                if stable_files:
-                    return stable_files
-            
-            time.sleep(1)
-        
-        self.log(f"等待超时，未检测到新文件")
-        return []
-    
     def rename_downloaded_file(self, file_info, new_name):
         """
         重命名下载的文件
@@ -353,7 +313,8 @@ class FlkCrawler(BaseCrawler):
                 counter += 1
             
             # 重命名文件
-            os.rename(old_path, new_path)
+            os.replace(old_path, new_path)
+            self.on_file_saved(new_path)
             self.log(f"文件已重命名: {old_name} -> {new_filename}")
             return new_path
             
@@ -381,7 +342,9 @@ class FlkCrawler(BaseCrawler):
                 'Upgrade-Insecure-Requests': '1',
             }
             
-            response = requests.get(pdf_url, headers=headers, timeout=30)
+            response, cached_path = self.conditional_get(pdf_url, headers=headers, stream=True, timeout=30)
+            if cached_path:
+                return True
             response.raise_for_status()
             
             # 生成文件名
@@ -397,8 +360,9 @@ class FlkCrawler(BaseCrawler):
                 counter += 1
             
             # 保存文件
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+            _, digest = self.download_to_file(pdf_url, file_path, headers=headers, response=response)
+            digest = self.on_file_saved(file_path, digest)
+            self.remember_validators(pdf_url, response, file_path, digest)
             
             self.log(f"PDF文件下载成功: {filename}")
             return True
@@ -407,6 +371,75 @@ class FlkCrawler(BaseCrawler):
             self.log(f"直接下载PDF失败: {e}", 'error')
             return False
     
+    def get_document_url(self, sub_link_info):
+        """
+        通过详情接口获取文档文件的下载地址
+        :param sub_link_info: 子链接信息字典，需要包含id
+        :return: 文件下载URL，接口中没有可用文件时返回None
+        """
+        doc_id = sub_link_info.get('id')
+        if not doc_id:
+            return None
+        
+        headers = {
+            'Accept': 'application/json, text/plain, */*',
+            'Referer': sub_link_info.get('url') or self.flk_config['referer'],
+            'Origin': 'https://flk.npc.gov.cn',
+            'X-Requested-With': 'XMLHttpRequest'
+        }
+        response = self.http_request('POST', self.detail_api_url, data={'id': doc_id}, headers=headers, timeout=30)
+        response.raise_for_status()
+        
+        body = (response.json().get('result') or {}).get('body') or []
+        paths = {item.get('type', '').upper(): item.get('path') for item in body if item.get('path')}
+        for doc_format in self.document_formats:
+            path = paths.get(doc_format)
+            if path:
+                return path if path.startswith('http') else self.file_base_url + path
+        return None
+    
+    def download_document_via_api(self, sub_link_info):
+        """
+        不打开浏览器，通过详情接口解析文件地址并直接流式下载
+        :param sub_link_info: 子链接信息字典
+        :return: 是否下载成功
+        """
+        title = sub_link_info.get('title', '未知文档')
+        try:
+            file_url = self.get_document_url(sub_link_info)
+            if not file_url:
+                self.log("详情接口未返回可下载的文件", 'warning')
+                return False
+            
+            response, cached_path = self.conditional_get(file_url, headers={'Referer': self.base_url}, stream=True, timeout=30)
+            if cached_path:
+                return True
+            response.raise_for_status()
+            
+            # 生成文件名，扩展名取自文件地址
+            ext = os.path.splitext(file_url.split('?', 1)[0])[1] or '.pdf'
+            clean_title = self.clean_filename(title)
+            filename = f"{clean_title}{ext}"
+            file_path = os.path.join(self.download_path, filename)
+            
+            # 如果文件已存在，添加序号
+            counter = 1
+            while os.path.exists(file_path):
+                filename = f"{clean_title}_{counter}{ext}"
+                file_path = os.path.join(self.download_path, filename)
+                counter += 1
+            
+            _, digest = self.download_to_file(file_url, file_path, headers={'Referer': self.base_url}, response=response)
+            digest = self.on_file_saved(file_path, digest)
+            self.remember_validators(file_url, response, file_path, digest)
+            
+            self.log(f"通过接口下载成功: {filename}")
+            return True
+            
+        except Exception as e:
+            self.log(f"接口下载失败，改用浏览器: {e}", 'warning')
+            return False
+    
     def save_page_content(self, url, title):
         """
         保存页面内容为HTML文件
@@ -432,6 +465,7 @@ class FlkCrawler(BaseCrawler):
             # 保存页面内容
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(page_source)
+            self.on_file_saved(file_path)
             
             self.log(f"页面内容已保存: {filename}")
             return True
@@ -445,16 +479,7 @@ class FlkCrawler(BaseCrawler):
         尝试点击页面上的各种下载按钮
         :return: 是否成功点击
         """
-        download_selectors = [
-            "//a[contains(text(), '下载')]",
-            "//button[contains(text(), '下载')]",
-            "//a[contains(@href, '.pdf')]",
-            "//a[contains(@class, 'download')]",
-            "//button[contains(@class, 'download')]",
-            "//input[@type='button' and contains(@value, '下载')]"
-        ]
-        
-        for selector in download_selectors:
+        for selector in self.DOWNLOAD_SELECTORS:
             try:
                 elements = self.driver.find_elements(By.XPATH, selector)
                 if elements:
@@ -493,13 +518,22 @@ class FlkCrawler(BaseCrawler):
         
         self.log(f"正在处理: {title[:50]}{'...' if len(title) > 50 else ''}")
         
+        # 快速路径：通过详情接口直接下载
+        if self.use_detail_api and self.download_document_via_api(sub_link_info):
+            self.stats['successful_downloads'] += 1
+            self.log(f"已完成处理: {title[:30]}{'...' if len(title) > 30 else ''}")
+            return
+        
         try:
+            # 接口不可用时才租用浏览器
+            if not self.driver:
+                self.start_driver()
+            
             # 记录下载前的文件
-            initial_files = self.get_download_files()
+            initial_files = self.get_files_in_directory()
             
             # 访问详情页面
-            self.driver.get(url)
-            time.sleep(3)
+            self.navigate(url, ready='detail')
             
             download_success = False
             
@@ -574,24 +608,28 @@ class FlkCrawler(BaseCrawler):
         
         self.log(f"已完成处理: {title[:30]}{'...' if len(title) > 30 else ''}")
     
-    def crawl_all_pages(self, base_url, max_pages=10):
+    def crawl_all_pages(self, base_url, max_pages=10, concurrency=None):
         """
         爬取所有页面（通过API翻页）
         :param base_url: 基础URL（这里不使用，通过API获取数据）
         :param max_pages: 最大页面数，防止无限循环
+        :param concurrency: 并发下载的工作线程数，None表示使用self.concurrency，1表示逐个处理
         """
+        link_queue, workers = None, []
+        completed = False
         try:
             # 处理max_pages=0的情况（表示无限制）
             if max_pages == 0:
                 max_pages = 999999
                 self.log("设置为无限制页数模式")
             
-            if not self.driver:
-                self.start_driver()
+            if concurrency is None:
+                concurrency = self.concurrency
+            concurrency = max(1, int(concurrency or 1))
             
-            # 通过API获取所有子链接
+            # 通过API获取所有子链接（浏览器只在接口下载失败时按需启动）
             self.log(f"开始通过API获取 {self.flk_config['name']} 的数据...")
-            all_links = self.get_sub_links(base_url)
+            all_links = self.get_sub_links(base_url, max_pages)
             
             if not all_links:
                 self.log("未找到任何子链接", 'warning')
@@ -600,22 +638,36 @@ class FlkCrawler(BaseCrawler):
             self.total_sub_links_count = len(all_links)
             self.log(f"共找到 {self.total_sub_links_count} 个子链接，开始下载...")
             
-            # 逐个处理所有链接
+            # 接口一次返回全部记录，断点只需按已完成的记录跳过
+            self._resume_from_checkpoint()
+            if self.checkpoint:
+                self.checkpoint.begin_page(0, [link_info.get('url') for link_info in all_links])
+            
+            if concurrency > 1:
+                link_queue, workers = self._start_sub_link_workers(concurrency)
+            
+            # 逐个处理（或分发）所有链接；接口按公布日期倒序返回，增量模式下连续遇到已下载的记录即可停止
+            known_run = 0
             for i, link_info in enumerate(all_links, 1):
                 if self.is_stopped:
                     self.log("爬虫已停止", 'warning')
                     break
                 
-                self.log(f"\n{'='*50}")
-                self.log(f"进度: {i}/{len(all_links)}")
-                
-                # 更新进度
-                if not self.update_progress(i, len(all_links), link_info.get('title', '')):
-                    break
-                
-                self.download_from_sublink(link_info)
-                self.completed_sub_links_count += 1
-                time.sleep(2)  # 避免请求过于频繁
+                if self._skip_completed(link_info):
+                    continue
+                if self._skip_unchanged(link_info):
+                    known_run += 1
+                    if self.incremental_stop_after and known_run >= self.incremental_stop_after:
+                        self.log(f"连续 {known_run} 条记录已下载且未变化，跳过其余记录")
+                        break
+                    continue
+                known_run = 0
+                self._dispatch_sub_link(link_queue, link_info, f"{'='*50}\n进度: {i}/{len(all_links)} - ")
+            
+            if workers:
+                self._finish_sub_link_workers(link_queue, workers)
+                workers = []
+            completed = not self.is_stopped
             
             # 生成最终统计信息
             self.log(f"\n{'='*60}")
@@ -629,6 +681,9 @@ class FlkCrawler(BaseCrawler):
         except Exception as e:
             self.log(f"爬取过程中出错: {e}", 'error')
         finally:
+            if workers:
+                self._finish_sub_link_workers(link_queue, workers)
+            self._finish_checkpoint(completed)
             self.close_driver()
 
 
@@ -1,11 +1,13 @@
 from base_crawler import BaseCrawler
 from selenium.webdriver.common.by import By
-import time
 from selenium.webdriver.support import expected_conditions as EC
 
 class GzCrawler(BaseCrawler):
     """规章爬虫 - 继承自BaseCrawler"""
     
+    # 列表页就绪：文档表格已渲染
+    LISTING_READY = [(By.TAG_NAME, "table")]
+    
     def __init__(self, download_path="./规章", logger=None, task_id=None, socketio=None, progress_callback=None):
         super().__init__(download_path, logger, task_id, socketio, progress_callback)
         self.crawler_type = 'gz'
@@ -34,11 +36,7 @@ class GzCrawler(BaseCrawler):
         self.log(f"正在访问规章页面: {main_url}")
         
         # 直接访问iframe页面
-        self.driver.get(main_url)
-        
-        # 等待页面加载
-        self.log("等待页面加载...")
-        time.sleep(8)
+        self.navigate(main_url, ready='listing')
         
         documents = []
         
@@ -95,10 +93,10 @@ class GzCrawler(BaseCrawler):
                             download_url = download_element.get_attribute('href')
                             
                             if file_name and download_url:
+                                # 只保存链接地址，子链接可能由其他线程的浏览器下载，元素不能跨浏览器使用
                                 documents.append({
                                     'url': download_url,
                                     'title': file_name,
-                                    'download_element': download_element,
                                     'row_index': row_num
                                 })
                                 self.log(f"  成功找到文档: {file_name}")
@@ -145,9 +143,8 @@ class GzCrawler(BaseCrawler):
         
         try:
             # 直接访问下载链接
-            self.driver.get(download_url)
+            self.navigate(download_url)
             self.log("已访问下载链接")
-            time.sleep(8)  # 增加等待时间
             
             # 获取当前URL
             current_url = self.driver.current_url
@@ -0,0 +1,99 @@
+import requests
+import native_lock
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# 所有请求默认携带的请求头，调用方传入的headers会覆盖同名项
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': '*/*',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Connection': 'keep-alive'
+}
+
+
+def create_session(pool_connections=10, pool_maxsize=10, retries=3, backoff_factor=0.5, headers=None):
+    """
+    创建带连接池和重试策略的会话
+    :param pool_connections: 缓存连接池的主机数量
+    :param pool_maxsize: 每个主机保持的最大连接数
+    :param retries: 连接失败、读取失败和网关错误的最大重试次数
+    :param backoff_factor: 重试间隔的退避系数（第n次重试前等待 backoff_factor * 2^(n-1) 秒）
+    :param headers: 额外的默认请求头
+    :return: requests.Session
+    """
+    # 只对幂等请求重试；429交给限速器处理，不在这里重试
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+class ThreadSessions:
+    """
+    按真实线程划分的HTTP会话代理，属性访问转发给当前线程的会话
+    gevent的套接字绑定在创建它的线程的主循环上，不能跨线程使用；爬虫在线程池的真实线程中运行，
+    因此每个线程使用自己的会话，同一线程中的协程之间仍然复用keep-alive连接
+    """
+
+    def __init__(self, factory):
+        """
+        :param factory: 创建会话的函数
+        """
+        self._factory = factory
+        self._sessions = {}  # 真实线程ID -> requests.Session
+        self._lock = native_lock.Lock()
+
+    def session(self):
+        """当前线程的会话（首次使用时创建）"""
+        thread_id = native_lock.get_ident()
+        with self._lock:
+            session = self._sessions.get(thread_id)
+            if session is None:
+                session = self._sessions[thread_id] = self._factory()
+            return session
+
+    def __getattr__(self, name):
+        return getattr(self.session(), name)
+
+
+_session = None
+_session_lock = native_lock.Lock()
+
+
+def get_http_session(config=None):
+    """
+    获取进程级共享的HTTP会话（首次调用时根据CRAWLER_CONFIG创建）
+    同一主机的请求复用keep-alive连接，带重试策略和默认请求头；每个真实线程使用独立的连接池
+    :param config: 爬虫配置字典（CRAWLER_CONFIG），仅首次创建时使用
+    :return: ThreadSessions，用法与requests.Session相同
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            config = config or {}
+            _session = ThreadSessions(lambda: create_session(
+                pool_connections=config.get('http_pool_connections', 10),
+                pool_maxsize=config.get('http_pool_maxsize', 10),
+                retries=config.get('http_retries', 3),
+                backoff_factor=config.get('http_backoff_factor', 0.5),
+                headers=config.get('http_headers')
+            ))
+        return _session
@@ -6,6 +6,10 @@ import time
 class MemGovCrawler(BaseCrawler):
     """法律法规爬虫 - 继承自BaseCrawler"""
     
+    # 列表页就绪：指向法规库的链接已出现；详情页就绪：下载按钮已出现
+    LISTING_READY = [(By.XPATH, "//table//tbody//tr//td//a[contains(@href, 'flk.npc.gov.cn')]")]
+    DETAIL_READY = [(By.XPATH, "/html/body/div[6]/div/div")]
+    
     def __init__(self, download_path="./法律法规", logger=None, task_id=None, socketio=None, progress_callback=None):
         super().__init__(download_path, logger, task_id, socketio, progress_callback)
         self.crawler_type = 'memgov'
@@ -31,8 +35,7 @@ class MemGovCrawler(BaseCrawler):
         :return: 子链接列表
         """
         self.log(f"正在访问主页面: {main_url}")
-        self.driver.get(main_url)
-        time.sleep(3)
+        self.navigate(main_url, ready='listing')
         
         sub_links = []
         try:
@@ -78,8 +81,7 @@ class MemGovCrawler(BaseCrawler):
         self.stats['total_documents'] += 1
         
         try:
-            self.driver.get(url)
-            time.sleep(3)
+            self.navigate(url, ready='detail')
             
             # 点击下载按钮
             download_button = self.wait.until(
@@ -0,0 +1,22 @@
+# gevent猴子补丁会把 threading.Lock / RLock 换成协程锁，协程锁只能在同一个线程的协程之间使用。
+# 爬虫在线程池的真实线程中运行，与主循环或其他爬虫线程共享的对象（任务存储、调度器、日志管道、
+# 驱动池等）使用这里补丁之前的原生锁。原生锁等待时会阻塞整个线程，临界区内不能有切换协程的操作
+# （网络IO、sleep、emit等），否则同一线程中另一个协程再加锁时会卡住该线程
+try:
+    from gevent.monkey import get_original
+except ImportError:
+    get_original = None
+
+
+def _original(name):
+    """_thread 模块中未被补丁替换的对象（未安装gevent时即为标准库本身）"""
+    if get_original is None:
+        import _thread
+        return getattr(_thread, name)
+    return get_original('_thread', name)
+
+
+Lock = _original('allocate_lock')
+RLock = _original('RLock')
+# 真实线程ID（补丁后的 threading.get_ident 返回协程ID）
+get_ident = _original('get_ident')
@@ -10,6 +10,16 @@ import os
 class NormativeFileCrawler(BaseCrawler):
     """规范性文件爬虫 - 继承自BaseCrawler"""
     
+    # 正文区域选择器（详情页就绪条件与正文提取共用）
+    CONTENT_SELECTORS = [
+        "//div[@class='article-content']",
+        "//div[@class='pages_content']",
+        "//div[@id='content']",
+        "//div[contains(@class, 'article')]"
+    ]
+    LISTING_READY = [(By.XPATH, "//div[contains(@class, 'list-right')]//ul/li/a")]
+    DETAIL_READY = [(By.XPATH, selector) for selector in CONTENT_SELECTORS]
+    
     def __init__(self, download_path="./规范性文件", logger=None, task_id=None, socketio=None, progress_callback=None):
         super().__init__(download_path, logger, task_id, socketio, progress_callback)
         self.crawler_type = 'normative_file'
@@ -35,8 +45,7 @@ class NormativeFileCrawler(BaseCrawler):
         :return: 子链接列表
         """
         self.log(f"正在访问主页面: {main_url}")
-        self.driver.get(main_url)
-        time.sleep(3)
+        self.navigate(main_url, ready='listing')
         
         sub_links = []
         try:
@@ -66,14 +75,8 @@ class NormativeFileCrawler(BaseCrawler):
     def extract_text_content(self):
         """提取页面文本内容"""
         try:
-            selectors = [
-                "//div[@class='article-content']",
-                "//div[@class='pages_content']",
-                "//div[@id='content']",
-                "//div[contains(@class, 'article')]"
-            ]
             content_element = None
-            for selector in selectors:
+            for selector in self.CONTENT_SELECTORS:
                 try:
                     elements = self.driver.find_elements(By.XPATH, selector)
                     if elements:
@@ -112,11 +115,13 @@ class NormativeFileCrawler(BaseCrawler):
             filename = f"{clean_title}.docx"
             filepath = os.path.join(self.download_path, filename)
             
-            # 如果文件已存在，直接覆盖
+            # 如果文件已存在，直接覆盖（先删除，避免写穿与其他分类共享的硬链接）
             if os.path.exists(filepath):
                 self.log(f"文件已存在，将覆盖: {filename}")
+                os.remove(filepath)
             
             doc.save(filepath)
+            self.on_file_saved(filepath)
             self.log(f"docx文档保存成功: {filename}", "success")
             return True
         except Exception as e:
@@ -138,9 +143,7 @@ class NormativeFileCrawler(BaseCrawler):
         self.stats['total_documents'] += 1
         
         try:
-            self.driver.get(url)
-            self.wait.until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-            time.sleep(2) 
+            self.navigate(url, ready='detail')
             
             text_content = self.extract_text_content()
             
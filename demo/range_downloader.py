@@ -0,0 +1,242 @@
+import os
+import time
+import math
+import hashlib
+import threading
+import requests
+from crawl_manifest import file_sha256
+
+
+class IncompleteDownloadError(IOError):
+    """下载的字节数与服务器声明的长度不一致"""
+
+
+def content_length(response):
+    """
+    响应体的实际长度（字节）
+    :param response: requests响应对象
+    :return: 长度，经过压缩编码或无法确定时返回None
+    """
+    if response.headers.get('Content-Encoding', 'identity') != 'identity':
+        return None
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range:
+        total = content_range.rsplit('/', 1)[1].strip()
+        return int(total) if total.isdigit() else None
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def range_start(response):
+    """206响应中Content-Range的起始偏移，无法解析时返回None"""
+    content_range = response.headers.get('Content-Range', '')
+    try:
+        return int(content_range.split()[1].split('-')[0])
+    except (IndexError, ValueError):
+        return None
+
+
+class RangeDownloader:
+    """
+    可续传的文件下载器
+    先写入 .part 临时文件，连接中断时用Range请求从已接收的位置继续，校验长度后原子地移动到目标路径；
+    服务器支持Range且文件较大时可拆分为多个分段并行下载
+    """
+
+    def __init__(self, request, chunk_size=1024 * 1024, max_retries=3, timeout=30,
+                 segments=1, parallel_min_size=32 * 1024 * 1024, logger=None):
+        """
+        初始化下载器
+        :param request: 发送GET请求的函数 request(url, **kwargs)，如 BaseCrawler.http_get
+        :param chunk_size: 每次写入的块大小（字节）
+        :param max_retries: 连接中断后的最大续传次数
+        :param timeout: 单次请求的超时时间（秒）
+        :param segments: 大文件并行下载的分段数，1表示不分段
+        :param parallel_min_size: 启用分段下载的最小文件大小（字节）
+        :param logger: 日志记录器（可选）
+        """
+        self.request = request
+        self.chunk_size = max(8192, int(chunk_size))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.segments = max(1, int(segments))
+        self.parallel_min_size = parallel_min_size
+        self.logger = logger
+
+    def log(self, message, level='info'):
+        """记录日志信息"""
+        if self.logger:
+            self.logger.log(message, level)
+
+    def download(self, url, file_path, headers=None, response=None):
+        """
+        下载文件到指定路径
+        :param url: 文件URL
+        :param file_path: 目标文件路径
+        :param headers: 请求头
+        :param response: 已经发出的流式GET响应（可选，状态码须为200），下载从该响应继续
+        :return: (文件大小（字节）, SHA-256)
+        """
+        headers = dict(headers or {})
+        # 续传和长度校验都以原始字节为准，不接受压缩编码
+        headers['Accept-Encoding'] = 'identity'
+        part_path = file_path + '.part'
+
+        try:
+            if response is None:
+                response = self.request(url, headers=headers, stream=True, timeout=self.timeout)
+                response.raise_for_status()
+            total = content_length(response)
+
+            digest = None
+            if self._can_split(response, total):
+                response.close()
+                try:
+                    self._download_segments(url, part_path, headers, total)
+                except (requests.RequestException, IncompleteDownloadError) as e:
+                    self.log(f"分段下载失败，改为单连接下载: {e}", 'warning')
+                    digest = self._download_single(url, part_path, headers, None, total)
+            else:
+                digest = self._download_single(url, part_path, headers, response, total)
+
+            # 一次性顺序写入时摘要已在下载过程中算好，续传或分段下载时才需要重新读取文件
+            digest = digest or file_sha256(part_path)
+            os.replace(part_path, file_path)
+            return os.path.getsize(file_path), digest
+        except Exception:
+            if response is not None:
+                response.close()
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+    def _can_split(self, response, total):
+        """文件足够大且服务器声明支持Range时分段下载"""
+        return (self.segments > 1 and total is not None and total >= self.parallel_min_size
+                and response.headers.get('Accept-Ranges', '').lower() == 'bytes')
+
+    def _download_single(self, url, part_path, headers, response, total):
+        """
+        单连接下载，中断后用Range从已写入的位置续传
+        :param response: 首个响应，None表示需要先发起请求
+        :param total: 文件总长度，None表示无法校验
+        :return: 边写边算的SHA-256，发生过续传时返回None
+        """
+        # 续传时用If-Range保证文件在两次请求之间没有变化（弱ETag不能用于If-Range）
+        validator = None
+        resumable = True
+        hasher = hashlib.sha256()
+        offset = 0
+        attempt = 0
+        while True:
+            try:
+                if response is None:
+                    request_headers = dict(headers)
+                    if offset:
+                        request_headers['Range'] = f'bytes={offset}-'
+                        if validator:
+                            request_headers['If-Range'] = validator
+                    response = self.request(url, headers=request_headers, stream=True, timeout=self.timeout)
+                    if response.status_code == 206 and range_start(response) == offset:
+                        pass
+                    elif response.status_code == 200:
+                        # 服务器忽略了Range（或文件已变化），从头开始
+                        offset = 0
+                        hasher = hashlib.sha256()
+                    else:
+                        response.raise_for_status()
+                        raise IncompleteDownloadError(f"无法续传，状态码: {response.status_code}")
+                    total = content_length(response) if total is None else total
+                    if offset:
+                        hasher = None
+
+                # 压缩编码的响应体无法按原始字节续传，中断后只能从头下载
+                resumable = response.headers.get('Content-Encoding', 'identity') == 'identity'
+                if validator is None:
+                    etag = response.headers.get('ETag', '')
+                    validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            offset += len(chunk)
+                            if hasher:
+                                hasher.update(chunk)
+                response.close()
+                response = None
+
+                if total is not None and offset != total:
+                    raise IncompleteDownloadError(f"文件不完整: {offset}/{total} 字节")
+                return hasher.hexdigest() if hasher else None
+            except (requests.RequestException, IncompleteDownloadError) as e:
+                if response is not None:
+                    response.close()
+                    response = None
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                offset = os.path.getsize(part_path) if resumable and os.path.exists(part_path) else 0
+                if not offset:
+                    hasher = hashlib.sha256()
+                self.log(f"下载中断（已接收 {offset} 字节），第 {attempt} 次续传: {e}", 'warning')
+                time.sleep(min(2 ** (attempt - 1), 10))
+
+    def _download_segments(self, url, part_path, headers, total):
+        """
+        将文件拆分为多个Range分段并行下载，写入预先分配好大小的临时文件
+        :param total: 文件总长度
+        """
+        segment_size = math.ceil(total / self.segments)
+        ranges = [(start, min(start + segment_size, total) - 1) for start in range(0, total, segment_size)]
+        self.log(f"分 {len(ranges)} 段并行下载（{total / 1024 / 1024:.1f} MB）")
+
+        with open(part_path, 'wb') as f:
+            f.truncate(total)
+
+        errors = []
+
+        def fetch(start, end):
+            try:
+                self._fetch_segment(url, part_path, headers, start, end)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=fetch, args=segment, daemon=True) for segment in ranges]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def _fetch_segment(self, url, part_path, headers, start, end):
+        """下载一个分段 [start, end]，中断后从该分段已写入的位置继续"""
+        position = start
+        attempt = 0
+        while position <= end:
+            response = None
+            try:
+                response = self.request(url, headers=dict(headers, Range=f'bytes={position}-{end}'),
+                                        stream=True, timeout=self.timeout)
+                if response.status_code != 206 or range_start(response) != position:
+                    raise IncompleteDownloadError(f"服务器不支持分段下载，状态码: {response.status_code}")
+                with open(part_path, 'r+b') as f:
+                    f.seek(position)
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            chunk = chunk[:end - position + 1]
+                            f.write(chunk)
+                            position += len(chunk)
+                            if position > end:
+                                break
+                if position <= end:
+                    raise IncompleteDownloadError(f"分段不完整: {position - start}/{end - start + 1} 字节")
+            except (requests.RequestException, IncompleteDownloadError):
+                attempt += 1
+                if attempt > self.max_retries or (response is not None and response.status_code != 206):
+                    raise
+                time.sleep(min(2 ** (attempt - 1), 10))
+            finally:
+                if response is not None:
+                    response.close()
@@ -0,0 +1,148 @@
+import time
+import native_lock
+from urllib.parse import urlparse
+
+
+# 未在CRAWLER_CONFIG['rate_limits']中配置的字段使用以下默认值
+DEFAULT_POLICY = {
+    'rate': 1.0,              # 初始速率（每秒请求数）
+    'min_rate': 0.1,          # 退避后的最低速率
+    'max_rate': 4.0,          # 恢复时的最高速率
+    'burst': 2,               # 令牌桶容量（允许的突发请求数）
+    'slow_threshold': 5.0,    # 响应时间超过该值（秒）视为慢响应
+    'increase_step': 0.1,     # 每次健康响应后增加的速率
+    'decrease_factor': 0.5,   # 出错（429/5xx/异常）时速率乘以该系数
+    'slow_factor': 0.8,       # 慢响应时速率乘以该系数
+    'error_cooldown': 5.0     # 429/5xx且无Retry-After时暂停该主机的时间（秒）
+}
+
+
+class TokenBucket:
+    """
+    单个主机的令牌桶，速率根据响应情况自适应调整（AIMD：健康时线性加速，异常时成倍降速）
+    """
+
+    def __init__(self, host, policy):
+        self.host = host
+        self.policy = policy
+        self.rate = float(policy['rate'])
+        self.capacity = max(1.0, float(policy['burst']))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = native_lock.Lock()
+
+    def reserve(self):
+        """
+        预约一个令牌
+        :return: 调用方在发送请求前需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            # 令牌允许透支，透支部分按当前速率折算为等待时间，多个线程排队时各自等待自己的份额
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def feedback(self, status=None, elapsed=None, error=False, retry_after=None):
+        """
+        根据响应结果调整速率
+        :param status: HTTP状态码（未知时为None）
+        :param elapsed: 响应耗时（秒）
+        :param error: 请求是否异常（超时、连接失败等）
+        :param retry_after: 服务器返回的Retry-After秒数
+        """
+        policy = self.policy
+        with self._lock:
+            if error or status == 429 or (status is not None and status >= 500):
+                self.rate = max(policy['min_rate'], self.rate * policy['decrease_factor'])
+                if status is not None:
+                    cooldown = retry_after if retry_after is not None else policy['error_cooldown']
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + cooldown)
+            elif elapsed is not None and elapsed > policy['slow_threshold']:
+                self.rate = max(policy['min_rate'], self.rate * policy['slow_factor'])
+            else:
+                self.rate = min(policy['max_rate'], self.rate + policy['increase_step'])
+
+
+class RateLimiter:
+    """
+    按主机划分的自适应限速器，所有HTTP请求和浏览器导航在发出前调用 acquire()，完成后调用 feedback()
+    """
+
+    def __init__(self, policies=None):
+        """
+        初始化限速器
+        :param policies: 主机 -> 策略字典，'default' 为所有主机的默认策略
+        """
+        policies = policies or {}
+        self.default_policy = dict(DEFAULT_POLICY, **policies.get('default', {}))
+        self.host_policies = {host: dict(self.default_policy, **policy)
+                              for host, policy in policies.items() if host != 'default'}
+        self._buckets = {}
+        self._lock = native_lock.Lock()
+
+    @staticmethod
+    def host_of(url):
+        """从URL中提取主机名"""
+        return (urlparse(url).hostname or '').lower()
+
+    def bucket(self, url):
+        """获取URL对应主机的令牌桶"""
+        host = self.host_of(url)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(host, self.host_policies.get(host, self.default_policy))
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url):
+        """
+        等待直到允许向URL所在主机发送请求
+        :param url: 请求URL
+        :return: 实际等待的秒数
+        """
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def feedback(self, url, status=None, elapsed=None, error=False, retry_after=None):
+        """反馈请求结果，参数含义见 TokenBucket.feedback"""
+        self.bucket(url).feedback(status=status, elapsed=elapsed, error=error, retry_after=retry_after)
+
+    def current_rate(self, url):
+        """URL所在主机当前的速率（每秒请求数）"""
+        return self.bucket(url).rate
+
+
+def parse_retry_after(value):
+    """
+    解析Retry-After响应头（只支持秒数格式）
+    :param value: 响应头的值
+    :return: 秒数，无法解析时返回None
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+_limiter = None
+_limiter_lock = native_lock.Lock()
+
+
+def get_rate_limiter(config=None):
+    """
+    获取进程级共享的限速器（首次调用时根据CRAWLER_CONFIG['rate_limits']创建）
+    :param config: 爬虫配置字典（CRAWLER_CONFIG），仅首次创建时使用
+    :return: RateLimiter实例
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter((config or {}).get('rate_limits'))
+        return _limiter
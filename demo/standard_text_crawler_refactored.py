@@ -7,6 +7,13 @@ import time
 class StandardTextCrawler(BaseCrawler):
     """标准文本爬虫 - 继承自BaseCrawler"""
     
+    # 列表页就绪：任一候选XPath匹配到链接（与get_sub_links中的查找顺序一致）
+    LISTING_READY = [
+        (By.XPATH, "//div[4]//div[5]//div[1]//div//ul/li/a"),
+        (By.XPATH, "//ul/li/a[contains(@href, '.shtml')]"),
+        (By.XPATH, "//a[contains(@href, 'fdzdgknr') or contains(@href, 'tzgg')]")
+    ]
+    
     def __init__(self, download_path="./标准/标准文本", logger=None, task_id=None, socketio=None, progress_callback=None):
         super().__init__(download_path, logger, task_id, socketio, progress_callback)
         self.crawler_type = 'standard_text'
@@ -20,8 +27,7 @@ class StandardTextCrawler(BaseCrawler):
         :return: 子链接列表
         """
         self.log(f"正在访问列表页面: {main_url}")
-        self.driver.get(main_url)
-        time.sleep(3)
+        self.navigate(main_url, ready='listing')
         
         sub_links = []
         try:
@@ -78,8 +84,7 @@ class StandardTextCrawler(BaseCrawler):
         self.stats['total_documents'] += 1
         
         try:
-            self.driver.get(url)
-            time.sleep(3)
+            self.navigate(url, ready='detail')
             
             # 方法1: 尝试直接下载页面内容（如果是PDF页面）
             current_url = self.driver.current_url
@@ -6,6 +6,13 @@ import time
 class SystemFileCrawler(BaseCrawler):
     """制度文件爬虫 - 继承自BaseCrawler"""
     
+    # 列表页就绪：任一候选XPath匹配到链接（与get_sub_links中的查找顺序一致）
+    LISTING_READY = [
+        (By.XPATH, "//div[4]//div[5]//div[1]//div//ul/li/a"),
+        (By.XPATH, "//ul/li/a[contains(@href, '.shtml')]"),
+        (By.XPATH, "//a[contains(@href, 'fdzdgknr') or contains(@href, 'tzgg')]")
+    ]
+    
     def __init__(self, download_path="./标准/制度文件", logger=None, task_id=None, socketio=None, progress_callback=None):
         super().__init__(download_path, logger, task_id, socketio, progress_callback)
         self.crawler_type = 'system_file'
@@ -19,8 +26,7 @@ class SystemFileCrawler(BaseCrawler):
         :return: 子链接列表
         """
         self.log(f"正在访问列表页面: {main_url}")
-        self.driver.get(main_url)
-        time.sleep(3)
+        self.navigate(main_url, ready='listing')
         
         sub_links = []
         try:
@@ -76,8 +82,7 @@ class SystemFileCrawler(BaseCrawler):
         documents_downloaded = 0
         
         try:
-            self.driver.get(url)
-            time.sleep(3)
+            self.navigate(url, ready='detail')
             
             # 在详情页面查找所有PDF附件链接
             pdf_selectors = [
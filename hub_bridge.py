@@ -0,0 +1,81 @@
+import collections
+import gevent
+from gevent.monkey import get_original
+
+# 猴子补丁后threading.get_ident返回协程ID，这里需要真实的线程ID
+_get_ident = get_original('_thread', 'get_ident')
+
+
+class HubBridge:
+    """
+    线程池中的工作线程与gevent主循环之间的桥
+    爬虫在真实线程中运行，不占用主循环；它们需要在主循环中完成的调用（Socket.IO事件、启动新任务等）
+    放入队列，由线程安全的async watcher唤醒主循环按顺序执行
+    """
+
+    def __init__(self, hub=None):
+        """
+        在主循环所在的线程中创建
+        :param hub: gevent hub，默认为当前线程的hub
+        """
+        self.hub = hub or gevent.get_hub()
+        self._thread_id = _get_ident()
+        self._calls = collections.deque()
+        self._watcher = self.hub.loop.async_()
+        self._watcher.start(self._drain)
+
+    def in_hub_thread(self):
+        """当前是否为主循环所在的线程"""
+        return _get_ident() == self._thread_id
+
+    def call(self, func, *args, **kwargs):
+        """
+        在主循环中执行调用，不等待结果；当前已在主循环线程中时直接执行
+        :param func: 要执行的函数
+        """
+        if self.in_hub_thread():
+            func(*args, **kwargs)
+            return
+        self._calls.append((func, args, kwargs))
+        self._watcher.send()
+
+    def _drain(self):
+        """async watcher回调：取出当前排队的调用，交给一个协程按顺序执行（回调中不能阻塞）"""
+        batch = []
+        while self._calls:
+            batch.append(self._calls.popleft())
+        if batch:
+            gevent.spawn(self._run_batch, batch)
+
+    @staticmethod
+    def _run_batch(batch):
+        for func, args, kwargs in batch:
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"[ERROR] 主循环执行 {getattr(func, '__name__', func)} 失败: {e}")
+
+
+class BridgedSocketIO:
+    """
+    供工作线程使用的SocketIO代理：emit经由HubBridge在主循环中发送，其余属性直接访问原对象
+    """
+
+    def __init__(self, socketio, bridge):
+        self._socketio = socketio
+        self._bridge = bridge
+
+    def emit(self, *args, **kwargs):
+        self._bridge.call(self._socketio.emit, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._socketio, name)
+
+
+def run_blocking(func, *args, **kwargs):
+    """
+    在hub的线程池中执行阻塞或CPU密集的调用（如压缩大量文件），当前协程等待结果，主循环照常处理其他请求
+    :param func: 要执行的函数
+    :return: 函数的返回值
+    """
+    return gevent.get_hub().threadpool.apply(func, args, kwargs)
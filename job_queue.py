@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import native_lock
+
+
+class JobQueue:
+    """
+    本地持久化的爬取任务队列（SQLite，与任务登记表共用数据库）
+    Web进程把任务写入队列，工作进程（python run.py --worker）领取并执行；
+    工作进程通过心跳声明任务仍在运行，心跳超时的任务重新排队，由其他工作进程从断点继续。
+    工作进程发出的Socket.IO事件写入事件表，由Web进程转发给前端
+    """
+
+    def __init__(self, db_path):
+        """
+        打开（必要时创建）队列表
+        :param db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = native_lock.Lock()
+        # 手动管理事务，领取任务时需要 BEGIN IMMEDIATE 保证多个进程不会领到同一个任务
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    task_id TEXT PRIMARY KEY,
+                    host TEXT,
+                    payload TEXT,
+                    priority INTEGER,
+                    status TEXT,
+                    worker TEXT,
+                    stop_requested INTEGER DEFAULT 0,
+                    enqueued_at REAL,
+                    heartbeat_at REAL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, priority, enqueued_at)')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS job_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event TEXT,
+                    data TEXT,
+                    room TEXT,
+                    created_at REAL
+                )
+            ''')
+
+    def enqueue(self, task_id, host, payload, priority=0):
+        """
+        加入队列（同一任务已在队列中时替换为新的排队记录）
+        :param task_id: 任务ID
+        :param host: 任务访问的来源主机（用于按主机限流）
+        :param payload: 任务参数字典
+        :param priority: 优先级，数值大的先领取
+        """
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO jobs (task_id, host, payload, priority, status, worker, stop_requested, enqueued_at, heartbeat_at)
+                VALUES (?, ?, ?, ?, 'pending', NULL, 0, ?, NULL)
+            ''', (task_id, host, json.dumps(payload, ensure_ascii=False), int(priority or 0), time.time()))
+
+    def claim(self, worker_id, host_limits=None):
+        """
+        领取下一个可运行的任务：按优先级和入队顺序，跳过运行中任务数已达上限的主机
+        :param worker_id: 工作进程标识
+        :param host_limits: 按主机的并发任务上限 {主机: 上限}，'default' 为未配置主机的上限
+        :return: {'task_id', 'host', 'payload'}，没有可领取的任务时返回None
+        """
+        host_limits = host_limits or {}
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                running = {row[0]: row[1] for row in self._conn.execute(
+                    "SELECT host, COUNT(*) FROM jobs WHERE status = 'claimed' GROUP BY host"
+                )}
+                job = None
+                for row in self._conn.execute(
+                    "SELECT task_id, host, payload FROM jobs WHERE status = 'pending' ORDER BY priority DESC, enqueued_at"
+                ):
+                    limit = host_limits.get(row['host'], host_limits.get('default'))
+                    if limit is None or running.get(row['host'], 0) < limit:
+                        job = row
+                        break
+                if job is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'claimed', worker = ?, heartbeat_at = ? WHERE task_id = ?",
+                        (worker_id, time.time(), job['task_id'])
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        if job is None:
+            return None
+        return {'task_id': job['task_id'], 'host': job['host'], 'payload': json.loads(job['payload'])}
+
+    def heartbeat(self, task_id, worker_id):
+        """
+        工作进程声明任务仍在运行
+        :param task_id: 任务ID
+        :param worker_id: 工作进程标识
+        :return: 任务是否仍由该工作进程执行（心跳超时后已被重新排队或由其他进程领取时为False）
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE task_id = ? AND worker = ? AND status = 'claimed'",
+                (time.time(), task_id, worker_id)
+            )
+        return cursor.rowcount > 0
+
+    def finish(self, task_id, worker_id):
+        """
+        任务执行结束，移出队列（只删除该工作进程领取的记录，不影响已被其他进程重新领取的任务）
+        :param task_id: 任务ID
+        :param worker_id: 工作进程标识
+        """
+        with self._lock:
+            self._conn.execute('DELETE FROM jobs WHERE task_id = ? AND worker = ?', (task_id, worker_id))
+
+    def cancel(self, task_id):
+        """
+        取消排队中（尚未被领取）的任务
+        :return: 是否已取消
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE task_id = ? AND status = 'pending'", (task_id,))
+        return cursor.rowcount > 0
+
+    def request_stop(self, task_id):
+        """
+        请求停止已被领取的任务，工作进程在下次心跳时处理
+        :return: 任务是否正在由工作进程执行
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET stop_requested = 1 WHERE task_id = ? AND status = 'claimed'", (task_id,)
+            )
+        return cursor.rowcount > 0
+
+    def stop_requested(self, task_id, worker_id):
+        """
+        工作进程是否应停止执行任务：任务被请求停止，或已不再由该工作进程领取
+        :param task_id: 任务ID
+        :param worker_id: 工作进程标识
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT stop_requested, worker, status FROM jobs WHERE task_id = ?', (task_id,)
+            ).fetchone()
+        return not row or bool(row['stop_requested']) or row['worker'] != worker_id or row['status'] != 'claimed'
+
+    def requeue_stale(self, timeout):
+        """
+        把心跳超时（工作进程已退出）的任务重新排队
+        :param timeout: 心跳超时时间（秒）
+        :return: 重新排队的任务ID列表
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                task_ids = [row[0] for row in self._conn.execute(
+                    "SELECT task_id FROM jobs WHERE status = 'claimed' AND heartbeat_at < ?", (time.time() - timeout,)
+                )]
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'pending', worker = NULL WHERE status = 'claimed' AND heartbeat_at < ?",
+                    (time.time() - timeout,)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return task_ids
+
+    def task_ids(self):
+        """队列中（排队或执行中）的全部任务ID"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT task_id FROM jobs')]
+
+    def position(self, task_id):
+        """
+        任务的排队位置
+        :return: 从1开始的位置，不在排队时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT priority, enqueued_at FROM jobs WHERE task_id = ? AND status = 'pending'", (task_id,)
+            ).fetchone()
+            if not row:
+                return None
+            ahead = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'pending' AND "
+                "(priority > ? OR (priority = ? AND enqueued_at < ?))",
+                (row[0], row[0], row[1])
+            ).fetchone()[0]
+        return ahead + 1
+
+    def stats(self):
+        """
+        队列状态
+        :return: {'running', 'queued', 'hosts': {主机: 执行中的任务数}}
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT status, host, COUNT(*) FROM jobs GROUP BY status, host').fetchall()
+        stats = {'running': 0, 'queued': 0, 'hosts': {}}
+        for status, host, count in rows:
+            if status == 'claimed':
+                stats['running'] += count
+                stats['hosts'][host] = count
+            else:
+                stats['queued'] += count
+        return stats
+
+    def push_events(self, events):
+        """
+        写入待转发的Socket.IO事件
+        :param events: [(事件名, 数据, 房间)]
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.executemany(
+                'INSERT INTO job_events (event, data, room, created_at) VALUES (?, ?, ?, ?)',
+                [(event, json.dumps(data, ensure_ascii=False, default=str), room, now) for event, data, room in events]
+            )
+            self._conn.execute('COMMIT')
+
+    def pop_events(self, limit=500):
+        """
+        取出并删除最早的一批待转发事件
+        :param limit: 最多取出的数量
+        :return: [(事件名, 数据, 房间)]
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, event, data, room FROM job_events ORDER BY id LIMIT ?', (limit,)
+            ).fetchall()
+            if rows:
+                self._conn.execute('DELETE FROM job_events WHERE id <= ?', (rows[-1]['id'],))
+        return [(row['event'], json.loads(row['data']), row['room']) for row in rows]
+
+
+class QueuedSocketIO:
+    """
+    工作进程中使用的SocketIO替身：emit的事件先缓存在内存中，定期批量写入事件表，由Web进程转发给前端
+    """
+
+    def __init__(self, job_queue, flush_interval=0.3):
+        """
+        :param job_queue: JobQueue实例
+        :param flush_interval: 批量写入的间隔（秒）
+        """
+        self.job_queue = job_queue
+        self.flush_interval = flush_interval
+        self._lock = native_lock.Lock()
+        self._buffer = []
+        self._flusher = None
+
+    def emit(self, event, data=None, room=None, **kwargs):
+        with self._lock:
+            self._buffer.append((event, data, room or kwargs.get('to')))
+
+    def flush(self):
+        """把缓存的事件写入事件表"""
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        if events:
+            self.job_queue.push_events(events)
+
+    def start(self):
+        """启动后台写入线程"""
+        if self._flusher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[ERROR] 写入待转发事件失败: {e}")
+
+        self._flusher = threading.Thread(target=run, daemon=True)
+        self._flusher.start()
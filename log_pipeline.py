@@ -0,0 +1,127 @@
+import os
+import time
+import threading
+from datetime import datetime
+import native_lock
+
+
+# 日志级别（前端使用 success 表示成功类消息，介于 info 和 warning 之间）
+LEVELS = {'debug': 10, 'info': 20, 'success': 25, 'warning': 30, 'error': 40}
+
+
+def level_value(level):
+    """级别名称转为数值，未知级别按info处理"""
+    return LEVELS.get(str(level).lower(), LEVELS['info'])
+
+
+class LogPipeline:
+    """
+    批量任务日志管道
+    日志先进入内存缓冲，后台线程按固定间隔批量输出：每个任务的日志文件一次写入并刷新，
+    同一任务的多条日志合并为一个 log_batch 事件发送到任务房间；
+    控制台、文件、Socket.IO三个输出各有独立的级别过滤，控制台输出可以关闭
+    """
+
+    def __init__(self, socketio, logs_dir, interval=0.2, console=True, console_level='info',
+                 file_level='info', socket_level='info', max_batch=500):
+        """
+        初始化日志管道
+        :param socketio: 发送 log_batch 事件的SocketIO（或兼容的代理对象）
+        :param logs_dir: 日志文件目录，每个任务一个 <task_id>.log
+        :param interval: 批量输出的间隔（秒）
+        :param console: 是否输出到控制台
+        :param console_level: 控制台输出的最低级别
+        :param file_level: 写入日志文件的最低级别
+        :param socket_level: 发送到前端的最低级别
+        :param max_batch: 单个 log_batch 事件包含的最多日志条数
+        """
+        self.socketio = socketio
+        self.logs_dir = logs_dir
+        self.interval = interval
+        self.console = console
+        self.console_level = level_value(console_level)
+        self.file_level = level_value(file_level)
+        self.socket_level = level_value(socket_level)
+        self.max_batch = max_batch
+        self._lock = native_lock.Lock()
+        self._flush_lock = native_lock.Lock()
+        self._file_buffers = {}  # task_id -> [日志行]
+        self._socket_buffers = {}  # task_id -> [日志数据]
+        self._files = {}  # task_id -> 打开的日志文件
+        self._flusher = None
+
+    def log(self, task_id, message, level='info', to_file=True):
+        """
+        记录一条任务日志（只写入缓冲，由后台线程批量输出）
+        :param task_id: 任务ID
+        :param message: 日志内容
+        :param level: 日志级别
+        :param to_file: 是否写入日志文件（日志器关闭后为False）
+        """
+        now = datetime.now()
+        value = level_value(level)
+        line = f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] [{str(level).upper()}] [Task: {task_id}] {message}"
+        if self.console and value >= self.console_level:
+            print(line)
+        with self._lock:
+            if to_file and value >= self.file_level:
+                self._file_buffers.setdefault(task_id, []).append(line)
+            if value >= self.socket_level:
+                self._socket_buffers.setdefault(task_id, []).append({
+                    'timestamp': now.strftime('%H:%M:%S'),  # 前端只显示时间
+                    'level': level,
+                    'message': str(message),
+                    'task_id': task_id
+                })
+
+    def flush(self):
+        """输出缓冲中的全部日志（发送事件可能切换协程，在锁外进行）"""
+        with self._flush_lock:
+            with self._lock:
+                files, self._file_buffers = self._file_buffers, {}
+                sockets, self._socket_buffers = self._socket_buffers, {}
+
+            for task_id, lines in files.items():
+                try:
+                    log_file = self._files.get(task_id)
+                    if log_file is None:
+                        log_file = open(os.path.join(self.logs_dir, f"{task_id}.log"), 'a', encoding='utf-8')
+                        self._files[task_id] = log_file
+                    log_file.write('\n'.join(lines) + '\n')
+                    log_file.flush()
+                except Exception as e:
+                    print(f"错误: 无法写入日志文件 {task_id}: {e}")
+
+        for task_id, logs in sockets.items():
+            for start in range(0, len(logs), self.max_batch):
+                try:
+                    self.socketio.emit('log_batch', {
+                        'task_id': task_id,
+                        'logs': logs[start:start + self.max_batch]
+                    }, room=task_id)
+                except Exception as e:
+                    print(f"错误: 无法发送任务日志 {task_id}: {e}")
+
+    def close_task(self, task_id):
+        """输出缓冲中的日志并关闭任务的日志文件"""
+        self.flush()
+        with self._flush_lock:
+            log_file = self._files.pop(task_id, None)
+        if log_file:
+            log_file.close()
+
+    def start(self):
+        """启动后台输出线程（gevent猴子补丁下为协程）"""
+        if self._flusher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"错误: 输出任务日志失败: {e}")
+
+        self._flusher = threading.Thread(target=run, daemon=True)
+        self._flusher.start()
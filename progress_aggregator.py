@@ -0,0 +1,107 @@
+import time
+import threading
+import collections
+import native_lock
+
+
+class ProgressAggregator:
+    """
+    任务进度汇总器
+    爬虫每完成一个链接都会上报进度，这里只保留每个任务的最新进度，
+    按固定间隔把这段时间内有变化的全部任务合并为一个 tasks_progress 事件发送到房间；
+    同时根据滑动窗口内的进度样本计算速率（篇/分钟）和预计剩余时间
+    """
+
+    def __init__(self, socketio, interval=1.0, window=60.0, room='global'):
+        """
+        初始化进度汇总器
+        :param socketio: 发送 tasks_progress 事件的SocketIO（或兼容的代理对象）
+        :param interval: 推送间隔（秒）
+        :param window: 计算速率的滑动窗口长度（秒）
+        :param room: 推送的房间（前端连接后加入全局房间接收所有任务更新）
+        """
+        self.socketio = socketio
+        self.interval = interval
+        self.window = window
+        self.room = room
+        self._lock = native_lock.Lock()
+        self._latest = {}  # task_id -> 最新进度
+        self._samples = {}  # task_id -> deque[(时间, 完成数)]
+        self._dirty = set()
+        self._finished = set()
+        self._flusher = None
+
+    def update(self, task_id, progress_data):
+        """
+        记录任务的最新进度（只更新内存，由后台线程合并推送）
+        :param task_id: 任务ID
+        :param progress_data: 进度字典 {'current', 'total', 'percentage', ...}
+        """
+        now = time.time()
+        with self._lock:
+            samples = self._samples.get(task_id)
+            if samples is None:
+                samples = self._samples[task_id] = collections.deque()
+            current = progress_data.get('current') or 0
+            # 完成数没有变化时不追加样本，停滞期间速率随时间自然下降
+            if not samples or samples[-1][1] != current:
+                samples.append((now, current))
+            while len(samples) > 2 and samples[0][0] < now - self.window:
+                samples.popleft()
+            self._latest[task_id] = dict(progress_data, task_id=task_id)
+            self._dirty.add(task_id)
+
+    def finish(self, task_id):
+        """任务结束：推送最后一次进度后不再跟踪"""
+        with self._lock:
+            self._finished.add(task_id)
+
+    def get(self, task_id):
+        """
+        任务的最新进度（含速率和预计剩余时间）
+        :return: 进度字典，没有记录时返回None
+        """
+        with self._lock:
+            return self._snapshot(task_id) if task_id in self._latest else None
+
+    def _snapshot(self, task_id):
+        """最新进度加上速率字段（调用方持有锁）"""
+        progress = dict(self._latest[task_id])
+        samples = self._samples.get(task_id)
+        rate = 0.0
+        if samples and len(samples) > 1:
+            elapsed = time.time() - samples[0][0]
+            if elapsed > 0:
+                rate = (samples[-1][1] - samples[0][1]) / elapsed
+        remaining = max((progress.get('total') or 0) - (progress.get('current') or 0), 0)
+        progress['docs_per_minute'] = round(rate * 60, 1)
+        progress['eta_seconds'] = int(remaining / rate) if rate > 0 and remaining else None
+        return progress
+
+    def flush(self):
+        """把有变化的任务进度合并为一个事件推送"""
+        with self._lock:
+            tasks = [self._snapshot(task_id) for task_id in self._dirty if task_id in self._latest]
+            self._dirty.clear()
+            for task_id in self._finished:
+                self._latest.pop(task_id, None)
+                self._samples.pop(task_id, None)
+            self._finished.clear()
+        if tasks:
+            self.socketio.emit('tasks_progress', {'tasks': tasks}, room=self.room)
+
+    def start(self):
+        """启动后台推送线程（gevent猴子补丁下为协程）"""
+        if self._flusher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[ERROR] 推送任务进度失败: {e}")
+
+        self._flusher = threading.Thread(target=run, daemon=True)
+        self._flusher.start()
@@ -3,11 +3,24 @@
 
 import os
 import sys
-from app import app, socketio
+import argparse
 from config import config
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='智能文档爬虫系统')
+    parser.add_argument('--worker', action='store_true', help='以爬虫工作进程模式运行，从任务队列领取任务执行')
+    parser.add_argument('--processes', type=int, default=None, help='工作进程数量（默认使用配置中的 worker_processes）')
+    args = parser.parse_args()
+    
+    if args.worker:
+        from worker import run_workers
+        run_workers(args.processes)
+        return
+    
+    # Web服务（导入app时执行gevent猴子补丁，工作进程模式下不在主进程中导入）
+    from app import app, socketio
+    
     # 设置环境
     env = os.environ.get('FLASK_ENV', 'development')
     app.config.from_object(config.get(env, config['default']))
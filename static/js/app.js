@@ -5,6 +5,7 @@ const socket = io();
 let allTasks = new Map(); // 存储所有任务
 let taskDetailModal = null;
 let currentDetailTaskId = null;
+let tasksVersion = 0; // 已应用的任务列表版本号（服务器增量推送）
 
 // 搜索功能相关变量
 let allSummariesData = [];
@@ -142,6 +143,7 @@ function initializeEventListeners() {
     crawlerForm.addEventListener('submit', handleAddTask);
     batchStopBtn.addEventListener('click', handleBatchStop);
     document.getElementById('refresh-files').addEventListener('click', () => loadFiles(currentDirPath));
+    document.getElementById('load-more-files').addEventListener('click', loadMoreFiles);
     document.getElementById('download-all').addEventListener('click', downloadAllFiles);
     // 爬虫类型变化处理由二级下拉菜单处理
     document.getElementById('logs-history-tab').addEventListener('shown.bs.tab', loadLogHistory);
@@ -172,16 +174,23 @@ socket.on('disconnect', function() {
 });
 
 socket.on('joined_global_room', function(data) {
-    loadAllTasks(); // 重新加载所有任务
-    
-    // 为所有正在运行的任务加入房间
-    setTimeout(() => {
-        allTasks.forEach(task => {
-            if (task.status === 'running' || task.status === 'starting') {
-                socket.emit('join_task_room', { task_id: task.task_id });
-            }
-        });
-    }, 1000); // 延迟1秒确保任务列表加载完成
+    // 订阅任务列表：先收到快照，之后只接收增量（重连后重新订阅获得新的快照）
+    socket.emit('subscribe_tasks');
+});
+
+socket.on('tasks_snapshot', function(data) {
+    applyTaskSnapshot(data);
+});
+
+socket.on('tasks_delta', function(data) {
+    if (data.version <= tasksVersion) {
+        return; // 快照已包含这些变化
+    }
+    if (data.from_version > tasksVersion) {
+        socket.emit('subscribe_tasks'); // 增量不连续，重新获取快照
+        return;
+    }
+    applyTaskDelta(data);
 });
 
 socket.on('joined_task_room', function(data) {
@@ -195,10 +204,8 @@ socket.on('task_status_change', function(data) {
         task.status = data.status;
         updateTaskStatus(data.task_id, data.status); // 更新单个任务的状态显示
         updateTasksStats(); // 更新统计数据
-    } else {
-        // 如果是新任务，重新加载所有任务
-        loadAllTasks();
     }
+    // 新任务由任务列表增量推送添加
     
     // 如果任务开始运行，确保加入房间
     if (data.status === 'running' && data.task_id) {
@@ -216,7 +223,15 @@ socket.on('task_status_change', function(data) {
 
 
 
-socket.on('log_message', function(data) {
+socket.on('log_message', handleLogMessage);
+
+// 服务器按固定间隔把同一任务的多条日志合并为一个批次发送
+socket.on('log_batch', function(data) {
+    (data.logs || []).forEach(handleLogMessage);
+});
+
+// 处理一条任务日志
+function handleLogMessage(data) {
     console.log(`[Task Log] ${data.timestamp || new Date().toLocaleTimeString()} [${data.level.toUpperCase()}] ${data.message}`);
     
     // 将日志存储到对应的任务中
@@ -242,9 +257,17 @@ socket.on('log_message', function(data) {
         document.getElementById('task-detail-modal').classList.contains('show')) {
         addLogToDetail(data.message, data.level, data.timestamp);
     }
+}
+
+socket.on('progress_update', handleProgressUpdate);
+
+// 服务器按固定间隔把所有有变化的任务进度合并为一个事件发送
+socket.on('tasks_progress', function(data) {
+    (data.tasks || []).forEach(handleProgressUpdate);
 });
 
-socket.on('progress_update', function(data) {
+// 处理一个任务的进度
+function handleProgressUpdate(data) {
     // 更新任务列表中的进度
     if (data.task_id) {
         updateTaskProgress(data.task_id, data);
@@ -253,7 +276,7 @@ socket.on('progress_update', function(data) {
     if (currentDetailTaskId && currentDetailTaskId === data.task_id && document.getElementById('task-detail-modal').classList.contains('show')) {
         updateDetailProgress(data);
     }
-});
+}
 
 
 
@@ -416,38 +439,83 @@ function handleBatchStop() {
 function loadAllTasks() {
     fetch('/api/get_all_tasks')
         .then(response => response.json())
-        .then(data => {
-            if (data.tasks) {
-                // 保存现有任务的日志
-                const existingLogs = new Map();
-                allTasks.forEach((task, taskId) => {
-                    if (task.logs) {
-                        existingLogs.set(taskId, task.logs);
-                    }
-                });
-                
-                allTasks.clear();
-                data.tasks.forEach(task => {
-                    // 恢复已存储的日志
-                    if (existingLogs.has(task.task_id)) {
-                        task.logs = existingLogs.get(task.task_id);
-                    }
-                    
-                    allTasks.set(task.task_id, task);
-                    // 对于正在运行的任务，自动加入房间以接收实时更新
-                    if (task.status === 'running' || task.status === 'starting') {
-                        socket.emit('join_task_room', { task_id: task.task_id });
-                    }
-                });
-                displayTasks();
-                updateTasksStats();
-            }
-        })
+        .then(applyTaskSnapshot)
         .catch(error => {
             console.error('加载任务列表时出错:', error);
         });
 }
 
+// 用快照替换任务列表
+function applyTaskSnapshot(data) {
+    if (!data.tasks) {
+        return;
+    }
+    // 保存现有任务的日志
+    const existingLogs = new Map();
+    allTasks.forEach((task, taskId) => {
+        if (task.logs) {
+            existingLogs.set(taskId, task.logs);
+        }
+    });
+    
+    allTasks.clear();
+    data.tasks.forEach(task => {
+        // 恢复已存储的日志
+        if (existingLogs.has(task.task_id)) {
+            task.logs = existingLogs.get(task.task_id);
+        }
+        upsertTask(task);
+    });
+    if (data.version !== undefined) {
+        tasksVersion = data.version;
+    }
+    displayTasks();
+    updateTasksStats();
+}
+
+// 应用任务列表增量：新建和删除的任务重新渲染列表，更新的任务只替换对应元素
+function applyTaskDelta(data) {
+    let needsRender = data.created.length > 0 || data.removed.length > 0;
+    if (data.created.length > 0) {
+        // 新建的任务排在最前面
+        const previous = allTasks;
+        allTasks = new Map();
+        data.created.forEach(upsertTask);
+        previous.forEach((task, taskId) => {
+            if (!allTasks.has(taskId)) {
+                allTasks.set(taskId, task);
+            }
+        });
+    }
+    data.updated.forEach(task => {
+        const existing = allTasks.get(task.task_id);
+        if (existing && existing.logs) {
+            task.logs = existing.logs;
+        }
+        upsertTask(task);
+        const taskElement = document.querySelector(`[data-task-id="${task.task_id}"]`);
+        if (taskElement) {
+            taskElement.replaceWith(createTaskElement(task));
+        } else {
+            needsRender = true;
+        }
+    });
+    data.removed.forEach(taskId => allTasks.delete(taskId));
+    tasksVersion = data.version;
+    if (needsRender) {
+        displayTasks();
+    }
+    updateTasksStats();
+}
+
+// 保存任务，对于正在运行的任务自动加入房间以接收实时更新
+function upsertTask(task) {
+    allTasks.set(task.task_id, task);
+    if (task.status === 'running' || task.status === 'starting' || task.status === 'queued') {
+        socket.emit('join_task_room', { task_id: task.task_id });
+    }
+}
+
 // 显示任务列表
 function displayTasks() {
     if (allTasks.size === 0) {
@@ -513,7 +581,17 @@ function createTaskElement(task) {
                         <i class="bi bi-stop-circle btn-icon-dark"></i> 停止
                     </button>
                 ` : ''}
-                ${task.status === 'completed' || task.status === 'error' ? `
+                ${task.status === 'queued' ? `
+                    <button class="btn btn-sm btn-outline-danger" onclick="stopTask('${task.task_id}')">
+                        <i class="bi bi-x-circle btn-icon-dark"></i> 取消排队${task.queue_position ? `（第 ${task.queue_position} 位）` : ''}
+                    </button>
+                ` : ''}
+                ${task.status === 'interrupted' || task.status === 'error' ? `
+                    <button class="btn btn-sm btn-outline-success me-1" onclick="resumeTask('${task.task_id}')">
+                        <i class="bi bi-play-circle btn-icon-dark"></i> 继续
+                    </button>
+                ` : ''}
+                ${task.status === 'completed' || task.status === 'error' || task.status === 'interrupted' || task.status === 'cancelled' ? `
                     <button class="btn btn-sm btn-outline-secondary" onclick="deleteTask('${task.task_id}')">
                         <i class="bi bi-trash btn-icon-dark"></i> 删除
                     </button>
@@ -532,7 +610,10 @@ function getStatusClass(status) {
         'running': 'bg-success',
         'completed': 'bg-secondary',
         'error': 'bg-danger',
-        'stopping': 'bg-warning'
+        'stopping': 'bg-warning',
+        'queued': 'bg-light text-dark',
+        'cancelled': 'bg-secondary',
+        'interrupted': 'bg-dark'
     };
     return statusClasses[status] || 'bg-secondary';
 }
@@ -544,7 +625,10 @@ function getStatusText(status) {
         'running': '运行中',
         'completed': '已完成',
         'error': '错误',
-        'stopping': '停止中'
+        'stopping': '停止中',
+        'queued': '排队中',
+        'cancelled': '已取消',
+        'interrupted': '已中断'
     };
     return statusTexts[status] || '未知';
 }
@@ -656,6 +740,29 @@ function stopTask(taskId) {
     });
 }
 
+// 从断点恢复任务
+function resumeTask(taskId) {
+    fetch('/api/resume_crawler', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ task_id: taskId })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showAlert('任务已从断点恢复', 'success');
+            socket.emit('join_task_room', { task_id: taskId });
+            loadAllTasks(); // 重新加载任务列表
+        } else {
+            showAlert(data.message || '恢复失败', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('恢复任务时出错:', error);
+        showAlert('恢复任务时发生网络错误', 'error');
+    });
+}
+
 // 删除任务
 function deleteTask(taskId) {
     if (!confirm('确定要删除这个任务吗？')) return;
@@ -756,8 +863,7 @@ function updateTaskStatus(taskId, status) {
 function updateTaskProgress(taskId, progressData) {
     const taskElement = document.querySelector(`[data-task-id="${taskId}"]`);
     if (!taskElement) {
-        // 如果找不到任务元素，重新加载任务列表
-        loadAllTasks();
+        // 任务尚未出现在列表中，由任务列表增量推送添加
         return;
     }
 
@@ -773,7 +879,7 @@ function updateTaskProgress(taskId, progressData) {
     }
     
     if (progressText) {
-        progressText.textContent = `${progressData.current}/${progressData.total} (${progressData.percentage.toFixed(1)}%)`;
+        progressText.textContent = `${progressData.current}/${progressData.total} (${progressData.percentage.toFixed(1)}%)` + formatProgressRate(progressData);
     }
     
     // 更新任务在内存中的进度数据
@@ -783,6 +889,19 @@ function updateTaskProgress(taskId, progressData) {
     }
 }
 
+// 速率和预计剩余时间（服务器根据最近一段时间的进度计算）
+function formatProgressRate(progressData) {
+    if (!progressData.docs_per_minute) {
+        return '';
+    }
+    let text = ` · ${progressData.docs_per_minute} 篇/分钟`;
+    if (progressData.eta_seconds) {
+        const minutes = Math.ceil(progressData.eta_seconds / 60);
+        text += minutes >= 60 ? ` · 约剩 ${Math.floor(minutes / 60)} 小时 ${minutes % 60} 分钟` : ` · 约剩 ${minutes} 分钟`;
+    }
+    return text;
+}
+
 // 更新详情Modal中的进度
 function updateDetailProgress(progressData) {
     document.getElementById('detail-progress-bar').style.width = `${progressData.percentage}%`;
@@ -801,23 +920,46 @@ function addLogToDetail(message, level = 'info', timestamp = null) {
     logContainer.scrollTop = logContainer.scrollHeight;
 }
 
-// 定期更新任务状态
-setInterval(loadAllTasks, 5000); // 每5秒更新一次
+// 任务列表由服务器推送增量（tasks_delta），不再定期轮询
 
 // 原有的文件管理功能保持不变
+// 文件列表分页状态（服务器按页返回，点击“加载更多”追加下一页）
+let filesState = { dir: '', page: 1, files: [] };
+
 function loadFiles(dirPath = '') {
     const refreshBtn = document.getElementById('refresh-files');
     const originalText = refreshBtn.innerHTML;
     refreshBtn.innerHTML = '<img src="/static/icons/arrow-clockwise.svg" class="btn-icon-dark me-1 rotating" alt="刷新"> 刷新中...';
     refreshBtn.disabled = true;
     
-    const url = dirPath ? `/api/get_files?dir=${encodeURIComponent(dirPath)}` : '/api/get_files';
-    fetch(url)
+    filesState = { dir: dirPath, page: 1, files: [] };
+    fetchFilesPage()
+        .finally(() => {
+            refreshBtn.innerHTML = originalText;
+            refreshBtn.disabled = false;
+        });
+}
+
+function loadMoreFiles() {
+    filesState.page += 1;
+    fetchFilesPage();
+}
+
+// 获取当前页的文件（服务器返回ETag，索引未变化时浏览器直接使用缓存）
+function fetchFilesPage() {
+    const params = new URLSearchParams({ page: filesState.page });
+    if (filesState.dir) {
+        params.set('dir', filesState.dir);
+    }
+    return fetch(`/api/get_files?${params.toString()}`)
         .then(response => response.json())
         .then(data => {
             if (data.files) {
-                displayFiles(data.files);
-                updateFilesCount(data.files.length);
+                filesState.files = filesState.files.concat(data.files);
+                displayFiles(filesState.files);
+                updateFilesCount(data.total);
+                document.getElementById('load-more-files').style.display =
+                    filesState.files.length < data.total ? 'inline-block' : 'none';
             } else if (data.error) {
                 showAlert(data.error, 'error');
             }
@@ -825,10 +967,6 @@ function loadFiles(dirPath = '') {
         .catch(error => {
             console.error('加载文件时出错:', error);
             showAlert('加载文件时发生网络错误', 'error');
-        })
-        .finally(() => {
-            refreshBtn.innerHTML = originalText;
-            refreshBtn.disabled = false;
         });
 }
 
@@ -0,0 +1,142 @@
+import heapq
+import itertools
+import threading
+import native_lock
+
+
+class TaskScheduler:
+    """
+    有界的全局任务调度器
+    同时运行的任务数不超过全局槽位数，同一来源主机的任务数不超过该主机的上限；
+    其余任务按优先级（数值大的优先）和提交顺序排队，槽位释放后自动启动。
+    某个主机已满时，排在后面的其他主机的任务可以先启动，不会被队首阻塞
+    """
+
+    def __init__(self, max_running=4, host_limits=None, spawn=None, logger=None):
+        """
+        初始化调度器
+        :param max_running: 全局槽位数（同时运行的任务数上限）
+        :param host_limits: 按主机的并发任务上限 {主机: 上限}，'default' 为未配置主机的上限，None表示不限制
+        :param spawn: 启动任务的函数 spawn(func, *args)，默认使用守护线程
+        :param logger: 日志输出函数 logger(message)（可选）
+        """
+        self.max_running = max(1, int(max_running))
+        self.host_limits = dict(host_limits or {})
+        self.spawn = spawn or self._spawn_thread
+        self.logger = logger
+        self._lock = native_lock.RLock()
+        self._queue = []  # 堆: (-优先级, 序号, 任务ID)
+        self._entries = {}  # 任务ID -> (主机, 函数, 参数)
+        self._running = {}  # 任务ID -> 主机
+        self._host_running = {}  # 主机 -> 运行中的任务数
+        self._counter = itertools.count()
+
+    @staticmethod
+    def _spawn_thread(func, *args):
+        threading.Thread(target=func, args=args, daemon=True).start()
+
+    def log(self, message):
+        if self.logger:
+            self.logger(message)
+
+    def host_limit(self, host):
+        """主机的并发任务上限，None表示不限制"""
+        return self.host_limits.get(host, self.host_limits.get('default'))
+
+    def submit(self, task_id, host, func, *args, priority=0):
+        """
+        提交任务：有空闲槽位时立即启动，否则进入队列
+        :param task_id: 任务ID
+        :param host: 任务访问的来源主机（用于按主机限流）
+        :param func: 任务函数
+        :param args: 任务函数的参数
+        :param priority: 优先级，数值大的先启动，相同优先级按提交顺序
+        :return: 是否已立即启动
+        """
+        with self._lock:
+            self._entries[task_id] = (host, func, args)
+            heapq.heappush(self._queue, (-int(priority or 0), next(self._counter), task_id))
+            self._dispatch()
+            return task_id in self._running
+
+    def cancel(self, task_id):
+        """
+        取消排队中的任务
+        :param task_id: 任务ID
+        :return: 是否已从队列中移除（任务已启动或不存在时返回False）
+        """
+        with self._lock:
+            if task_id not in self._entries:
+                return False
+            del self._entries[task_id]
+            self._queue = [item for item in self._queue if item[2] != task_id]
+            heapq.heapify(self._queue)
+            return True
+
+    def position(self, task_id):
+        """
+        任务在队列中的位置
+        :param task_id: 任务ID
+        :return: 从1开始的排队位置，不在队列中时返回None
+        """
+        with self._lock:
+            if task_id not in self._entries:
+                return None
+            ordered = sorted(item for item in self._queue if item[2] in self._entries)
+            for index, item in enumerate(ordered, 1):
+                if item[2] == task_id:
+                    return index
+        return None
+
+    def is_queued(self, task_id):
+        """任务是否在排队"""
+        with self._lock:
+            return task_id in self._entries
+
+    def stats(self):
+        """
+        调度器状态
+        :return: {'running', 'queued', 'max_running', 'hosts': {主机: 运行中的任务数}}
+        """
+        with self._lock:
+            return {
+                'running': len(self._running),
+                'queued': len(self._entries),
+                'max_running': self.max_running,
+                'hosts': {host: count for host, count in self._host_running.items() if count}
+            }
+
+    def _dispatch(self):
+        """按顺序启动可以运行的排队任务（调用方持有锁）"""
+        if len(self._running) >= self.max_running or not self._queue:
+            return
+        deferred = []
+        while self._queue and len(self._running) < self.max_running:
+            item = heapq.heappop(self._queue)
+            task_id = item[2]
+            entry = self._entries.get(task_id)
+            if entry is None:
+                continue  # 已取消
+            host = entry[0]
+            limit = self.host_limit(host)
+            if limit is not None and self._host_running.get(host, 0) >= limit:
+                deferred.append(item)
+                continue
+            del self._entries[task_id]
+            self._running[task_id] = host
+            self._host_running[host] = self._host_running.get(host, 0) + 1
+            self.log(f"启动任务 {task_id}（运行中 {len(self._running)}/{self.max_running}，排队 {len(self._entries)}）")
+            self.spawn(self._run, task_id, entry[1], entry[2])
+        for item in deferred:
+            heapq.heappush(self._queue, item)
+
+    def _run(self, task_id, func, args):
+        """运行任务，结束后释放槽位并启动下一个排队任务"""
+        try:
+            func(*args)
+        finally:
+            with self._lock:
+                host = self._running.pop(task_id, None)
+                if host in self._host_running:
+                    self._host_running[host] -= 1
+                self._dispatch()
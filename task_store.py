@@ -0,0 +1,312 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+import native_lock
+
+
+# 持久化的任务字段（logger、爬虫实例等运行期对象只保存在内存中）
+FIELDS = ('status', 'crawler_type', 'max_pages', 'page_url', 'concurrency',
+          'incremental', 'watermark', 'start_time', 'end_time', 'progress')
+
+# 进程退出时仍处于这些状态的任务，重启后标记为中断
+ACTIVE_STATUSES = ('queued', 'starting', 'running', 'stopping')
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _format_time(value):
+    """datetime转为可排序的文本"""
+    return value.strftime(TIME_FORMAT) if isinstance(value, datetime) else value
+
+
+def _parse_time(value):
+    """文本转回datetime"""
+    return datetime.strptime(value, TIME_FORMAT) if value else None
+
+
+class TaskStore:
+    """
+    持久化的任务登记表（SQLite）
+    运行中任务的热状态（进度等）保存在内存中，按固定间隔批量写回数据库（write-behind）；
+    状态变化立即写入。查询只读取数据库，再用内存中尚未写回的修改覆盖，因此查询结果总是最新的，
+    且不会触发写入。
+    每次写入分配一个单调递增的版本号（删除的任务留下墓碑记录），
+    客户端据此只获取某个版本之后新建、更新和删除的任务
+    """
+
+    def __init__(self, db_path, flush_interval=2.0):
+        """
+        打开（必要时创建）任务数据库
+        :param db_path: 数据库文件路径
+        :param flush_interval: 未保存修改写回数据库的间隔（秒）
+        """
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = native_lock.Lock()
+        # 等待写回的任务行: task_id -> 行字典
+        self._pending = {}
+        self._flusher = None
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    status TEXT,
+                    crawler_type TEXT,
+                    max_pages INTEGER,
+                    page_url TEXT,
+                    concurrency INTEGER,
+                    incremental INTEGER,
+                    watermark INTEGER,
+                    start_time TEXT,
+                    end_time TEXT,
+                    progress TEXT,
+                    updated_at REAL,
+                    version INTEGER DEFAULT 0,
+                    created_version INTEGER DEFAULT 0
+                )
+            ''')
+            # 旧版本创建的数据库没有版本字段
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(tasks)')}
+            for column in ('version', 'created_version'):
+                if column not in columns:
+                    self._conn.execute(f'ALTER TABLE tasks ADD COLUMN {column} INTEGER DEFAULT 0')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, start_time)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_start_time ON tasks (start_time)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_version ON tasks (version)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS task_version (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER)')
+            self._conn.execute('INSERT OR IGNORE INTO task_version (id, value) VALUES (1, 0)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS task_tombstones (task_id TEXT PRIMARY KEY, version INTEGER)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_tombstones_version ON task_tombstones (version)')
+
+    def save(self, task_id, task, immediate=False):
+        """
+        记录任务的最新状态
+        :param task_id: 任务ID
+        :param task: 任务字典（CRAWLER_TASKS中的条目），只保存FIELDS中的字段
+        :param immediate: 是否立即写入数据库（状态变化时使用），否则等待下次批量写回
+        """
+        row = {key: task.get(key) for key in FIELDS}
+        row['task_id'] = task_id
+        row['start_time'] = _format_time(row['start_time'])
+        row['end_time'] = _format_time(row['end_time'])
+        row['progress'] = json.dumps(row['progress'] or {}, ensure_ascii=False)
+        row['updated_at'] = time.time()
+        with self._lock:
+            self._pending[task_id] = row
+        if immediate:
+            self.flush()
+
+    def flush(self):
+        """把未保存的修改批量写入数据库"""
+        with self._lock:
+            if not self._pending:
+                return
+            rows = list(self._pending.values())
+            self._pending.clear()
+            with self._conn:
+                version = self._next_version()
+                for row in rows:
+                    row['version'] = version
+                self._conn.executemany('''
+                    INSERT INTO tasks (task_id, status, crawler_type, max_pages, page_url, concurrency, incremental,
+                                       watermark, start_time, end_time, progress, updated_at, version, created_version)
+                    VALUES (:task_id, :status, :crawler_type, :max_pages, :page_url, :concurrency, :incremental,
+                            :watermark, :start_time, :end_time, :progress, :updated_at, :version, :version)
+                    ON CONFLICT (task_id) DO UPDATE SET
+                        status = excluded.status, crawler_type = excluded.crawler_type, max_pages = excluded.max_pages,
+                        page_url = excluded.page_url, concurrency = excluded.concurrency,
+                        incremental = excluded.incremental, watermark = excluded.watermark,
+                        start_time = excluded.start_time, end_time = excluded.end_time, progress = excluded.progress,
+                        updated_at = excluded.updated_at, version = excluded.version
+                ''', rows)
+                self._conn.executemany('DELETE FROM task_tombstones WHERE task_id = ?', [(row['task_id'],) for row in rows])
+
+    def _next_version(self):
+        """在当前写事务中分配下一个版本号（多个进程写入时由SQLite的写锁保证递增）"""
+        self._conn.execute('UPDATE task_version SET value = value + 1 WHERE id = 1')
+        return self._conn.execute('SELECT value FROM task_version WHERE id = 1').fetchone()[0]
+
+    def start(self):
+        """启动后台写回线程（gevent猴子补丁下为协程）"""
+        if self._flusher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[ERROR] 写回任务状态失败: {e}")
+
+        self._flusher = threading.Thread(target=run, daemon=True)
+        self._flusher.start()
+
+    def get(self, task_id):
+        """
+        查询单个任务
+        :param task_id: 任务ID
+        :return: 任务字典（时间为datetime），不存在时返回None
+        """
+        with self._lock:
+            row = self._pending.get(task_id)
+            if row is None:
+                row = self._conn.execute('SELECT * FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+        return self._to_task(row) if row else None
+
+    def query(self, status=None, crawler_type=None, limit=50, offset=0):
+        """
+        分页查询任务，按开始时间倒序
+        :param status: 状态或状态列表（可选）
+        :param crawler_type: 爬虫类型（可选）
+        :param limit: 每页数量
+        :param offset: 跳过的数量
+        :return: (任务字典列表, 符合条件的总数)
+        """
+        statuses = ([status] if isinstance(status, str) else list(status)) if status else None
+        conditions = []
+        params = []
+        if statuses:
+            conditions.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if crawler_type:
+            conditions.append('crawler_type = ?')
+            params.append(crawler_type)
+
+        with self._lock:
+            pending = list(self._pending.values())
+            # 尚未写回的任务以内存中的状态为准：数据库中排除这些任务，再把符合条件的内存行合并进来
+            if pending:
+                conditions.append(f"task_id NOT IN ({', '.join('?' * len(pending))})")
+                params.extend(row['task_id'] for row in pending)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            total = self._conn.execute(f'SELECT COUNT(*) FROM tasks {where}', params).fetchone()[0]
+            matched = [
+                row for row in pending
+                if (not statuses or row['status'] in statuses) and (not crawler_type or row['crawler_type'] == crawler_type)
+            ]
+            # 内存行可能排在本页之前，数据库需要取到本页末尾才能正确合并
+            rows = self._conn.execute(
+                f'SELECT * FROM tasks {where} ORDER BY start_time DESC LIMIT ? OFFSET ?',
+                params + [limit + offset if matched else limit, 0 if matched else offset]
+            ).fetchall()
+        if matched:
+            rows = sorted(rows + matched, key=lambda row: row['start_time'] or '', reverse=True)[offset:offset + limit]
+        return [self._to_task(row) for row in rows], total + len(matched)
+
+    def version(self):
+        """当前的任务版本号（不包含尚未写回的修改）"""
+        with self._lock:
+            return self._conn.execute('SELECT value FROM task_version WHERE id = 1').fetchone()[0]
+
+    def changes_since(self, since):
+        """
+        查询某个版本之后发生变化的任务
+        :param since: 客户端已有的版本号
+        :return: (新建的任务列表, 更新的任务列表, 删除的任务ID列表, 当前版本号)
+        """
+        with self._lock:
+            # 先确定本次的版本上界，之后提交的修改留到下一次返回
+            version = self._conn.execute('SELECT value FROM task_version WHERE id = 1').fetchone()[0]
+            rows = self._conn.execute(
+                'SELECT * FROM tasks WHERE version > ? AND version <= ? ORDER BY start_time DESC', (since, version)
+            ).fetchall()
+            removed = [row[0] for row in self._conn.execute(
+                'SELECT task_id FROM task_tombstones WHERE version > ? AND version <= ?', (since, version)
+            )]
+        created, updated = [], []
+        for row in rows:
+            (created if row['created_version'] > since else updated).append(self._to_task(row))
+        return created, updated, removed, version
+
+    def count_by_status(self):
+        """
+        按状态统计任务数量
+        :return: {状态: 数量}
+        """
+        with self._lock:
+            pending = list(self._pending.values())
+            placeholders = ', '.join('?' * len(pending))
+            rows = self._conn.execute(
+                f'SELECT status, COUNT(*) FROM tasks WHERE task_id NOT IN ({placeholders}) GROUP BY status',
+                [row['task_id'] for row in pending]
+            ).fetchall()
+        counts = {row[0]: row[1] for row in rows}
+        for row in pending:
+            counts[row['status']] = counts.get(row['status'], 0) + 1
+        return counts
+
+    def set_status(self, task_id, status, finished=False):
+        """
+        直接更新数据库中任务的状态（用于不在当前进程内存中的任务，如工作进程执行的任务）
+        :param task_id: 任务ID
+        :param status: 新状态
+        :param finished: 是否同时记录结束时间
+        """
+        self.flush()
+        with self._lock, self._conn:
+            version = self._next_version()
+            if finished:
+                self._conn.execute(
+                    'UPDATE tasks SET status = ?, end_time = ?, updated_at = ?, version = ? WHERE task_id = ?',
+                    (status, _format_time(datetime.now()), time.time(), version, task_id)
+                )
+            else:
+                self._conn.execute(
+                    'UPDATE tasks SET status = ?, updated_at = ?, version = ? WHERE task_id = ?',
+                    (status, time.time(), version, task_id)
+                )
+
+    def delete(self, task_id):
+        """删除任务记录（留下墓碑，客户端增量更新时得知任务已删除）"""
+        with self._lock:
+            self._pending.pop(task_id, None)
+            with self._conn:
+                self._conn.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO task_tombstones (task_id, version) VALUES (?, ?)',
+                    (task_id, self._next_version())
+                )
+
+    def recover_interrupted(self, exclude=()):
+        """
+        进程重启后，把上次退出时仍在运行的任务标记为中断
+        :param exclude: 不需要标记的任务ID（如仍由工作进程执行或在队列中排队的任务）
+        :return: 被标记的任务ID列表
+        """
+        placeholders = ', '.join('?' * len(ACTIVE_STATUSES))
+        exclude = set(exclude)
+        with self._lock, self._conn:
+            task_ids = [row[0] for row in self._conn.execute(
+                f'SELECT task_id FROM tasks WHERE status IN ({placeholders})', ACTIVE_STATUSES
+            ) if row[0] not in exclude]
+            if task_ids:
+                version = self._next_version()
+                self._conn.executemany(
+                    'UPDATE tasks SET status = ?, end_time = COALESCE(end_time, ?), updated_at = ?, version = ? '
+                    'WHERE task_id = ?',
+                    [('interrupted', _format_time(datetime.now()), time.time(), version, task_id) for task_id in task_ids]
+                )
+        return task_ids
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_task(row):
+        """数据库行转为与CRAWLER_TASKS条目相同形式的字典"""
+        task = dict(row)
+        task['start_time'] = _parse_time(task['start_time'])
+        task['end_time'] = _parse_time(task['end_time'])
+        task['progress'] = json.loads(task['progress']) if task['progress'] else {}
+        return task
@@ -0,0 +1,103 @@
+import os
+import time
+import socket
+import threading
+import multiprocessing
+
+
+def worker_main(worker_name):
+    """
+    单个工作进程：循环领取队列中的任务并执行，执行期间定期发送心跳并检查停止请求
+    :param worker_name: 工作进程名称
+    """
+    # 必须在导入app之前设置，app据此跳过启动恢复并把Socket.IO事件写入队列
+    os.environ['CRAWLER_WORKER'] = '1'
+    import app as web
+
+    config = web.load_crawler_config()
+    worker_id = f"{worker_name}-{os.getpid()}"
+    poll_interval = config.get('worker_poll_interval', 2.0)
+    heartbeat_interval = config.get('worker_heartbeat_interval', 10.0)
+    current = {'task_id': None}
+
+    def heartbeat():
+        while True:
+            time.sleep(heartbeat_interval)
+            task_id = current['task_id']
+            if not task_id:
+                continue
+            try:
+                owned = web.job_queue.heartbeat(task_id, worker_id)
+                task = web.CRAWLER_TASKS.get(task_id)
+                crawler = task.get('crawler') if task else None
+                if crawler and not crawler.is_stopped and web.job_queue.stop_requested(task_id, worker_id):
+                    crawler.stop()
+                    if owned:
+                        web.set_task_status(task_id, 'stopping')
+                    else:
+                        # 心跳超时后任务已重新排队，由新领取的工作进程负责任务状态
+                        print(f"[工作进程 {worker_id}] 任务 {task_id} 已被重新排队，停止本进程中的执行")
+            except Exception as e:
+                print(f"[工作进程 {worker_id}] 发送心跳失败: {e}")
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    print(f"[工作进程 {worker_id}] 已启动，等待任务...")
+
+    while True:
+        try:
+            web.requeue_stale_jobs()
+            job = web.job_queue.claim(worker_id, config.get('max_tasks_per_host'))
+        except Exception as e:
+            print(f"[工作进程 {worker_id}] 领取任务失败: {e}")
+            job = None
+        if not job:
+            time.sleep(poll_interval)
+            continue
+
+        task_id = job['task_id']
+        current['task_id'] = task_id
+        print(f"[工作进程 {worker_id}] 开始执行任务 {task_id}")
+        try:
+            web.run_worker_job(job)
+        except Exception as e:
+            print(f"[工作进程 {worker_id}] 执行任务 {task_id} 出错: {e}")
+        finally:
+            current['task_id'] = None
+            web.job_queue.finish(task_id, worker_id)
+            web.log_pipeline.flush()
+            web.thread_socketio.flush()
+        print(f"[工作进程 {worker_id}] 任务 {task_id} 已结束")
+
+
+def run_workers(processes=None):
+    """
+    启动并看护多个工作进程，异常退出的进程会被重新启动
+    :param processes: 工作进程数量，None表示使用配置中的 worker_processes
+    """
+    from config import Config
+    processes = processes or Config.CRAWLER_CONFIG.get('worker_processes', 2)
+    # 使用spawn启动全新的解释器，避免继承父进程的gevent猴子补丁和数据库连接
+    context = multiprocessing.get_context('spawn')
+    hostname = socket.gethostname()
+
+    def start(index):
+        process = context.Process(target=worker_main, args=(f"{hostname}-{index}",), name=f"crawler-worker-{index}")
+        process.start()
+        return process
+
+    workers = {index: start(index) for index in range(1, processes + 1)}
+    print(f"已启动 {processes} 个爬虫工作进程，按 Ctrl+C 停止")
+    try:
+        while True:
+            time.sleep(5)
+            for index, process in list(workers.items()):
+                if not process.is_alive():
+                    print(f"工作进程 {index} 已退出（退出码 {process.exitcode}），重新启动")
+                    workers[index] = start(index)
+    except KeyboardInterrupt:
+        print("\n正在停止工作进程...")
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.join()
+        print("工作进程已停止")
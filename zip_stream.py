@@ -0,0 +1,77 @@
+import os
+import io
+import zipfile
+
+
+# 本身已经压缩过的格式直接存储，重复压缩只浪费CPU
+STORED_EXTENSIONS = ('.pdf', '.docx', '.doc', '.xlsx', '.pptx', '.zip', '.rar', '.7z', '.gz',
+                     '.jpg', '.jpeg', '.png', '.gif', '.mp4', '.ofd')
+
+
+class _ZipSink(io.RawIOBase):
+    """
+    只追加、不可定位的输出缓冲
+    zipfile检测到输出不可定位时改用数据描述符记录大小和CRC，因此可以边生成边发送
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def pop(self):
+        """取出已生成的数据"""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries, chunk_size=1024 * 1024, executor=None):
+    """
+    边生成边输出ZIP压缩包（支持ZIP64，单个文件或整个压缩包超过4GB时自动启用）
+    :param entries: 可迭代的 (文件路径, 压缩包内路径)，读取失败的文件会被跳过
+    :param chunk_size: 每次读取文件的字节数
+    :param executor: 执行阻塞步骤（读文件、压缩）的函数，如在线程池中运行，默认直接调用
+    :return: 生成器，产出压缩包的字节块
+    """
+    run = executor or (lambda func, *args: func(*args))
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True, strict_timestamps=False) as zipf:
+        for file_path, archive_name in entries:
+            try:
+                zinfo = zipfile.ZipInfo.from_file(file_path, archive_name, strict_timestamps=False)
+                source = open(file_path, 'rb')
+            except OSError:
+                continue
+            if os.path.splitext(file_path)[1].lower() in STORED_EXTENSIONS:
+                zinfo.compress_type = zipfile.ZIP_STORED
+            else:
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+            with source, zipf.open(zinfo, 'w') as target:
+                while run(_copy_chunk, source, target, chunk_size):
+                    data = sink.pop()
+                    if data:
+                        yield data
+            yield sink.pop()
+    # 中央目录
+    yield sink.pop()
+
+
+def _copy_chunk(source, target, chunk_size):
+    """复制一块数据到压缩包，文件读完时返回False"""
+    chunk = source.read(chunk_size)
+    if not chunk:
+        return False
+    target.write(chunk)
+    return True